@@ -0,0 +1,236 @@
+"""
+Versioned Catalogue
+===================
+
+Copy-on-write snapshots of the listing catalogue, so single listings can be
+upserted or delisted while requests are being served.
+
+Rows are append-only: an upsert appends the listing's new version and
+retires its old row, a delete only retires the row. A CatalogueSnapshot is a
+row count, a liveness mask and a read-only PropertyStore view at one version.
+Published rows are never rewritten, so a write batch copies only the
+liveness mask (one byte per row) and indexes only the rows it appends.
+
+Readers take ``catalogue.snapshot()`` once per request and use it throughout,
+without locking; writers are serialised by a lock. An old snapshot, and any
+buffers only it still references, is reclaimed by reference counting as soon
+as its last reader drops it.
+
+Once retired rows exceed COMPACT_DEAD_SHARE of all rows, the next write
+compacts the live rows into fresh structures.
+
+Each snapshot also has its own FeatureIndex (keyed by row) and MarketStats.
+A write clones the current ones copy-on-write, so only the posting sets and
+market groups it touches are copied and older snapshots keep answering as of
+their version. Feature postings keep retired rows; readers filter them by
+liveness.
+
+VersionedCatalogue serves Property records. Other records (the listing dicts
+of parlant_integration.py) get the same rows, liveness, publishing and
+compaction by subclassing it and overriding _record_id, _index and _write.
+
+A catalogue adopted from a mapped catalogue file (catalogue_file.py) keeps
+its rows, columns and id lookups in the file; only rows appended since are
+held in memory.
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from property_models import Property
+from property_store import PropertyStore
+from feature_index import FeatureIndex
+from market_stats import MarketStats
+from instrumentation import metrics
+
+# Compact once this share of rows is retired (and there are enough rows to bother)
+COMPACT_DEAD_SHARE = 0.25
+COMPACT_MIN_ROWS = 1024
+
+
+class RowSnapshot:
+    """One published version of a catalogue's rows: rows [0, size) and which of them are live"""
+
+    __slots__ = ("version", "rows", "size", "live", "live_count", "_row_history", "_listings", "__weakref__")
+
+    def __init__(self, version: int, rows: Sequence[Any], live: np.ndarray, row_history: Any):
+        self.version = version
+        # Shared and append-only; rows past size belong to later versions
+        self.rows = rows
+        self.size = len(live)
+        self.live = live
+        self.live_count = int(np.count_nonzero(live))
+        self._row_history = row_history
+        self._listings: Optional[List[Any]] = None
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    def row_of(self, record_id: str) -> Optional[int]:
+        """Live row of a listing in this version, or None if it isn't listed"""
+        for row in reversed(self._row_history.get(record_id, ())):
+            if row < self.size:
+                return row if self.live[row] else None
+        return None
+
+    def get(self, record_id: str) -> Optional[Any]:
+        row = self.row_of(record_id)
+        return self.rows[row] if row is not None else None
+
+    def listings(self) -> List[Any]:
+        """Live listings in row order, built once per snapshot"""
+        if self._listings is None:
+            self._listings = [self.rows[row] for row in np.flatnonzero(self.live).tolist()]
+        return self._listings
+
+
+class CatalogueSnapshot(RowSnapshot):
+    """A Property catalogue version: its rows plus a store view, feature index and market stats as of it"""
+
+    __slots__ = ("store", "feature_index", "market_stats")
+
+    def __init__(self, version: int, rows: Sequence[Property], live: np.ndarray, row_history: Any,
+                 store: PropertyStore, feature_index: FeatureIndex, market_stats: MarketStats):
+        super().__init__(version, rows, live, row_history)
+        self.store = store
+        self.feature_index = feature_index
+        self.market_stats = market_stats
+
+
+class VersionedCatalogue:
+    """Single-writer, lock-free-reader catalogue of Property records"""
+
+    def __init__(self):
+        self._write_lock = threading.Lock()
+        self._published: "weakref.WeakSet[RowSnapshot]" = weakref.WeakSet()
+        self.compactions = 0
+        self._reset([], version=0)
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def snapshot(self) -> RowSnapshot:
+        """The current version; hold on to it for the whole request"""
+        return self._snapshot
+
+    def _publish(self, snapshot: RowSnapshot) -> RowSnapshot:
+        self._published.add(snapshot)
+        # A single reference assignment: readers see the old or the new version, never a mix
+        self._snapshot = snapshot
+        return snapshot
+
+    def _record_id(self, record: Any) -> str:
+        return record.id
+
+    def _index(self, version: int, rows: Sequence[Property], row_history: Any,
+               feature_index: Optional[FeatureIndex] = None, store: Optional[PropertyStore] = None,
+               market_stats: Optional[MarketStats] = None) -> CatalogueSnapshot:
+        """First snapshot of a fresh row space, building whichever indexes weren't supplied"""
+        if feature_index is None:
+            feature_index = FeatureIndex()
+            for row, prop in enumerate(rows):
+                feature_index.add(row, prop.features)
+        self.store = store if store is not None else PropertyStore.from_properties(rows, feature_index.vocabulary)
+        if market_stats is None:
+            market_stats = MarketStats.from_properties(rows)
+        return CatalogueSnapshot(version, rows, np.ones(len(rows), dtype=bool), row_history,
+                                 self.store.view(), feature_index, market_stats)
+
+    def _write(self, current: CatalogueSnapshot, version: int, live: np.ndarray,
+               appended: List[Property], retired: List[int]) -> CatalogueSnapshot:
+        """Next snapshot of the current row space: appended rows (already in self._rows) added, retired rows gone"""
+        feature_index = current.feature_index
+        if appended:
+            feature_index = feature_index.copy()
+            for row, prop in enumerate(appended, current.size):
+                feature_index.add(row, prop.features)
+            self.store.append(appended)
+        market_stats = current.market_stats.copy()
+        market_stats.remove(self._rows[row] for row in retired)
+        market_stats.add(appended)
+        return CatalogueSnapshot(version, self._rows, live, self._row_history, self.store.view(),
+                                 feature_index, market_stats)
+
+    def _carried_over(self, snapshot: CatalogueSnapshot) -> Dict[str, Any]:
+        """Indexes of a compacted snapshot that don't depend on row numbers, to reuse in the new row space"""
+        return {"market_stats": snapshot.market_stats}
+
+    def _reset(self, rows: Sequence[Any], version: int, row_history: Any = None, **indexes: Any) -> RowSnapshot:
+        """Start a fresh row space owning rows (whose ids must be unique).
+
+        row_history maps id -> rows through get() and setdefault(); built from rows if not given.
+        """
+        if row_history is None:
+            row_history = {self._record_id(record): [row] for row, record in enumerate(rows)}
+        self._rows = rows
+        self._row_history = row_history
+        return self._publish(self._index(version, rows, row_history, **indexes))
+
+    def replace(self, records: Iterable[Any]) -> RowSnapshot:
+        """Swap in a whole new catalogue, rebuilding every index"""
+        records = list(records)
+        with self._write_lock:
+            return self._reset(records, self.version + 1)
+
+    def adopt(self, records: Sequence[Any], row_history: Any = None, **indexes: Any) -> RowSnapshot:
+        """Swap in a catalogue whose indexes (keyed by row) were already built, e.g. by CatalogueBuilder.
+
+        The catalogue takes ownership of records and appends to it on upsert.
+        """
+        with self._write_lock:
+            return self._reset(records, self.version + 1, row_history, **indexes)
+
+    def upsert(self, records: Iterable[Any]) -> RowSnapshot:
+        """Add listings, or replace the current version of listings with the same id"""
+        records = list({self._record_id(record): record for record in records}.values())
+        with self._write_lock:
+            current = self._snapshot
+            retired = sorted({row for row in (current.row_of(self._record_id(record)) for record in records)
+                              if row is not None})
+            start = len(self._rows)
+            self._rows.extend(records)
+            for row, record in enumerate(records, start):
+                self._row_history.setdefault(self._record_id(record), []).append(row)
+
+            live = np.ones(len(self._rows), dtype=bool)
+            live[:current.size] = current.live
+            live[retired] = False
+            return self._publish_or_compact(current, live, records, retired)
+
+    def delete(self, record_ids: Iterable[str]) -> Tuple[RowSnapshot, List[Any]]:
+        """Delist listings by id; returns the new version and the listings actually removed"""
+        with self._write_lock:
+            current = self._snapshot
+            retired = sorted({row for row in (current.row_of(record_id) for record_id in record_ids) if row is not None})
+            if not retired:
+                return current, []
+            live = current.live.copy()
+            live[retired] = False
+            return self._publish_or_compact(current, live, [], retired), [self._rows[row] for row in retired]
+
+    def _publish_or_compact(self, current: RowSnapshot, live: np.ndarray, appended: List[Any],
+                            retired: List[int]) -> RowSnapshot:
+        snapshot = self._write(current, current.version + 1, live, appended, retired)
+        dead = snapshot.size - snapshot.live_count
+        if snapshot.size >= COMPACT_MIN_ROWS and dead > COMPACT_DEAD_SHARE * snapshot.size:
+            # Renumber the live rows into a fresh row space; a fresh list, as the
+            # written snapshot's listings may already be in use by its readers
+            self.compactions += 1
+            metrics.count("catalogue_compactions")
+            return self._reset(list(snapshot.listings()), snapshot.version, **self._carried_over(snapshot))
+        return self._publish(snapshot)
+
+    def stats(self) -> Dict[str, int]:
+        current = self._snapshot
+        return {
+            "version": current.version,
+            "listings": current.live_count,
+            "rows": current.size,
+            "retired_rows": current.size - current.live_count,
+            "compactions": self.compactions,
+            # Published versions some reader still holds (the current one included)
+            "retained_snapshots": len(self._published),
+        }
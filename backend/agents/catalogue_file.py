@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+Binary Catalogue File
+=====================
+
+The listing catalogue as one flat binary file that agent processes open with
+mmap. Opening reads only a small directory; every column and index is a NumPy
+view of the mapping, so all workers on a host share one copy of the pages
+through the page cache, and an agent comes up against a million listings in
+milliseconds instead of parsing a feed.
+
+Layout: 8-byte magic, the directory length (uint64, little-endian), the JSON
+directory, then each array 64-byte aligned. The directory gives every array's
+dtype, shape and offset, and holds the small dictionaries: property types,
+suburbs, (suburb, state) places, postcodes and the feature vocabulary.
+
+Arrays:
+
+- Columns, one value per listing: the PropertyStore columns (price, type,
+  suburb and place codes, bedrooms, feature bitmask) plus bathrooms, car
+  spaces, land size (NaN for none), listing date (epoch seconds), postcode
+  code and each listing's feature IDs in listing order.
+- Strings as UTF-8 blobs with offsets: ids, addresses, agent contacts and
+  images (pipe-separated), plus the rows in id order for id lookups.
+- Precomputed indexes over the same rows: range-index buckets sorted by
+  price, lowercase suburb and state postings, feature postings, geohash cells
+  per precision with listing coordinates, and the market sketches per group.
+
+Listings are materialised as Property records (or Parlant listing dicts) on
+access, with features in their first-seen spelling as in CompactProperty.
+The file is never modified: upserts and deletes go to the in-memory
+structures layered over it (see catalogue.py and PropertyParlantAgent), which
+copy a mapped column or posting set only when they first change it. The
+catalogue is rewritten as a whole by write_catalogue.
+
+Usage:
+    python3 catalogue_file.py listings.csv.gz catalogue.bin
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections.abc import MutableMapping, Sequence
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from property_models import Property, PropertyType
+from feature_index import FeatureIndex, FeatureVocabulary, SortedPostings
+from property_store import PropertyStore
+from range_index import PropertyRangeIndex
+from geo_index import GeoIndex, PRECISIONS, cell_indices
+from market_stats import MarketStats, GroupKey, GroupState
+from ingestion import ingest_file, property_to_listing, LIST_SEPARATOR
+
+MAGIC = b"PCATALOG"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_HEADER = struct.Struct("<8sQ")
+
+
+def file_identity(stat: os.stat_result) -> Tuple[int, int, int, int]:
+    """(device, inode, size, mtime) of a file, which a rewrite by rename always changes"""
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _encode_strings(values: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(offsets, UTF-8 bytes) of a string column; value i is bytes[offsets[i]:offsets[i + 1]]"""
+    encoded = [value.encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _group_rows(codes: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(offsets, rows) listing the rows of each code in row order; code c owns rows[offsets[c]:offsets[c + 1]]"""
+    order = np.argsort(codes, kind="stable")
+    return np.searchsorted(codes[order], np.arange(count + 1)).astype(np.int64), order.astype(np.int64)
+
+
+def _feature_postings(feature_mask: np.ndarray, features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(offsets, rows) of the listings carrying each feature ID"""
+    postings = [np.flatnonzero((feature_mask[:, f >> 6] >> np.uint64(f & 63)) & np.uint64(1)) for f in range(features)]
+    offsets = np.zeros(features + 1, dtype=np.int64)
+    np.cumsum([len(rows) for rows in postings], out=offsets[1:])
+    rows = np.concatenate(postings) if postings else np.zeros(0)
+    return offsets, rows.astype(np.int64)
+
+
+def write_catalogue(path: str, properties: Iterable[Property]) -> int:
+    """Write listings with their columns and precomputed indexes; returns how many were written.
+
+    A later listing with an id already seen replaces the earlier one. The file
+    is written beside path and renamed over it, so readers never see a partial file.
+    """
+    properties = list({prop.id: prop for prop in properties}.values())
+    n = len(properties)
+    vocabulary = FeatureVocabulary()
+    store = PropertyStore.from_properties(properties, vocabulary)
+    type_values = list(store.type_codes)
+    places = list(store.place_codes)
+    postcodes: Dict[str, int] = {}
+
+    arrays: Dict[str, np.ndarray] = {
+        name: getattr(store, name)
+        for name in ("price", "type_code", "suburb_code", "place_code", "bedrooms", "feature_mask")
+    }
+    arrays["bathrooms"] = np.fromiter((p.bathrooms for p in properties), dtype=np.int16, count=n)
+    arrays["car_spaces"] = np.fromiter((p.car_spaces for p in properties), dtype=np.int16, count=n)
+    arrays["land_size"] = np.fromiter((np.nan if p.land_size is None else p.land_size for p in properties),
+                                      dtype=np.float64, count=n)
+    arrays["listed_at"] = np.fromiter((p.listing_date.timestamp() for p in properties), dtype=np.float64, count=n)
+    arrays["postcode_code"] = np.fromiter((postcodes.setdefault(p.postcode, len(postcodes)) for p in properties),
+                                          dtype=np.int32, count=n)
+    feature_ids = [[vocabulary.intern(f) for f in p.features] for p in properties]
+    arrays["feature_offsets"] = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(ids) for ids in feature_ids], out=arrays["feature_offsets"][1:])
+    arrays["feature_ids"] = np.fromiter((f for ids in feature_ids for f in ids), dtype=np.int32)
+
+    ids = [p.id for p in properties]
+    for name, values in (("id", ids), ("address", (p.address for p in properties)),
+                         ("agent_contact", (p.agent_contact for p in properties)),
+                         ("images", (LIST_SEPARATOR.join(p.images) for p in properties))):
+        arrays[f"{name}_offsets"], arrays[f"{name}_bytes"] = _encode_strings(values)
+    arrays["id_order"] = np.array(sorted(range(n), key=ids.__getitem__), dtype=np.int64)
+
+    # Range index: (type, bedrooms) buckets sorted by price, then catalogue order
+    order = np.lexsort((np.arange(n), store.price, store.bedrooms, store.type_code))
+    arrays["bucket_prices"] = store.price[order]
+    arrays["bucket_positions"] = order.astype(np.int64)
+    keys = np.stack([store.type_code[order], store.bedrooms[order]], axis=1).astype(np.int64)
+    starts = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1 if n else np.zeros(0, dtype=np.int64)
+    bounds = [0, *starts.tolist(), n] if n else []
+    buckets = [[type_values[int(keys[start, 0])], int(keys[start, 1]), start, end]
+               for start, end in zip(bounds, bounds[1:])]
+
+    # Suburb and state postings keyed by lowercase value, as the range index matches them
+    range_suburbs: Dict[str, int] = {}
+    range_states: Dict[str, int] = {}
+    place_suburb = np.array([range_suburbs.setdefault(suburb.lower(), len(range_suburbs)) for suburb, _ in places],
+                            dtype=np.int64)
+    place_state = np.array([range_states.setdefault(state.lower(), len(range_states)) for _, state in places],
+                           dtype=np.int64)
+    place_code = store.place_code.astype(np.int64)
+    arrays["suburb_posting_offsets"], arrays["suburb_postings"] = _group_rows(place_suburb[place_code],
+                                                                              len(range_suburbs))
+    arrays["state_posting_offsets"], arrays["state_postings"] = _group_rows(place_state[place_code],
+                                                                            len(range_states))
+    arrays["feature_posting_offsets"], arrays["feature_postings"] = _feature_postings(store.feature_mask,
+                                                                                     len(vocabulary))
+
+    # Geocodes: the place centroids and, per listing, the geohash cells of every precision
+    arrays["place_lat"], arrays["place_lon"] = store.place_lat, store.place_lon
+    lat, lon = store.place_lat[place_code], store.place_lon[place_code]
+    arrays["geo_lat"], arrays["geo_lon"] = lat, lon
+    located = np.flatnonzero(~np.isnan(lat))
+    for precision in PRECISIONS:
+        cells = cell_indices(lat[located], lon[located], precision)
+        order = np.argsort(cells, kind="stable")
+        unique, starts = np.unique(cells[order], return_index=True)
+        arrays[f"geo{precision}_cells"] = unique.astype(np.int64)
+        arrays[f"geo{precision}_offsets"] = np.append(starts, len(cells)).astype(np.int64)
+        arrays[f"geo{precision}_positions"] = located[order].astype(np.int64)
+
+    # Market sketches, keyed by place code and type code + 1 (0 for the suburb-wide group)
+    market = MarketStats.from_properties(properties)
+    type_slots = len(type_values) + 1
+    group_keys, group_states = [], []
+    for (suburb, state, property_type), group in market.group_states().items():
+        type_slot = 0 if property_type is None else store.type_codes[property_type] + 1
+        group_keys.append(store.place_codes[suburb, state] * type_slots + type_slot)
+        group_states.append(group)
+    order = np.argsort(np.array(group_keys, dtype=np.int64), kind="stable")
+    group_states = [group_states[i] for i in order]
+    arrays["market_keys"] = np.array(group_keys, dtype=np.int64)[order]
+    arrays["market_listed_days"] = np.array([state[2] for state in group_states], dtype=np.float64)
+    for name, part in (("price", 0), ("rate", 1)):
+        sketches = [state[part] for state in group_states]
+        offsets = np.zeros(len(sketches) + 1, dtype=np.int64)
+        np.cumsum([len(sketch) for sketch in sketches], out=offsets[1:])
+        arrays[f"market_{name}_offsets"] = offsets
+        arrays[f"market_{name}_buckets"] = np.fromiter((k for sketch in sketches for k in sketch), dtype=np.int64)
+        arrays[f"market_{name}_counts"] = np.fromiter((c for sketch in sketches for c in sketch.values()),
+                                                      dtype=np.int64)
+
+    directory: Dict[str, Any] = {
+        "format": FORMAT_VERSION,
+        "listings": n,
+        "type_values": type_values,
+        "suburbs": list(store.suburb_codes),
+        "places": places,
+        "range_suburbs": list(range_suburbs),
+        "range_states": list(range_states),
+        "postcodes": list(postcodes),
+        "features": vocabulary.names,
+        "feature_display_names": vocabulary.display_names,
+        "buckets": buckets,
+        "relative_accuracy": market.relative_accuracy,
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        array = arrays[name] = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        directory["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps(directory).encode()
+    data_start = _aligned(_HEADER.size + len(header))
+
+    partial = f"{path}.partial"
+    with open(partial, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + directory["arrays"][name]["offset"])
+            f.write(memoryview(array).cast("B"))
+        f.truncate(data_start + offset)
+    os.replace(partial, path)
+    return n
+
+
+class MappedRows(Sequence):
+    """A catalogue file's rows, materialised on access, followed by rows appended in memory"""
+
+    def __init__(self, size: int, materialise: Callable[[int], Any]):
+        self._size = size
+        self._materialise = materialise
+        self._appended: List[Any] = []
+
+    def __len__(self) -> int:
+        return self._size + len(self._appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if 0 <= index < self._size:
+            return self._materialise(index)
+        return self._appended[index - self._size]
+
+    def append(self, row: Any):
+        self._appended.append(row)
+
+    def extend(self, rows: Iterable[Any]):
+        self._appended.extend(rows)
+
+
+class MappedRowHistory:
+    """id -> rows it has occupied: its row in the file (if any), then rows appended since.
+
+    Supports the get() / setdefault() calls the catalogues make on their id -> rows dicts.
+    """
+
+    def __init__(self, catalogue_file: "CatalogueFile"):
+        self._file = catalogue_file
+        self._appended: Dict[str, List[int]] = {}
+
+    def get(self, listing_id: str, default: Any = None) -> Any:
+        row = self._file.row_of(listing_id)
+        appended = self._appended.get(listing_id)
+        if row is None:
+            return appended if appended is not None else default
+        return [row] + appended if appended else [row]
+
+    def setdefault(self, listing_id: str, default: List[int]) -> List[int]:
+        return self._appended.setdefault(listing_id, default)
+
+
+class _MappedRecords(MutableMapping):
+    """Range-index records: read from the file's columns for its rows, held in memory for later ones"""
+
+    def __init__(self, catalogue_file: "CatalogueFile"):
+        self._file = catalogue_file
+        self._size = len(catalogue_file)
+        self._added: Dict[int, tuple] = {}
+
+    def __getitem__(self, position: int) -> tuple:
+        if 0 <= position < self._size:
+            return self._file.range_record(position)
+        return self._added[position]
+
+    def __setitem__(self, position: int, record: tuple):
+        if 0 <= position < self._size:
+            raise ValueError("records of a catalogue file are read-only")
+        self._added[position] = record
+
+    def __delitem__(self, position: int):
+        del self._added[position]
+
+    def __iter__(self) -> Iterator[int]:
+        yield from range(self._size)
+        yield from self._added
+
+    def __len__(self) -> int:
+        return self._size + len(self._added)
+
+
+class _MappedFeatureSets(MutableMapping):
+    """Position -> feature IDs: decoded from the file's bitmask rows, held in memory for later ones"""
+
+    def __init__(self, catalogue_file: "CatalogueFile"):
+        self._file = catalogue_file
+        self._size = len(catalogue_file)
+        self._added: Dict[int, FrozenSet[int]] = {}
+        self._removed = set()
+
+    def __getitem__(self, position: int) -> FrozenSet[int]:
+        if 0 <= position < self._size and position not in self._removed:
+            return self._file.feature_set(position)
+        return self._added[position]
+
+    def __setitem__(self, position: int, feature_ids: FrozenSet[int]):
+        if 0 <= position < self._size:
+            raise ValueError("features of a catalogue file are read-only")
+        self._added[position] = feature_ids
+
+    def __delitem__(self, position: int):
+        if 0 <= position < self._size and position not in self._removed:
+            self._removed.add(position)
+        else:
+            del self._added[position]
+
+    def __iter__(self) -> Iterator[int]:
+        yield from (position for position in range(self._size) if position not in self._removed)
+        yield from self._added
+
+    def __len__(self) -> int:
+        return self._size - len(self._removed) + len(self._added)
+
+
+class _MappedCells:
+    """One geohash precision's cell -> positions, binary-searched in the file; changed cells held in memory"""
+
+    def __init__(self, cells: np.ndarray, offsets: np.ndarray, positions: np.ndarray):
+        self._cells = cells
+        self._offsets = offsets
+        self._positions = positions
+        self._changed: Dict[int, Any] = {}
+
+    def get(self, cell: int, default: Any = None) -> Any:
+        if cell in self._changed:
+            return self._changed[cell]
+        i = int(self._cells.searchsorted(cell))
+        if i == len(self._cells) or self._cells[i] != cell:
+            return default
+        return self._positions[self._offsets[i]:self._offsets[i + 1]]
+
+    def __setitem__(self, cell: int, positions: Any):
+        self._changed[cell] = positions
+
+
+class CatalogueFile:
+    """A catalogue file mapped read-only; arrays are views of the shared page cache"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # write_catalogue replaces the file by rename; this tells the mapped version from its successors
+            self.identity = file_identity(os.fstat(f.fileno()))
+        magic, header_length = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalogue file")
+        self.directory = json.loads(self._map[_HEADER.size:_HEADER.size + header_length])
+        if self.directory["format"] != FORMAT_VERSION:
+            raise ValueError(f"{path} has catalogue format {self.directory['format']}, expected {FORMAT_VERSION}")
+        data_start = _aligned(_HEADER.size + header_length)
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in self.directory["arrays"].items():
+            count = int(np.prod(spec["shape"]))
+            array = (np.frombuffer(self._map, dtype=spec["dtype"], count=count, offset=data_start + spec["offset"])
+                     if count else np.zeros(0, dtype=spec["dtype"]))
+            self.arrays[name] = array.reshape(spec["shape"])
+
+        self.size: int = self.directory["listings"]
+        self.type_values: List[str] = self.directory["type_values"]
+        self.places: List[Tuple[str, str]] = [tuple(place) for place in self.directory["places"]]
+        self.postcodes: List[str] = self.directory["postcodes"]
+        self.vocabulary = FeatureVocabulary()
+        self.vocabulary.names = list(self.directory["features"])
+        self.vocabulary.display_names = list(self.directory["feature_display_names"])
+        self.vocabulary.ids = {name: i for i, name in enumerate(self.vocabulary.names)}
+        self._property_types = [PropertyType(value) for value in self.type_values]
+        self._place_lower = [(suburb.lower(), state.lower()) for suburb, state in self.places]
+        # Hot columns as local attributes for per-row materialisation
+        arrays = self.arrays
+        self._price, self._type_code, self._bedrooms = arrays["price"], arrays["type_code"], arrays["bedrooms"]
+        self._place_code = arrays["place_code"]
+        # (suburb, state) -> place code, built when market stats are first needed
+        self._place_codes: Optional[Dict[Tuple[str, str], int]] = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _string(self, name: str, row: int) -> str:
+        offsets = self.arrays[f"{name}_offsets"]
+        return self.arrays[f"{name}_bytes"][offsets[row]:offsets[row + 1]].tobytes().decode()
+
+    def property(self, row: int) -> Property:
+        """Listing at a row as a Property"""
+        arrays = self.arrays
+        suburb, state = self.places[self._place_code[row]]
+        land_size = float(arrays["land_size"][row])
+        feature_offsets = arrays["feature_offsets"]
+        feature_ids = arrays["feature_ids"][feature_offsets[row]:feature_offsets[row + 1]].tolist()
+        images = self._string("images", row)
+        return Property(
+            id=self._string("id", row),
+            address=self._string("address", row),
+            price=int(self._price[row]),
+            property_type=self._property_types[self._type_code[row]],
+            bedrooms=int(self._bedrooms[row]),
+            bathrooms=int(arrays["bathrooms"][row]),
+            car_spaces=int(arrays["car_spaces"][row]),
+            land_size=None if np.isnan(land_size) else land_size,
+            features=[self.vocabulary.display_names[f] for f in feature_ids],
+            images=images.split(LIST_SEPARATOR) if images else [],
+            agent_contact=self._string("agent_contact", row),
+            listing_date=datetime.fromtimestamp(float(arrays["listed_at"][row])),
+            suburb=suburb,
+            state=state,
+            postcode=self.postcodes[arrays["postcode_code"][row]],
+        )
+
+    def listing(self, row: int) -> Dict[str, Any]:
+        """Listing at a row as a PropertyParlantAgent listing dict"""
+        return property_to_listing(self.property(row))
+
+    def row_of(self, listing_id: str) -> Optional[int]:
+        """Row of a listing id, by binary search over the rows in id order"""
+        order = self.arrays["id_order"]
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._string("id", order[mid]) < listing_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and self._string("id", order[lo]) == listing_id:
+            return int(order[lo])
+        return None
+
+    def range_record(self, row: int) -> tuple:
+        """(price, property_type, bedrooms, suburb_lower, state_lower), as PropertyRangeIndex records it"""
+        suburb, state = self._place_lower[self._place_code[row]]
+        return int(self._price[row]), self.type_values[self._type_code[row]], int(self._bedrooms[row]), suburb, state
+
+    def feature_set(self, row: int) -> FrozenSet[int]:
+        """Feature IDs of the listing at a row"""
+        feature_offsets = self.arrays["feature_offsets"]
+        return frozenset(self.arrays["feature_ids"][feature_offsets[row]:feature_offsets[row + 1]].tolist())
+
+    def rows(self) -> MappedRows:
+        """Rows as Property records, for VersionedCatalogue"""
+        return MappedRows(self.size, self.property)
+
+    def listing_rows(self) -> MappedRows:
+        """Rows as listing dicts, for PropertyParlantAgent"""
+        return MappedRows(self.size, self.listing)
+
+    def row_history(self) -> MappedRowHistory:
+        return MappedRowHistory(self)
+
+    def property_store(self) -> PropertyStore:
+        """PropertyStore over the mapped columns, sharing this file's vocabulary"""
+        store = PropertyStore.from_columns(self.arrays, self.type_values, self.directory["suburbs"], self.places,
+                                           self.arrays["place_lat"], self.arrays["place_lon"], self.vocabulary)
+        store.source = (self.path, self.size, self.identity)
+        return store
+
+    def _postings(self, names: List[Any], prefix: str) -> Dict[Any, SortedPostings]:
+        offsets, rows = self.arrays[f"{prefix}_posting_offsets"], self.arrays[f"{prefix}_postings"]
+        bounds = offsets.tolist()
+        return {name: SortedPostings(rows[bounds[i]:bounds[i + 1]]) for i, name in enumerate(names)}
+
+    def range_index(self) -> PropertyRangeIndex:
+        """PropertyRangeIndex over the mapped buckets, postings and columns"""
+        prices, positions = self.arrays["bucket_prices"], self.arrays["bucket_positions"]
+        buckets = {(property_type, bedrooms): (prices[start:end], positions[start:end])
+                   for property_type, bedrooms, start, end in self.directory["buckets"]}
+        return PropertyRangeIndex.from_precomputed(
+            _MappedRecords(self), buckets,
+            self._postings(self.directory["range_suburbs"], "suburb"),
+            self._postings(self.directory["range_states"], "state"))
+
+    def feature_index(self) -> FeatureIndex:
+        """FeatureIndex keyed by row position (not listing id) over the mapped feature postings"""
+        postings = self._postings(list(range(len(self.directory["features"]))), "feature")
+        return FeatureIndex.from_precomputed(self.vocabulary, postings, _MappedFeatureSets(self))
+
+    def geo_index(self) -> GeoIndex:
+        """GeoIndex over the mapped listing coordinates and geohash cells"""
+        cells = {precision: _MappedCells(self.arrays[f"geo{precision}_cells"], self.arrays[f"geo{precision}_offsets"],
+                                         self.arrays[f"geo{precision}_positions"])
+                 for precision in PRECISIONS}
+        return GeoIndex.from_precomputed(self.arrays["geo_lat"], self.arrays["geo_lon"], cells)
+
+    def market_stats(self) -> MarketStats:
+        """MarketStats that loads each group's stored sketches on first use"""
+        return MarketStats(self.directory["relative_accuracy"], loader=self._market_group)
+
+    def _market_group(self, key: GroupKey) -> Optional[GroupState]:
+        suburb, state, property_type = key
+        if self._place_codes is None:
+            self._place_codes = {place: i for i, place in enumerate(self.places)}
+        place = self._place_codes.get((suburb, state))
+        if place is None or (property_type is not None and property_type not in self.type_values):
+            return None
+        type_slot = 0 if property_type is None else self.type_values.index(property_type) + 1
+        wanted = place * (len(self.type_values) + 1) + type_slot
+        keys = self.arrays["market_keys"]
+        i = int(keys.searchsorted(wanted))
+        if i == len(keys) or keys[i] != wanted:
+            return None
+        sketches = []
+        for name in ("price", "rate"):
+            offsets = self.arrays[f"market_{name}_offsets"]
+            span = slice(offsets[i], offsets[i + 1])
+            sketches.append(dict(zip(self.arrays[f"market_{name}_buckets"][span].tolist(),
+                                     self.arrays[f"market_{name}_counts"][span].tolist())))
+        return sketches[0], sketches[1], float(self.arrays["market_listed_days"][i])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert a CSV/JSONL listing feed into a binary catalogue file')
+    parser.add_argument('feed', help='Listing feed (.csv, .jsonl or .ndjson, optionally .gz)')
+    parser.add_argument('path', help='Catalogue file to write')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows validated per batch')
+
+    args = parser.parse_args()
+    builder = ingest_file(args.feed, batch_size=args.batch_size)
+    started = time.perf_counter()
+    written = write_catalogue(args.path, builder.properties)
+    print(json.dumps({
+        "feed": builder.stats.summary(),
+        "listings_written": written,
+        "write_seconds": round(time.perf_counter() - started, 2),
+        "file_mb": round(os.path.getsize(args.path) / (1024 * 1024), 1),
+    }, indent=2))
+    for error in builder.stats.errors[:10]:
+        print(f"⚠️ {error}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Persistent Parlant Chat Worker
+This script keeps one warm PropertyParlantAgent alive and answers many chat
+requests over newline-delimited JSON, either on stdin/stdout or on a local
+Unix socket.
+
+Request lines:
+    {"id": "42", "op": "chat", "message": "3 bed house", "user_id": "u1"}
+    {"id": "43", "op": "health"}
+    {"id": "46", "op": "chat_batch", "requests": [{"user_id": "u1", "message": "..."}, ...]}
+    {"id": "47", "op": "chat_stream", "message": "3 bed house", "user_id": "u1"}
+    {"id": "48", "op": "metrics"}                      Prometheus text (or "format": "json")
+
+Adding "debug": true to a chat request (or setting CHAT_DEBUG=1) attaches a
+per-span millisecond breakdown to the result as "timings".
+
+Response lines always echo the request id:
+    {"id": "42", "status": "ok", "result": {...}}
+    {"id": "43", "status": "ok", "result": {"ready": true, ...}}
+    {"id": "44", "status": "busy", "error": "..."}
+    {"id": "45", "status": "error", "error": "..."}
+    {"id": "46", "status": "ok", "result": [{"status": "ok", "result": {...}}, {"status": "error", "error": "..."}]}
+
+A stream is answered with any number of intermediate lines followed by one
+final ok/error line carrying the complete result:
+    {"id": "47", "status": "stream", "event": {"event": "recommendations", ...}}
+    {"id": "47", "status": "stream", "event": {"event": "token", "text": "Perfect! I "}}
+    {"id": "47", "status": "ok", "result": {...}}
+
+A batch is answered with one line whose result list is in request order, and
+each of its items counts against max_in_flight.
+
+Once the agent is warm the worker emits a single {"id": null, "status": "ready"}
+line so clients know they can start sending traffic.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import argparse
+from typing import Dict, Any, Optional, Callable, Awaitable
+from parlant_integration import (get_agent, chat_with_parlant, chat_batch_with_parlant, chat_stream_with_parlant,
+                                 CHAT_ERROR_MESSAGE)
+from instrumentation import metrics, request_timings
+
+# Lines larger than this are rejected instead of buffered without bound
+MAX_LINE_BYTES = 1024 * 1024
+
+# Attach per-request span timings to every chat result
+DEBUG_TIMINGS = os.getenv("CHAT_DEBUG", "0") == "1"
+
+
+class ChatWorker:
+    """Dispatches NDJSON requests to the shared agent with bounded concurrency"""
+
+    def __init__(self, max_in_flight: int = 32):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.served = 0
+        self.rejected = 0
+        self.failed = 0
+        self.ready = False
+        self.started_at = time.monotonic()
+
+    async def warm_up(self):
+        """Build and initialise the agent once, before accepting traffic"""
+        await get_agent()
+        self.ready = True
+
+    def health(self) -> Dict[str, Any]:
+        """Health and readiness snapshot"""
+        return {
+            "ready": self.ready,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "served": self.served,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "uptime_s": round(time.monotonic() - self.started_at, 3),
+        }
+
+    async def handle_line(self, line: bytes, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """Parse one request line and answer it through ``send``"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            await send({"id": None, "status": "error", "error": f"invalid request: {e}"})
+            return
+
+        request_id = request.get("id")
+        op = request.get("op", "chat")
+
+        if op in ("health", "ready"):
+            await send({"id": request_id, "status": "ok", "result": self.health()})
+            return
+
+        if op == "metrics":
+            await send({"id": request_id, "status": "ok", "result": self.export_metrics(request.get("format", "prometheus"))})
+            return
+
+        if op == "chat_batch":
+            await self.handle_batch(request_id, request.get("requests"), send)
+            return
+
+        if op not in ("chat", "chat_stream"):
+            await send({"id": request_id, "status": "error", "error": f"unknown op: {op}"})
+            return
+
+        message = request.get("message")
+        if not message:
+            await send({"id": request_id, "status": "error", "error": "message is required"})
+            return
+
+        # Backpressure: shed load instead of queueing without bound
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            metrics.count("worker_busy")
+            await send({"id": request_id, "status": "busy", "error": "worker is at capacity"})
+            return
+
+        self.in_flight += 1
+        try:
+            with request_timings() as timings:
+                if op == "chat_stream":
+                    await self.handle_stream(request_id, message, request.get("user_id", "default"), send,
+                                             timings if request.get("debug") or DEBUG_TIMINGS else None)
+                    return
+                with metrics.span("worker_chat"):
+                    result = await chat_with_parlant(message, request.get("user_id", "default"))
+            if request.get("debug") or DEBUG_TIMINGS:
+                result = dict(result, timings=timings)
+            self.served += 1
+            await send({"id": request_id, "status": "ok", "result": result})
+        except Exception as e:
+            self.failed += 1
+            metrics.count("worker_errors")
+            print(f"❌ Chat request {request_id!r} failed: {e!r}", file=sys.stderr)
+            await send({"id": request_id, "status": "error", "error": CHAT_ERROR_MESSAGE})
+        finally:
+            self.in_flight -= 1
+
+    async def handle_stream(self, request_id: Any, message: str, user_id: str,
+                            send: Callable[[Dict[str, Any]], Awaitable[None]],
+                            timings: Optional[Dict[str, float]] = None):
+        """Forward stream events as they are produced, then the final result"""
+        started = time.perf_counter()
+        first_event = True
+        async for event in chat_stream_with_parlant(message, user_id):
+            if first_event:
+                # Time to first event is what users perceive as latency when streaming
+                if metrics.enabled:
+                    metrics.record("worker_stream_first_event", int((time.perf_counter() - started) * 1e6))
+                first_event = False
+            if event["event"] == "done":
+                self.served += 1
+                if metrics.enabled:
+                    metrics.record("worker_chat_stream", int((time.perf_counter() - started) * 1e6))
+                result = event["result"] if timings is None else dict(event["result"], timings=timings)
+                await send({"id": request_id, "status": "ok", "result": result})
+            elif event["event"] == "error":
+                self.failed += 1
+                await send({"id": request_id, "status": "error", "error": event["error"]})
+            else:
+                await send({"id": request_id, "status": "stream", "event": event})
+
+    def export_metrics(self, fmt: str = "prometheus") -> Dict[str, Any]:
+        """Instrumentation snapshot as Prometheus text or JSON"""
+        if fmt == "json":
+            return dict(metrics.snapshot(), worker=self.health())
+        return {"content_type": "text/plain; version=0.0.4", "text": metrics.prometheus()}
+
+    async def handle_batch(self, request_id: Any, items: Any, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """Answer a burst of chats with one in-order result list"""
+        if not isinstance(items, list) or not items:
+            await send({"id": request_id, "status": "error", "error": "requests must be a non-empty list"})
+            return
+        if len(items) > self.max_in_flight:
+            await send({"id": request_id, "status": "error",
+                        "error": f"batch of {len(items)} exceeds max_in_flight {self.max_in_flight}"})
+            return
+        if self.in_flight + len(items) > self.max_in_flight:
+            self.rejected += len(items)
+            await send({"id": request_id, "status": "busy", "error": "worker is at capacity"})
+            return
+
+        # Malformed items get their own error without failing the rest of the batch
+        results: list = [None] * len(items)
+        pairs = []
+        positions = []
+        for i, item in enumerate(items):
+            if isinstance(item, dict) and item.get("message"):
+                pairs.append((item.get("user_id", "default"), item["message"]))
+                positions.append(i)
+            else:
+                results[i] = {"status": "error", "error": "message is required"}
+
+        self.in_flight += len(items)
+        try:
+            for i, result in zip(positions, await chat_batch_with_parlant(pairs)):
+                results[i] = result
+            for result in results:
+                if result["status"] == "ok":
+                    self.served += 1
+                else:
+                    self.failed += 1
+            await send({"id": request_id, "status": "ok", "result": results})
+        except Exception as e:
+            self.failed += len(items)
+            metrics.count("worker_errors")
+            print(f"❌ Chat batch {request_id!r} failed: {e!r}", file=sys.stderr)
+            await send({"id": request_id, "status": "error", "error": CHAT_ERROR_MESSAGE})
+        finally:
+            self.in_flight -= len(items)
+
+    async def serve_stream(self, reader: asyncio.StreamReader, send: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """Read request lines until EOF, handling each one concurrently"""
+        tasks = set()
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # Line exceeded the reader limit; the stream cannot be resynchronised
+                await send({"id": None, "status": "error", "error": "request line too long"})
+                break
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.create_task(self.handle_line(line, send))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _line_writer(write: Callable[[bytes], None], drain: Optional[Callable[[], Awaitable[None]]] = None):
+    """Build a ``send`` coroutine that serialises one response per line"""
+    lock = asyncio.Lock()
+
+    async def send(response: Dict[str, Any]):
+        data = (json.dumps(response, default=str) + "\n").encode()
+        async with lock:
+            write(data)
+            if drain:
+                await drain()
+
+    return send
+
+
+async def serve_stdio(worker: ChatWorker):
+    """Serve requests from stdin, answering on stdout"""
+    # Keep stdout reserved for protocol lines; diagnostic prints go to stderr
+    protocol_out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+
+    def write(data: bytes):
+        protocol_out.write(data)
+        protocol_out.flush()
+
+    send = _line_writer(write)
+
+    await worker.warm_up()
+    await send({"id": None, "status": "ready"})
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE_BYTES)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    await worker.serve_stream(reader, send)
+
+
+async def serve_unix(worker: ChatWorker, path: str):
+    """Serve requests on a local Unix socket, one NDJSON stream per connection"""
+    await worker.warm_up()
+
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        send = _line_writer(writer.write, writer.drain)
+        try:
+            await send({"id": None, "status": "ready"})
+            await worker.serve_stream(reader, send)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(on_connect, path=path, limit=MAX_LINE_BYTES)
+    print(f"✅ Chat worker listening on {path}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Persistent Parlant chat worker')
+    parser.add_argument('--socket', help='Serve on this Unix socket path instead of stdin/stdout')
+    parser.add_argument('--max-in-flight', type=int, default=32,
+                        help='Concurrent chats allowed before requests are rejected as busy')
+
+    args = parser.parse_args()
+    worker = ChatWorker(max_in_flight=args.max_in_flight)
+
+    if args.socket:
+        await serve_unix(worker, args.socket)
+    else:
+        await serve_stdio(worker)
+
+if __name__ == "__main__":
+    asyncio.run(main())
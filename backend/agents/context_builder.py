@@ -0,0 +1,101 @@
+"""
+Chat Context Builder
+====================
+
+Builds the context passed to ``agent.chat`` from a pre-ranked shortlist of
+compact property summaries instead of the whole catalogue, so payload size,
+serialisation cost and LLM tokens stay flat as inventory grows.
+
+Each property's summary is memoised together with its serialised size, and
+summaries are added in rank order while the context, serialised the way
+``json.dumps`` does by default, stays within the configured byte budget.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rough bytes-per-token ratio for English/JSON text, used to turn a token budget into bytes
+BYTES_PER_TOKEN = 4
+
+# Features listed per property summary; the full list rarely changes a recommendation
+SUMMARY_FEATURES = 5
+
+
+class ContextBuilder:
+    """Assembles a size-bounded chat context around a ranked property shortlist"""
+
+    def __init__(self, max_bytes: int = 6000, shortlist_size: int = 8):
+        self.max_bytes = max_bytes
+        self.shortlist_size = shortlist_size
+        # property id -> (summary, its serialised length)
+        self._summaries: Dict[str, Tuple[Dict[str, Any], int]] = {}
+
+    @classmethod
+    def from_token_budget(cls, max_tokens: int, shortlist_size: int = 8) -> "ContextBuilder":
+        return cls(max_bytes=max_tokens * BYTES_PER_TOKEN, shortlist_size=shortlist_size)
+
+    def property_summary(self, prop: Any) -> Dict[str, Any]:
+        """Compact summary of a listing, memoised by property id"""
+        return self._summary(prop)[0]
+
+    def _summary(self, prop: Any) -> Tuple[Dict[str, Any], int]:
+        entry = self._summaries.get(prop.id)
+        if entry is None:
+            summary = {
+                "id": prop.id,
+                "address": prop.address,
+                "price": prop.price,
+                "type": prop.property_type.value,
+                "beds": prop.bedrooms,
+                "baths": prop.bathrooms,
+                "cars": prop.car_spaces,
+                "suburb": prop.suburb,
+                "features": prop.features[:SUMMARY_FEATURES],
+            }
+            entry = self._summaries[prop.id] = (summary, len(json.dumps(summary)))
+        return entry
+
+    def invalidate(self, property_id: Optional[str] = None):
+        """Forget memoised summaries for one listing, or all of them"""
+        if property_id is None:
+            self._summaries.clear()
+        else:
+            self._summaries.pop(property_id, None)
+
+    @staticmethod
+    def profile_summary(user_profile: Any) -> Dict[str, Any]:
+        """The profile fields that shape recommendations, without history or timestamps"""
+        return {
+            "name": user_profile.name,
+            "user_type": user_profile.user_type.value,
+            "budget": [user_profile.budget_min, user_profile.budget_max],
+            "property_types": [pt.value for pt in user_profile.property_types],
+            "preferred_suburbs": user_profile.preferred_suburbs,
+            "must_have_features": user_profile.must_have_features,
+            "nice_to_have_features": user_profile.nice_to_have_features,
+            "deal_breakers": user_profile.deal_breakers,
+        }
+
+    def build(self, user_profile: Any, shortlist: List[Any],
+              search_criteria: Optional[Dict[str, Any]] = None,
+              conversation_history: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Context dict for agent.chat, with as much of the shortlist as fits the budget"""
+        summaries: List[Dict[str, Any]] = []
+        context = {
+            "user_profile": self.profile_summary(user_profile),
+            "search_criteria": search_criteria or {},
+            "conversation_history": conversation_history or [],
+            "available_properties": summaries,
+        }
+        # Size of the whole payload with an empty shortlist; each summary then adds its own
+        # serialised length plus the ", " separating it from the previous one
+        used = len(json.dumps(context, default=str))
+        for prop in shortlist[:self.shortlist_size]:
+            summary, size = self._summary(prop)
+            if summaries:
+                size += 2
+            if used + size > self.max_bytes:
+                break
+            summaries.append(summary)
+            used += size
+        return context
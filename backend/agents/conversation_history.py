@@ -0,0 +1,151 @@
+"""
+Conversation History
+====================
+
+Bounded per-session chat history. The most recent turns are kept verbatim in
+a ring buffer; when the buffer exceeds its turn count or byte budget, the
+oldest turns are folded into a single summary record. Memory per session and
+the history's share of the prompt therefore stay constant however long the
+conversation runs.
+
+The default summariser is extractive and deterministic (it keeps the opening
+of each user request, newest first, within a fixed byte cap); pass a different
+``summariser`` to use an LLM or anything else with the same signature.
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Per-turn bookkeeping (role, timestamp, JSON framing) counted on top of the text
+TURN_OVERHEAD_BYTES = 48
+
+# Characters kept from each summarised user turn
+SUMMARY_SNIPPET_CHARS = 80
+
+
+class Turn:
+    """One message in the conversation"""
+
+    __slots__ = ("role", "text", "at")
+
+    def __init__(self, role: str, text: str, at: Optional[float] = None):
+        self.role = role
+        self.text = text
+        self.at = time.time() if at is None else at
+
+    @property
+    def size(self) -> int:
+        return len(self.text.encode("utf-8")) + TURN_OVERHEAD_BYTES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"role": self.role, "text": self.text}
+
+
+def extractive_summary(previous: Optional[str], turns: List[Turn], max_bytes: int) -> str:
+    """Fold turns into the running summary: newest user requests first, oldest dropped past max_bytes"""
+    snippets = []
+    for turn in reversed(turns):
+        if turn.role != "user":
+            continue
+        snippet = " ".join(turn.text.split())
+        if len(snippet) > SUMMARY_SNIPPET_CHARS:
+            snippet = snippet[:SUMMARY_SNIPPET_CHARS - 1].rstrip() + "…"
+        snippets.append(snippet)
+    if previous:
+        # Older clauses go last so they are the first to fall off once the cap is reached
+        snippets.extend(previous.split(" | "))
+
+    summary = ""
+    for snippet in snippets:
+        candidate = f"{summary} | {snippet}" if summary else snippet
+        if len(candidate.encode("utf-8")) > max_bytes:
+            break
+        summary = candidate
+    return summary
+
+
+class ConversationHistory:
+    """Ring buffer of recent turns plus one rolling summary of everything older"""
+
+    def __init__(self, max_turns: int = 20, max_bytes: int = 3000, max_summary_bytes: int = 600,
+                 compact_batch: int = 6,
+                 summariser: Callable[[Optional[str], List[Turn], int], str] = extractive_summary):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.max_summary_bytes = max_summary_bytes
+        # Compact several turns at once so summarisation runs every few turns, not every turn
+        self.compact_batch = compact_batch
+        self.summariser = summariser
+        self.turns: Deque[Turn] = deque()
+        self.summary: Optional[str] = None
+        self.summarised_turns = 0
+        self.bytes = 0
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def append(self, role: str, text: str, at: Optional[float] = None):
+        """Record a turn, compacting older turns if the window is over budget"""
+        # A single oversized message is clipped so one turn can never exceed the window
+        limit = self.max_bytes - TURN_OVERHEAD_BYTES
+        if len(text.encode("utf-8")) > limit:
+            text = text.encode("utf-8")[:limit].decode("utf-8", "ignore")
+        turn = Turn(role, text, at)
+        self.turns.append(turn)
+        self.bytes += turn.size
+        if len(self.turns) > self.max_turns or self.bytes > self.max_bytes:
+            self.compact()
+
+    def compact(self):
+        """Move the oldest turns into the summary until the window fits its budget"""
+        evicted: List[Turn] = []
+        while self.turns and (len(self.turns) > self.max_turns or self.bytes > self.max_bytes
+                              or len(evicted) < self.compact_batch):
+            # Always keep the newest turn verbatim
+            if len(self.turns) == 1:
+                break
+            turn = self.turns.popleft()
+            self.bytes -= turn.size
+            evicted.append(turn)
+        if not evicted:
+            return
+        self.summary = self.summariser(self.summary, evicted, self.max_summary_bytes) or self.summary
+        self.summarised_turns += len(evicted)
+        self.compactions += 1
+
+    def to_context(self) -> List[Dict[str, Any]]:
+        """History as sent to the LLM: the summary record, then the recent turns"""
+        context = []
+        if self.summary:
+            context.append({"role": "summary", "text": self.summary, "turns": self.summarised_turns})
+        context.extend(turn.to_dict() for turn in self.turns)
+        return context
+
+    def to_record(self) -> List[Any]:
+        """Compact serialisable form for the session store"""
+        return [self.summary, self.summarised_turns, [[t.role, t.text, t.at] for t in self.turns]]
+
+    @classmethod
+    def from_record(cls, record: Optional[List[Any]], **options: Any) -> "ConversationHistory":
+        history = cls(**options)
+        if record:
+            history.summary, history.summarised_turns, turns = record
+            for role, text, at in turns:
+                turn = Turn(role, text, at)
+                history.turns.append(turn)
+                history.bytes += turn.size
+            # Options may be tighter than when the record was written
+            if len(history.turns) > history.max_turns or history.bytes > history.max_bytes:
+                history.compact()
+        return history
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "turns": len(self.turns),
+            "bytes": self.bytes,
+            "summary_bytes": len(self.summary.encode("utf-8")) if self.summary else 0,
+            "summarised_turns": self.summarised_turns,
+            "compactions": self.compactions,
+        }
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Criteria Extraction Engine
+==========================
+
+Single-pass extraction of property search criteria from a chat message.
+
+Numeric criteria (budget ranges such as "600k-900k", "between 600k and 900k"
+or "$1.2m", bedroom counts, search radii such as "within 10 km") come from
+module-level precompiled patterns; a range's upper bound is the budget.
+Everything matched by name -- suburbs and postcodes from the gazetteer,
+states, property types, features and the conversational keywords
+_generate_ai_response reacts to -- is found by one Aho-Corasick automaton scan
+over the lowercased message. Overlapping names resolve leftmost-longest, so a
+multi-word suburb such as "Victoria Park" wins over the state name it
+contains.
+
+The bundled gazetteer (backend/data/au_suburbs.csv) is a small sample; point
+SUBURB_GAZETTEER at a full suburb,state,postcode CSV to load the national list
+(benchmarks/synthetic.py --gazetteer writes a national-sized synthetic one).
+
+Usage:
+    python3 criteria_extractor.py --bench
+"""
+
+import csv
+import os
+import re
+import time
+import argparse
+from collections import deque
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "au_suburbs.csv")
+
+_AMOUNT = r"(\d+(?:[.,]\d+)*)\s*(k|m|mil|million|thousand)?"
+BUDGET_RANGE_PATTERN = re.compile(r"\$?" + _AMOUNT + r"\s*(?:-|–|to)\s*\$?" + _AMOUNT + r"(?![\w.])")
+# "and" only separates a range after "between"; elsewhere it joins unrelated numbers
+BUDGET_BETWEEN_PATTERN = re.compile(r"\bbetween\s+\$?" + _AMOUNT + r"\s+and\s+\$?" + _AMOUNT + r"(?![\w.])")
+BUDGET_PATTERN = re.compile(
+    r"\$\s*(\d+(?:[.,]\d+)*)\s*(k|m|mil|million|thousand)?(?![\w.])"
+    r"|(\d+(?:\.\d+)?)\s*(k|m|mil|million|thousand)\b"
+    r"|\b(\d{1,3}(?:,\d{3})+|\d{5,})\b"
+)
+BEDROOM_PATTERN = re.compile(
+    r"\b(\d+|one|two|three|four|five|six)[\s-]*(?:bed|beds|bedroom|bedrooms|br|bdr|bdrm)\b"
+)
+RADIUS_PATTERN = re.compile(r"\b(\d+(?:\.\d+)?)\s*(?:km|kms|kilometres|kilometers|kilometre|kilometer)\b")
+
+_MULTIPLIERS = {None: 1, "": 1, "k": 1000, "thousand": 1000, "m": 1000000, "mil": 1000000, "million": 1000000}
+_NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6}
+
+STATES = {
+    "vic": "VIC", "victoria": "VIC",
+    "nsw": "NSW", "new south wales": "NSW",
+    "qld": "QLD", "queensland": "QLD",
+    "wa": "WA", "western australia": "WA",
+    "sa": "SA", "south australia": "SA",
+    "tas": "TAS", "tasmania": "TAS",
+    "nt": "NT", "northern territory": "NT",
+    "australian capital territory": "ACT",
+}
+
+# Matched term -> property type; earlier types win when several are mentioned
+PROPERTY_TYPE_TERMS = [
+    ("apartment", ["apartment", "apartments", "unit", "units", "flat", "flats"]),
+    ("townhouse", ["townhouse", "townhouses", "town house"]),
+    ("house", ["house", "houses", "home", "homes"]),
+    ("land", ["land", "block of land", "vacant land"]),
+    ("commercial", ["commercial", "office"]),
+]
+
+# Matched term -> canonical listing feature
+FEATURE_TERMS = {
+    "pool": "Pool", "swimming pool": "Pool",
+    "balcony": "Balcony",
+    "gym": "Gym",
+    "garden": "Garden",
+    "backyard": "Large backyard", "large backyard": "Large backyard",
+    "garage": "Double garage", "double garage": "Double garage",
+    "parking": "Secure parking", "secure parking": "Secure parking", "car space": "Secure parking",
+    "air conditioning": "Air conditioning", "aircon": "Air conditioning",
+    "ducted heating": "Ducted heating",
+    "solar": "Solar panels", "solar panels": "Solar panels",
+    "study": "Study nook", "study nook": "Study nook",
+    "modern kitchen": "Modern kitchen", "renovated kitchen": "Renovated kitchen",
+    "city views": "City views", "city view": "City views",
+    "ocean views": "Ocean views", "ocean view": "Ocean views",
+    "park views": "Park views",
+    "concierge": "Concierge",
+}
+
+# Conversational keywords _generate_ai_response branches on. Multi-word phrases
+# match anywhere; single words must stand alone so "this" is not a greeting.
+KEYWORDS = ["flink", "apache", "stream processing", "what is", "tell me about", "explain",
+            "joke", "funny", "hello", "hi", "hey"]
+
+
+class Match(NamedTuple):
+    start: int
+    end: int
+    kind: str
+    value: Any
+
+
+class MultiPatternMatcher:
+    """Aho-Corasick automaton reporting every pattern occurrence in one scan"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str, Any, bool]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, kind: str, value: Any, whole_word: bool = True):
+        """Register a lowercase pattern; whole_word requires non-alphanumeric neighbours"""
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), kind, value, whole_word))
+        self._built = False
+
+    def build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def find_all(self, text: str) -> Iterator[Match]:
+        """Every occurrence of every pattern in text, honouring whole-word flags"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, kind, value, whole_word in out[node]:
+                start = i - length + 1
+                if whole_word and ((start > 0 and text[start - 1].isalnum()) or (i + 1 < n and text[i + 1].isalnum())):
+                    continue
+                yield Match(start, i + 1, kind, value)
+
+
+class Extraction(NamedTuple):
+    criteria: Dict[str, Any]
+    keywords: Set[str]
+
+
+def load_gazetteer(path: Optional[str] = None) -> List[Dict[str, str]]:
+    """Read suburb,state,postcode rows from the configured or bundled gazetteer"""
+    path = path or os.getenv("SUBURB_GAZETTEER") or DEFAULT_GAZETTEER
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row for row in csv.DictReader(f) if row.get("suburb")]
+
+
+def _amount(number: str, unit: Optional[str]) -> int:
+    return int(round(float(number.replace(",", "")) * _MULTIPLIERS[unit]))
+
+
+class CriteriaExtractor:
+    """Precompiled, single-pass extractor shared by every request"""
+
+    def __init__(self, gazetteer: Optional[List[Dict[str, str]]] = None):
+        self.matcher = MultiPatternMatcher()
+        self.postcodes: Dict[str, Tuple[str, str]] = {}
+        self.suburb_states: Dict[str, Set[str]] = {}
+
+        for row in gazetteer if gazetteer is not None else load_gazetteer():
+            suburb = row["suburb"].strip()
+            state = row["state"].strip().upper()
+            key = suburb.lower()
+            if key not in self.suburb_states:
+                self.matcher.add(key, "suburb", key)
+                self.suburb_states[key] = set()
+            self.suburb_states[key].add(state)
+            postcode = (row.get("postcode") or "").strip()
+            if postcode:
+                self.postcodes.setdefault(postcode, (key, state))
+                self.matcher.add(postcode, "postcode", postcode)
+
+        for term, state in STATES.items():
+            self.matcher.add(term, "state", state)
+        for rank, (property_type, terms) in enumerate(PROPERTY_TYPE_TERMS):
+            for term in terms:
+                self.matcher.add(term, "property_type", (rank, property_type))
+        for term, feature in FEATURE_TERMS.items():
+            self.matcher.add(term, "feature", feature)
+        for keyword in KEYWORDS:
+            self.matcher.add(keyword, "keyword", keyword, whole_word=" " not in keyword)
+        self.matcher.build()
+
+    def extract(self, message: str) -> Extraction:
+        """Criteria and conversational keywords for one message"""
+        text = message.lower()
+        criteria: Dict[str, Any] = {}
+        keywords: Set[str] = set()
+
+        # Named entities: leftmost-longest, non-overlapping; keywords are collected independently
+        entities = []
+        for match in self.matcher.find_all(text):
+            if match.kind == "keyword":
+                keywords.add(match.value)
+            else:
+                entities.append(match)
+        entities.sort(key=lambda m: (m.start, -(m.end - m.start)))
+
+        covered = -1
+        property_type = None
+        features: List[str] = []
+        for match in entities:
+            if match.start < covered:
+                continue
+            if match.kind == "postcode" and match.start and text[match.start - 1] in "$,.":
+                continue
+            covered = match.end
+            if match.kind == "suburb" and "location" not in criteria:
+                criteria["location"] = match.value
+                states = self.suburb_states[match.value]
+                if len(states) == 1:
+                    criteria["state"] = next(iter(states))
+            elif match.kind == "postcode" and "postcode" not in criteria:
+                criteria["postcode"] = match.value
+                suburb, state = self.postcodes[match.value]
+                criteria.setdefault("location", suburb)
+                criteria.setdefault("state", state)
+            elif match.kind == "state":
+                criteria["state"] = match.value
+            elif match.kind == "property_type":
+                if property_type is None or match.value[0] < property_type[0]:
+                    property_type = match.value
+            elif match.kind == "feature" and match.value not in features:
+                features.append(match.value)
+
+        if property_type is not None:
+            criteria["property_type"] = property_type[1]
+        if features:
+            criteria["features"] = features
+        if "state" in criteria and "location" not in criteria:
+            criteria["location"] = criteria["state"].lower()
+
+        # Budget: an explicit range wins over a single amount
+        range_match = next((m for pattern in (BUDGET_BETWEEN_PATTERN, BUDGET_RANGE_PATTERN)
+                            for m in pattern.finditer(text)
+                            if m.group(2) or m.group(4) or "$" in m.group(0)), None)
+        if range_match:
+            low_unit = range_match.group(2) or range_match.group(4)
+            high_unit = range_match.group(4) or range_match.group(2)
+            low = _amount(range_match.group(1), low_unit)
+            high = _amount(range_match.group(3), high_unit)
+            criteria["budget_min"], criteria["budget"] = min(low, high), max(low, high)
+        else:
+            for budget_match in BUDGET_PATTERN.finditer(text):
+                if budget_match.group(1):
+                    amount = _amount(budget_match.group(1), budget_match.group(2))
+                elif budget_match.group(3):
+                    amount = _amount(budget_match.group(3), budget_match.group(4))
+                else:
+                    amount = _amount(budget_match.group(5), None)
+                if amount >= 10000:
+                    criteria["budget"] = amount
+                    break
+
+        bedroom_match = BEDROOM_PATTERN.search(text)
+        if bedroom_match:
+            count = bedroom_match.group(1)
+            criteria["bedrooms"] = _NUMBER_WORDS.get(count) or int(count)
+
+        # "within 10 km of Richmond": a radius only means something around a location
+        radius_match = RADIUS_PATTERN.search(text)
+        if radius_match and "location" in criteria:
+            criteria["radius_km"] = float(radius_match.group(1))
+
+        return Extraction(criteria, keywords)
+
+
+_default_extractor: Optional[CriteriaExtractor] = None
+
+
+def get_extractor() -> CriteriaExtractor:
+    """Process-wide extractor, built once on first use"""
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = CriteriaExtractor()
+    return _default_extractor
+
+
+BENCH_MESSAGES = [
+    "Hello! I'm looking for a 3 bedroom house under $1M",
+    "Show me apartments in Melbourne",
+    "I need a 2 bedroom apartment under $800k",
+    "Tell me a joke about real estate",
+    "Looking for a townhouse in North Melbourne between 600k-900k with a garage",
+    "2 bedroom apartment in Victoria Park between $550k and $700k",
+    "Any 4 bed homes in Bondi NSW around $2.1m with a pool and ocean views?",
+    "two bedroom unit near 3121 with balcony and parking, budget $650,000",
+    "What is the market like in Brisbane QLD for units?",
+]
+
+
+def run_benchmark(iterations: int = 20000) -> Dict[str, float]:
+    """Messages per second for extraction over a fixed corpus"""
+    extractor = CriteriaExtractor()
+    messages = [BENCH_MESSAGES[i % len(BENCH_MESSAGES)] for i in range(iterations)]
+    started = time.perf_counter()
+    for message in messages:
+        extractor.extract(message)
+    elapsed = time.perf_counter() - started
+    return {
+        "messages": iterations,
+        "seconds": round(elapsed, 4),
+        "messages_per_sec": round(iterations / elapsed, 1),
+        "gazetteer_suburbs": len(extractor.suburb_states),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extract property search criteria from messages')
+    parser.add_argument('message', nargs='?', help='Message to extract criteria from')
+    parser.add_argument('--bench', action='store_true', help='Run the extraction microbenchmark')
+    parser.add_argument('--iterations', type=int, default=20000, help='Messages processed by --bench')
+
+    args = parser.parse_args()
+    if args.bench:
+        print(run_benchmark(args.iterations))
+    else:
+        extraction = get_extractor().extract(args.message or "")
+        print({"criteria": extraction.criteria, "keywords": sorted(extraction.keywords)})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Inverted Feature Index
+======================
+
+Feature strings are normalised and interned into integer IDs once, when listings
+are loaded. Each feature ID maps to a posting set of listing row positions, so
+must-have / nice-to-have counts come from set intersections and conjunctive
+queries such as "Pool AND Balcony" only ever touch listings that carry the
+rarest feature.
+
+copy() returns a copy-on-write clone for publishing a new catalogue version:
+posting sets are copied only when the clone first changes them. Only the newest
+clone is ever written to; older ones stay readable as they were. Clones
+share the row -> feature IDs map, so a copied index should only gain new
+rows; remove() leaves a row's entry for older clones.
+
+Posting sets may also be SortedPostings over arrays precomputed elsewhere (a
+mapped catalogue file); an index built from_precomputed() copies each one into
+a plain set before its first change.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Set, FrozenSet, Iterable
+
+import numpy as np
+
+
+def normalise_feature(feature: str) -> str:
+    """Canonical form used for feature matching: lowercase, single-spaced"""
+    return " ".join(feature.lower().split())
+
+
+class FeatureVocabulary:
+    """Interns normalised feature strings into dense integer IDs"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        # First spelling seen for each feature, used when decoding IDs for display
+        self.display_names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, feature: str) -> int:
+        """Return the ID for a feature, allocating one if it is new"""
+        key = normalise_feature(feature)
+        feature_id = self.ids.get(key)
+        if feature_id is None:
+            feature_id = len(self.names)
+            self.ids[key] = feature_id
+            self.names.append(key)
+            self.display_names.append(feature.strip())
+        return feature_id
+
+    def lookup(self, feature: str) -> Optional[int]:
+        """Return the ID for a feature, or None if no listing has it"""
+        return self.ids.get(normalise_feature(feature))
+
+
+class SortedPostings:
+    """Read-only posting set over a sorted integer array, answering set operations without a copy"""
+
+    __slots__ = ("keys",)
+
+    def __init__(self, keys: np.ndarray):
+        self.keys = keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys.tolist())
+
+    def __contains__(self, key: int) -> bool:
+        i = int(self.keys.searchsorted(key))
+        return i < len(self.keys) and self.keys[i] == key
+
+    def copy(self) -> Set[int]:
+        return set(self.keys.tolist())
+
+    def __and__(self, other: Iterable[int]) -> Set[int]:
+        """Members of other that are also here, by binary search of each"""
+        wanted = np.fromiter(other, dtype=np.int64)
+        if not len(self.keys) or not len(wanted):
+            return set()
+        found = self.keys.searchsorted(wanted)
+        hit = self.keys[np.minimum(found, len(self.keys) - 1)] == wanted
+        return set(wanted[hit].tolist())
+
+    __rand__ = __and__
+
+    def __or__(self, other: Iterable[int]) -> Set[int]:
+        return set(other).union(self.keys.tolist())
+
+    __ror__ = __or__
+
+
+class FeatureIndex:
+    """Maps feature IDs to the set of row positions of listings that have them"""
+
+    def __init__(self, vocabulary: Optional[FeatureVocabulary] = None):
+        self.vocabulary = vocabulary if vocabulary is not None else FeatureVocabulary()
+        self.postings: Dict[int, Set[int]] = {}
+        self.property_features: Dict[int, FrozenSet[int]] = {}
+        # Posting sets this index may modify in place; None until the first copy()
+        self._owned: Optional[Set[int]] = None
+
+    @classmethod
+    def from_precomputed(cls, vocabulary: FeatureVocabulary, postings: Dict[int, Any],
+                         property_features: Mapping[int, FrozenSet[int]]) -> "FeatureIndex":
+        """Index over posting sets built elsewhere, e.g. SortedPostings mapped from a catalogue file.
+
+        Nothing passed in is modified: every posting set is copied before its first change.
+        """
+        index = cls(vocabulary)
+        index.postings = postings
+        index.property_features = property_features
+        index._owned = set()
+        return index
+
+    def copy(self) -> "FeatureIndex":
+        """Copy-on-write clone sharing the vocabulary and unchanged posting sets"""
+        clone = FeatureIndex(self.vocabulary)
+        clone.postings = dict(self.postings)
+        # Shared: clones only add keys, and remove() leaves entries in place
+        clone.property_features = self.property_features
+        clone._owned = set()
+        self._owned = set()
+        return clone
+
+    def _writable_posting(self, feature_id: int) -> Set[int]:
+        posting = self.postings.get(feature_id)
+        if posting is None:
+            posting = self.postings[feature_id] = set()
+        elif self._owned is not None and feature_id not in self._owned:
+            posting = self.postings[feature_id] = posting.copy()
+        else:
+            return posting
+        if self._owned is not None:
+            self._owned.add(feature_id)
+        return posting
+
+    def add(self, row: int, features: Iterable[str]):
+        """Index (or re-index) one listing's features"""
+        if row in self.property_features:
+            self.remove(row)
+        feature_ids = frozenset(self.vocabulary.intern(f) for f in features)
+        self.property_features[row] = feature_ids
+        for feature_id in feature_ids:
+            self._writable_posting(feature_id).add(row)
+
+    def remove(self, row: int):
+        """Drop a listing from every posting set it appears in"""
+        if self._owned is None:
+            feature_ids = self.property_features.pop(row, ())
+        else:
+            # Older clones (or a mapped file) may share property_features; leave the entry to them
+            feature_ids = self.property_features.get(row, ())
+        for feature_id in feature_ids:
+            if feature_id in self.postings:
+                self._writable_posting(feature_id).discard(row)
+
+    def features_of(self, row: int) -> Optional[FrozenSet[int]]:
+        """Interned feature IDs of an indexed listing, or None if it is not indexed"""
+        return self.property_features.get(row)
+
+    def lookup_all(self, features: Iterable[str]) -> List[Optional[int]]:
+        """Resolve query features to IDs once per request; unknown features map to None"""
+        return [self.vocabulary.lookup(f) for f in features]
+
+    @staticmethod
+    def count_matches(property_feature_ids: FrozenSet[int], wanted_ids: List[Optional[int]]) -> int:
+        """How many wanted features the listing has, counting repeated wanted features each time"""
+        matched = property_feature_ids.intersection(wanted_ids)
+        if not matched:
+            return 0
+        return sum(1 for feature_id in wanted_ids if feature_id in matched)
+
+    def properties_with_all(self, features: Iterable[str]) -> Set[int]:
+        """Rows of listings that have every feature, intersecting the rarest posting first"""
+        postings = []
+        for feature_id in set(self.lookup_all(features)):
+            posting = self.postings.get(feature_id) if feature_id is not None else None
+            if not posting:
+                return set()
+            postings.append(posting)
+        if not postings:
+            return set(self.property_features)
+
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def properties_with_any(self, features: Iterable[str]) -> Set[int]:
+        """Rows of listings that have at least one of the features"""
+        result: Set[int] = set()
+        for feature_id in set(self.lookup_all(features)):
+            if feature_id is not None:
+                result |= self.postings.get(feature_id, set())
+        return result
@@ -0,0 +1,239 @@
+"""
+Geospatial Index
+================
+
+Geocodes listings and suburb preferences from the bundled suburb centroid
+gazetteer (backend/data/au_suburbs.csv, latitude/longitude columns) and
+answers radius queries ("within 10 km of Richmond") over a geohash grid.
+
+Each listing position is stored in one geohash cell per precision level
+(3, 4 and 5: roughly 156 km, 20-40 km and 5 km cells). Cells are keyed by
+their interleaved latitude/longitude bit indices rather than base32 strings,
+so the cells covering a query's bounding box are two integer ranges. A query
+uses the finest level that covers the box in at most MAX_QUERY_CELLS cells,
+then runs a vectorized haversine over only those candidates. Cost therefore
+tracks the number of listings near the point, not the catalogue size.
+
+from_precomputed() adopts cells built elsewhere, such as arrays mapped from
+a catalogue file; a cell is copied into a list the first time it grows.
+
+Location preferences score with a distance decay: full weight at the
+preferred suburb, halving every LOCATION_HALF_DISTANCE_KM and zero beyond
+LOCATION_RADIUS_KM.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from criteria_extractor import load_gazetteer
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Geohash precisions indexed; 5 base32 characters = 25 interleaved bits
+PRECISIONS = (3, 4, 5)
+MAX_QUERY_CELLS = 64
+
+LOCATION_HALF_DISTANCE_KM = 5.0
+LOCATION_RADIUS_KM = 25.0
+
+# Preferred-suburb sets whose per-centroid match vectors SuburbCentroids keeps
+MAX_CACHED_PREFERENCES = 256
+
+_KM_PER_DEGREE = 111.195
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to arrays of points, in km"""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - np.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in km"""
+    return float(haversine_km(lat1, lon1, np.array([lat2]), np.array([lon2]))[0])
+
+
+def location_decay(distances: np.ndarray) -> np.ndarray:
+    """Location match in [0, 1] for distances from a preferred suburb"""
+    return np.where(distances <= LOCATION_RADIUS_KM, 0.5 ** (distances / LOCATION_HALF_DISTANCE_KM), 0.0)
+
+
+def _bits(precision: int) -> Tuple[int, int]:
+    """(latitude bits, longitude bits) of a geohash precision; longitude takes the odd bit"""
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+
+def cell_indices(lats: np.ndarray, lons: np.ndarray, precision: int) -> np.ndarray:
+    """Geohash cell of each point at a precision, as lat_index << lon_bits | lon_index"""
+    lat_bits, lon_bits = _bits(precision)
+    lat_index = np.clip(((np.asarray(lats) + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+    lon_index = np.clip(((np.asarray(lons) + 180.0) / 360.0 * (1 << lon_bits)).astype(np.int64), 0, (1 << lon_bits) - 1)
+    return (lat_index << lon_bits) | lon_index
+
+
+class SuburbCentroids:
+    """Suburb name (and state) to centroid lookups from the gazetteer"""
+
+    def __init__(self, gazetteer: Optional[List[Dict[str, str]]] = None):
+        self.by_suburb_state: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self.by_suburb: Dict[str, List[Tuple[float, float]]] = {}
+        # Preferred-suburb set -> match against every centroid, in by_suburb_state order
+        self._matches: Dict[Tuple[str, ...], np.ndarray] = {}
+        for row in gazetteer if gazetteer is not None else load_gazetteer():
+            if not row.get("latitude") or not row.get("longitude"):
+                continue
+            point = (float(row["latitude"]), float(row["longitude"]))
+            key = row["suburb"].strip().lower()
+            state = row["state"].strip().upper()
+            if (key, state) not in self.by_suburb_state:
+                self.by_suburb_state[key, state] = point
+                self.by_suburb.setdefault(key, []).append(point)
+        self._positions: Dict[str, List[int]] = {}
+        for i, (key, _) in enumerate(self.by_suburb_state):
+            self._positions.setdefault(key, []).append(i)
+        self._position = {key: i for i, key in enumerate(self.by_suburb_state)}
+        self._lat = np.array([lat for lat, _ in self.by_suburb_state.values()], dtype=np.float64)
+        self._lon = np.array([lon for _, lon in self.by_suburb_state.values()], dtype=np.float64)
+
+    def locate(self, suburb: str, state: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Centroid of a suburb; without a state the name must be unambiguous"""
+        position = self._locate_position(suburb, state)
+        return None if position is None else (float(self._lat[position]), float(self._lon[position]))
+
+    def _locate_position(self, suburb: str, state: Optional[str] = None) -> Optional[int]:
+        key = suburb.strip().lower()
+        if state:
+            return self._position.get((key, state.strip().upper()))
+        positions = self._positions.get(key)
+        return positions[0] if positions and len(positions) == 1 else None
+
+    def points(self, suburbs: Iterable[str]) -> List[Tuple[float, float]]:
+        """Every centroid a list of suburb names may refer to"""
+        return [point for suburb in suburbs for point in self.by_suburb.get(suburb.strip().lower(), ())]
+
+    def location_match(self, suburb: str, state: Optional[str], preferred_suburbs: Tuple[str, ...]) -> float:
+        """Distance-decayed match of a suburb to the nearest preferred suburb.
+
+        One vector over every centroid is computed per preferred-suburb set and
+        memoised, so scoring listing after listing is a dictionary lookup.
+        """
+        position = self._locate_position(suburb, state)
+        if position is None:
+            return 0.0
+        matches = self._matches.get(preferred_suburbs)
+        if matches is None:
+            matches = np.zeros(len(self._lat), dtype=np.float64)
+            for lat, lon in self.points(preferred_suburbs):
+                matches = np.maximum(matches, location_decay(haversine_km(lat, lon, self._lat, self._lon)))
+            if len(self._matches) >= MAX_CACHED_PREFERENCES:
+                self._matches.clear()
+            self._matches[preferred_suburbs] = matches
+        return float(matches[position])
+
+
+class GeoIndex:
+    """Multi-precision geohash grid over listing positions"""
+
+    def __init__(self):
+        self.lat = np.zeros(0, dtype=np.float64)
+        self.lon = np.zeros(0, dtype=np.float64)
+        self._cells: Dict[int, Dict[int, List[int]]] = {precision: {} for precision in PRECISIONS}
+        self._cell_arrays: Dict[Tuple[int, int], np.ndarray] = {}
+
+    @classmethod
+    def from_precomputed(cls, lat: np.ndarray, lon: np.ndarray,
+                         cells: Dict[int, Dict[int, np.ndarray]]) -> "GeoIndex":
+        """Index over point arrays and per-precision cell -> sorted positions built elsewhere.
+
+        The arrays may be read-only, so later points must be added past their end.
+        """
+        index = cls()
+        index.lat = lat
+        index.lon = lon
+        index._cells = cells
+        return index
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.lat)))
+
+    def add_many(self, positions: Sequence[int], lats: Sequence[float], lons: Sequence[float]):
+        """Index points; NaN coordinates (ungeocoded listings) are stored but never match"""
+        positions = np.asarray(positions, dtype=np.int64)
+        if positions.size == 0:
+            return
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        size = int(positions.max()) + 1
+        if size > len(self.lat):
+            capacity = max(size, len(self.lat) * 2, 1024)
+            self.lat = np.concatenate([self.lat, np.full(capacity - len(self.lat), np.nan)])
+            self.lon = np.concatenate([self.lon, np.full(capacity - len(self.lon), np.nan)])
+        self.lat[positions] = lats
+        self.lon[positions] = lons
+
+        located = ~np.isnan(lats)
+        positions, lats, lons = positions[located], lats[located], lons[located]
+        for precision in PRECISIONS:
+            # Group the batch by cell so each touched cell is extended once
+            cells = cell_indices(lats, lons, precision)
+            order = np.argsort(cells, kind="stable")
+            unique, starts = np.unique(cells[order], return_index=True)
+            grid = self._cells[precision]
+            for cell, group in zip(unique.tolist(), np.split(positions[order], starts[1:])):
+                members = grid.get(cell)
+                if not isinstance(members, list):
+                    members = grid[cell] = [] if members is None else members.tolist()
+                members.extend(group.tolist())
+                self._cell_arrays.pop((precision, cell), None)
+
+    def _covering_cells(self, lat: float, lon: float, radius_km: float) -> Tuple[int, List[int]]:
+        """Finest precision whose cells cover the query's bounding box within MAX_QUERY_CELLS, and those cells"""
+        dlat = radius_km / _KM_PER_DEGREE
+        dlon = min(180.0, radius_km / (_KM_PER_DEGREE * max(np.cos(np.radians(lat)), 0.01)))
+        corners_lat = np.array([max(-90.0, lat - dlat), min(90.0, lat + dlat)])
+        corners_lon = np.array([max(-180.0, lon - dlon), min(180.0, lon + dlon)])
+        for precision in sorted(PRECISIONS, reverse=True):
+            lat_bits, lon_bits = _bits(precision)
+            low, high = cell_indices(corners_lat, corners_lon, precision).tolist()
+            lat_range = range(low >> lon_bits, (high >> lon_bits) + 1)
+            lon_range = range(low & ((1 << lon_bits) - 1), (high & ((1 << lon_bits) - 1)) + 1)
+            # Fall through to the coarsest level when even it needs more cells
+            if len(lat_range) * len(lon_range) <= MAX_QUERY_CELLS:
+                break
+        return precision, [(i << lon_bits) | j for i in lat_range for j in lon_range]
+
+    def _cell_positions(self, precision: int, cell: int) -> Optional[np.ndarray]:
+        array = self._cell_arrays.get((precision, cell))
+        if array is None:
+            positions = self._cells[precision].get(cell)
+            if positions is None:
+                return None
+            array = self._cell_arrays[precision, cell] = np.asarray(positions, dtype=np.int64)
+        return array
+
+    def within(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, distances_km) of every indexed point within radius_km, in position order"""
+        precision, cells = self._covering_cells(lat, lon, radius_km)
+        arrays = [a for a in (self._cell_positions(precision, cell) for cell in cells) if a is not None]
+        if not arrays:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        candidates = np.sort(np.concatenate(arrays))
+        distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        inside = distances <= radius_km
+        return candidates[inside], distances[inside]
+
+
+_default_centroids: Optional[SuburbCentroids] = None
+
+
+def get_centroids() -> SuburbCentroids:
+    """Process-wide centroid table, loaded once on first use"""
+    global _default_centroids
+    if _default_centroids is None:
+        _default_centroids = SuburbCentroids()
+    return _default_centroids
@@ -0,0 +1,151 @@
+"""
+Incremental Re-ranking
+======================
+
+Keeps each active user's per-component score columns (budget, type, suburb,
+must-have and nice-to-have features) from the last ranking. Each component
+depends on a disjoint set of profile fields, so when a preference changes
+only the affected component is recomputed before the columns are re-summed
+and the top-k is re-selected. Iterative refinement ("make it 1.2M", "add a
+pool") then costs one component pass instead of a full rescore.
+
+Changes are detected by comparing field values, so direct attribute edits
+are picked up as well as update_user_preferences calls.
+
+Catalogue rows are append-only (see catalogue.py), so when the store gains
+rows the cached columns stay valid and only the new rows are scored. Retired
+rows are excluded at selection time through the snapshot's liveness mask.
+
+Each cached user holds one float64 column per component, 40 bytes a row, so
+the cache is bounded in bytes (RANKER_CACHE_MB) rather than in users: the
+number of users kept shrinks as the catalogue grows, and least recently
+active users are evicted when the store gains rows.
+"""
+
+import os
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from property_store import PropertyStore, select_top_k
+
+RANKER_CACHE_MB = int(os.getenv("RANKER_CACHE_MB", "256"))
+
+# Component name -> (profile fields it reads, PropertyStore method), in scorer order
+COMPONENTS: List[Tuple[str, Tuple[str, ...], str]] = [
+    ("budget", ("budget_min", "budget_max"), "budget_component"),
+    ("type", ("property_types",), "type_component"),
+    ("suburb", ("preferred_suburbs",), "suburb_component"),
+    ("must_have", ("must_have_features",), "must_have_component"),
+    ("nice_to_have", ("nice_to_have_features",), "nice_to_have_component"),
+]
+
+
+def _signature(user_profile: Any, fields: Tuple[str, ...]) -> tuple:
+    values = []
+    for field in fields:
+        value = getattr(user_profile, field)
+        if isinstance(value, list):
+            value = tuple(getattr(v, "value", v) for v in value)
+        values.append(value)
+    return tuple(values)
+
+
+class _UserComponents:
+    __slots__ = ("signatures", "columns", "rows")
+
+    def __init__(self):
+        self.signatures: Dict[str, tuple] = {}
+        self.columns: Dict[str, Optional[np.ndarray]] = {}
+        # Store rows the columns cover
+        self.rows = 0
+
+
+class IncrementalRanker:
+    """Per-user component score cache over one PropertyStore"""
+
+    def __init__(self, store: PropertyStore, max_bytes: int = RANKER_CACHE_MB * 1024 * 1024):
+        self.store = store
+        self.max_bytes = max_bytes
+        self._users: "OrderedDict[str, _UserComponents]" = OrderedDict()
+        self.full_rescores = 0
+        self.partial_rescores = 0
+        self.components_recomputed = 0
+
+    @property
+    def max_users(self) -> int:
+        """Users whose columns fit the byte budget at the current store size (at least one)"""
+        return max(1, self.max_bytes // (len(COMPONENTS) * 8 * max(1, self.store.size)))
+
+    def _evict(self):
+        """Drop the least recently active users until the rest fit the budget"""
+        max_users = self.max_users
+        while len(self._users) > max_users:
+            self._users.popitem(last=False)
+
+    def reset(self, store: PropertyStore):
+        """Point at a new or changed catalogue; every cached column is stale"""
+        self.store = store
+        self._users.clear()
+
+    def extend(self, store: PropertyStore):
+        """Point at an append-only successor of the current store; cached columns stay valid"""
+        self.store = store
+        # Every cached user grows by the appended rows on its next request
+        self._evict()
+
+    def forget(self, user_id: str):
+        self._users.pop(user_id, None)
+
+    def scores(self, user_id: str, user_profile: Any, store: Optional[PropertyStore] = None) -> np.ndarray:
+        """Full score column for the profile, recomputing only components whose fields changed.
+
+        A store other than the current one (an older snapshot's) is scored in full and not cached.
+        """
+        if store is not None and store is not self.store:
+            return store.score(user_profile)
+        store = self.store
+        state = self._users.get(user_id)
+        if state is None:
+            state = _UserComponents()
+            self._users[user_id] = state
+        self._users.move_to_end(user_id)
+        self._evict()
+
+        recomputed = 0
+        appended = store.view(state.rows) if 0 < state.rows < store.size else None
+        for name, fields, method in COMPONENTS:
+            signature = _signature(user_profile, fields)
+            if state.signatures.get(name) != signature or name not in state.columns:
+                state.columns[name] = getattr(store, method)(user_profile)
+                state.signatures[name] = signature
+                recomputed += 1
+            elif appended is not None and state.columns[name] is not None:
+                state.columns[name] = np.concatenate([state.columns[name], getattr(appended, method)(user_profile)])
+        state.rows = store.size
+
+        if recomputed == len(COMPONENTS):
+            self.full_rescores += 1
+        elif recomputed:
+            self.partial_rescores += 1
+        self.components_recomputed += recomputed
+
+        return PropertyStore.combine([state.columns[name] for name, _, _ in COMPONENTS])
+
+    def top_k(self, user_id: str, user_profile: Any, k: int = 5, threshold: float = 0.6,
+              store: Optional[PropertyStore] = None, live: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """(row, score) of the best k listings above threshold for this user, skipping rows not live"""
+        scores = self.scores(user_id, user_profile, store)
+        if live is not None:
+            scores = np.where(live, scores, -np.inf)
+        return select_top_k(scores, k, threshold)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._users),
+            "max_users": self.max_users,
+            "full_rescores": self.full_rescores,
+            "partial_rescores": self.partial_rescores,
+            "components_recomputed": self.components_recomputed,
+        }
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Bulk Listing Ingestion
+======================
+
+Streams large CSV / JSONL listing feeds (optionally gzip-compressed) through a
+generator, validates rows into Property records in batches and builds the
+scoring indexes incrementally, so raw feed text is never held in memory for
+more than one row at a time.
+
+CSV feeds use one column per Property field; list fields (features, images)
+are pipe-separated. JSONL feeds carry one listing object per line.
+
+CatalogueBuilder keeps Property records and the personalisation indexes;
+ListingBuilder keeps the chat agent's listing dicts and its position-keyed
+indexes instead, converting each validated batch as it goes so no Property
+outlives its batch.
+
+Usage:
+    python3 ingestion.py listings.csv.gz --batch-size 20000
+"""
+
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+import resource
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from property_models import Property, PropertyType, CompactProperty
+from feature_index import FeatureIndex
+from property_store import PropertyStore
+from market_stats import MarketStats
+from range_index import PropertyRangeIndex
+
+LIST_SEPARATOR = "|"
+REQUIRED_FIELDS = ["id", "address", "price", "property_type", "bedrooms", "suburb", "state", "postcode"]
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def iter_csv_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per CSV row"""
+    with _open_text(path) as f:
+        yield from csv.DictReader(f)
+
+
+def iter_jsonl_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per non-blank JSONL line"""
+    with _open_text(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Pick the row reader from the file extension"""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return iter_csv_rows(path)
+    if name.endswith((".jsonl", ".ndjson")):
+        return iter_jsonl_rows(path)
+    raise ValueError(f"Unsupported listing feed format: {path}")
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [v.strip() for v in str(value).split(LIST_SEPARATOR) if v.strip()]
+
+
+def _as_int(value: Any, default: Optional[int] = None) -> int:
+    if value is None or value == "":
+        if default is None:
+            raise ValueError("missing integer value")
+        return default
+    return int(float(value))
+
+
+def validate_row(row: Dict[str, Any]) -> Property:
+    """Convert one raw feed row into a Property, raising ValueError if it is invalid"""
+    missing = [name for name in REQUIRED_FIELDS if row.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+
+    price = _as_int(row["price"])
+    if price <= 0:
+        raise ValueError(f"invalid price: {row['price']}")
+
+    land_size = row.get("land_size")
+    listing_date = row.get("listing_date")
+
+    return Property(
+        id=str(row["id"]),
+        address=str(row["address"]),
+        price=price,
+        property_type=PropertyType(str(row["property_type"]).strip().lower()),
+        bedrooms=_as_int(row["bedrooms"]),
+        bathrooms=_as_int(row.get("bathrooms"), 0),
+        car_spaces=_as_int(row.get("car_spaces"), 0),
+        land_size=float(land_size) if land_size not in (None, "") else None,
+        features=_as_list(row.get("features")),
+        images=_as_list(row.get("images")),
+        agent_contact=str(row.get("agent_contact") or ""),
+        listing_date=datetime.fromisoformat(listing_date) if listing_date else datetime.now(),
+        suburb=sys.intern(str(row["suburb"])),
+        state=sys.intern(str(row["state"])),
+        postcode=sys.intern(str(row["postcode"])),
+    )
+
+
+def property_to_listing(prop: Property) -> Dict[str, Any]:
+    """Listing-dict form of a Property, as used by PropertyParlantAgent"""
+    return {
+        "id": prop.id,
+        "address": prop.address,
+        "price": prop.price,
+        "property_type": prop.property_type.value,
+        "bedrooms": prop.bedrooms,
+        "bathrooms": prop.bathrooms,
+        "car_spaces": prop.car_spaces,
+        "features": prop.features,
+        "suburb": prop.suburb,
+        "state": prop.state,
+        "postcode": prop.postcode,
+        "land_size": prop.land_size,
+        "listing_date": prop.listing_date.date().isoformat(),
+    }
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group a stream into lists of at most `size` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@dataclass
+class IngestionStats:
+    rows_read: int = 0
+    rows_loaded: int = 0
+    rows_rejected: int = 0
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows_read / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows_read": self.rows_read,
+            "rows_loaded": self.rows_loaded,
+            "rows_rejected": self.rows_rejected,
+            "seconds": round(self.seconds, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+        }
+
+
+class _FeedBuilder:
+    """Validates a row stream in batches and hands each batch to add_batch"""
+
+    # Keep only the first few rejection messages; a bad feed can reject millions
+    MAX_ERRORS = 100
+
+    def __init__(self):
+        self.stats = IngestionStats()
+
+    def add_batch(self, properties: List[Property]):
+        raise NotImplementedError
+
+    def ingest(self, rows: Iterable[Dict[str, Any]], batch_size: int = 10000) -> IngestionStats:
+        """Validate and index a row stream, returning throughput and memory stats"""
+        started = time.perf_counter()
+        for raw_batch in batched(rows, batch_size):
+            batch = []
+            for row in raw_batch:
+                self.stats.rows_read += 1
+                try:
+                    batch.append(validate_row(row))
+                except (ValueError, TypeError, KeyError) as e:
+                    self.stats.rows_rejected += 1
+                    if len(self.stats.errors) < self.MAX_ERRORS:
+                        self.stats.errors.append(f"row {self.stats.rows_read}: {e}")
+            self.add_batch(batch)
+
+        self.stats.seconds += time.perf_counter() - started
+        self.stats.peak_rss_mb = peak_rss_mb()
+        return self.stats
+
+
+class CatalogueBuilder(_FeedBuilder):
+    """Accumulates validated listings and grows every scoring index batch by batch"""
+
+    def __init__(self, compact: bool = False):
+        super().__init__()
+        # Compact records share the index vocabulary for their feature bitmasks
+        self.compact = compact
+        self.properties: List[Property] = []
+        self.feature_index = FeatureIndex()
+        self.property_store = PropertyStore(self.feature_index.vocabulary)
+        self.range_index = PropertyRangeIndex()
+        self.market_stats = MarketStats()
+
+    def add_batch(self, properties: List[Property]):
+        """Append one validated batch to the catalogue and its indexes"""
+        if self.compact:
+            properties = [CompactProperty.from_property(p, self.feature_index.vocabulary) for p in properties]
+        start = len(self.properties)
+        for position, prop in enumerate(properties, start):
+            self.feature_index.add(position, prop.features)
+        self.range_index.add_many(
+            (position, PropertyRangeIndex.property_fields(prop)) for position, prop in enumerate(properties, start)
+        )
+        self.property_store.append(properties)
+        self.market_stats.add(properties)
+        self.properties.extend(properties)
+        self.stats.rows_loaded += len(properties)
+
+
+class ListingBuilder(_FeedBuilder):
+    """Accumulates validated listings as listing dicts, with indexes keyed by row position"""
+
+    def __init__(self):
+        super().__init__()
+        self.listings: List[Dict[str, Any]] = []
+        self.range_index = PropertyRangeIndex()
+        self.feature_index = FeatureIndex()
+        # listing id -> positions of its rows, oldest first
+        self.row_history: Dict[str, List[int]] = {}
+
+    def add_batch(self, properties: List[Property]):
+        """Convert one validated batch to listing dicts and index them"""
+        start = len(self.listings)
+        listings = [property_to_listing(prop) for prop in properties]
+        self.range_index.add_many(enumerate(listings, start))
+        for position, listing in enumerate(listings, start):
+            self.feature_index.add(position, listing["features"])
+            self.row_history.setdefault(listing["id"], []).append(position)
+        self.listings.extend(listings)
+        self.stats.rows_loaded += len(listings)
+
+
+def ingest_file(path: str, batch_size: int = 10000, compact: bool = False) -> CatalogueBuilder:
+    """Stream a listing feed from disk into a fresh CatalogueBuilder"""
+    builder = CatalogueBuilder(compact=compact)
+    builder.ingest(iter_rows(path), batch_size=batch_size)
+    return builder
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ingest a CSV/JSONL listing feed and report throughput')
+    parser.add_argument('path', help='Listing feed (.csv, .jsonl or .ndjson, optionally .gz)')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows validated and indexed per batch')
+    parser.add_argument('--compact', action='store_true', help='Hold listings as slotted CompactProperty records')
+
+    args = parser.parse_args()
+    builder = ingest_file(args.path, batch_size=args.batch_size, compact=args.compact)
+
+    print(json.dumps(builder.stats.summary(), indent=2))
+    for error in builder.stats.errors[:10]:
+        print(f"⚠️ {error}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Intent Router
+=============
+
+Classifies a chat message into a response intent from the extractor's
+keywords and criteria, and renders the reply from precompiled templates.
+
+Replies are pure functions of (intent, criteria signature, result-set
+signature, variant), so rendering is memoised. A message with no search
+criteria is "canned": its reply and listings do not depend on anything but
+the catalogue, so the chat path answers it without running the filter or
+the LLM stage.
+
+Search criteria take precedence over conversational keywords: "hi, 3 bed
+house in Carlton" is a search, not a greeting. Only messages without criteria
+fall through the keyword intents (general knowledge, "what is" questions,
+jokes, greetings, in that order) to the default browse reply.
+"""
+
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+FLINK = "flink"
+GENERAL_QUESTION = "general_question"
+JOKE = "joke"
+GREETING = "greeting"
+SEARCH = "search"
+BROWSE = "browse"
+
+# Keyword intents for messages without search criteria, checked in order
+INTENT_KEYWORDS: List[Tuple[str, FrozenSet[str]]] = [
+    (FLINK, frozenset({"flink", "apache", "stream processing"})),
+    (GENERAL_QUESTION, frozenset({"what is", "tell me about", "explain"})),
+    (JOKE, frozenset({"joke", "funny"})),
+    (GREETING, frozenset({"hello", "hi", "hey"})),
+]
+
+JOKES = [
+    "Why did the real estate agent go to therapy? Because they had too many property issues! 🏠😄",
+    "What do you call a real estate agent who's also a magician? A property wizard! ✨🏡",
+    "Why don't houses ever get lonely? Because they always have great neighbors! 🏘️😊",
+]
+
+FIXED_REPLIES = {
+    FLINK: "Apache Flink is a distributed stream processing framework for stateful computations over unbounded and bounded data streams. It's commonly used for real-time analytics, event-driven applications, and data pipelines. While I'm primarily a real estate assistant, I can help with general questions too! Is there anything about properties I can help you with?",
+    GENERAL_QUESTION: "I'm primarily a real estate assistant, but I can help with general questions! However, my main expertise is helping you find the perfect property. What kind of home are you looking for?",
+    GREETING: "Hi there! I'm your realestate.com.au AI assistant powered by Parlant. I'm here to help you find the perfect property! What are you looking for in your next home?",
+}
+
+# Templates are bound once at import; rendering is a single format call
+_MATCHES_REPLY = "Perfect! I found {count} properties matching your criteria: {criteria}. Here are the best options:".format
+_BROWSE_REPLY = "Here are some great properties I found for you:"
+_SIMILAR_REPLY = "I couldn't find any properties matching your exact criteria, but let me show you some similar options that might interest you:"
+_PROMPT_REPLY = "I understand you're looking for properties on realestate.com.au! Tell me about your preferences - what's your budget, how many bedrooms do you need, and what type of property interests you?"
+_BUDGET_RANGE = "between ${:,} and ${:,}".format
+_BUDGET_MAX = "under ${:,}".format
+_BEDROOMS = "with {} bedroom{}".format
+_PROPERTY_TYPE = "({}s)".format
+_FEATURES = "with {}".format
+_RADIUS = "within {:g} km of {}".format
+
+CriteriaSignature = Tuple[Tuple[str, Any], ...]
+
+
+class Route(NamedTuple):
+    intent: str
+    # No search criteria: the reply and listings depend only on the catalogue
+    canned: bool
+
+
+def classify_intent(keywords: Set[str], criteria: Dict[str, Any]) -> str:
+    if criteria:
+        return SEARCH
+    for intent, triggers in INTENT_KEYWORDS:
+        if keywords & triggers:
+            return intent
+    return BROWSE
+
+
+def route(keywords: Set[str], criteria: Dict[str, Any]) -> Route:
+    return Route(classify_intent(keywords, criteria), not criteria)
+
+
+def criteria_signature(criteria: Dict[str, Any]) -> CriteriaSignature:
+    """Hashable, order-independent form of extracted criteria"""
+    return tuple(sorted((key, tuple(value) if isinstance(value, list) else value)
+                        for key, value in criteria.items()))
+
+
+def response_variant(intent: str, message: str) -> int:
+    """Which of an intent's alternative replies to use; stable across processes"""
+    if intent != JOKE:
+        return 0
+    return zlib.crc32(" ".join(message.lower().split()).encode("utf-8")) % len(JOKES)
+
+
+def _criteria_text(criteria: Dict[str, Any]) -> str:
+    parts = []
+    if criteria.get('budget_min') and criteria.get('budget'):
+        parts.append(_BUDGET_RANGE(criteria['budget_min'], criteria['budget']))
+    elif criteria.get('budget'):
+        parts.append(_BUDGET_MAX(criteria['budget']))
+    if criteria.get('bedrooms'):
+        parts.append(_BEDROOMS(criteria['bedrooms'], 's' if criteria['bedrooms'] > 1 else ''))
+    if criteria.get('property_type'):
+        parts.append(_PROPERTY_TYPE(criteria['property_type']))
+    if criteria.get('features'):
+        parts.append(_FEATURES(', '.join(f.lower() for f in criteria['features'])))
+    if criteria.get('radius_km') and criteria.get('location'):
+        parts.append(_RADIUS(criteria['radius_km'], criteria['location'].title()))
+    return " ".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def render_response(intent: str, criteria: CriteriaSignature, result_count: int, variant: int = 0) -> str:
+    """Reply text for an intent; the result set enters only through its size"""
+    if intent == JOKE:
+        return JOKES[variant]
+    fixed = FIXED_REPLIES.get(intent)
+    if fixed is not None:
+        return fixed
+    if result_count:
+        if criteria:
+            return _MATCHES_REPLY(count=result_count, criteria=_criteria_text(dict(criteria)))
+        return _BROWSE_REPLY
+    return _SIMILAR_REPLY if criteria else _PROMPT_REPLY
+
+
+def render(intent: str, message: str, criteria: Dict[str, Any], properties: List[Any],
+           variant: Optional[int] = None) -> str:
+    """render_response from a raw message, criteria dict and result list"""
+    if variant is None:
+        variant = response_variant(intent, message)
+    return render_response(intent, criteria_signature(criteria), len(properties), variant)
@@ -0,0 +1,287 @@
+"""
+Market Statistics
+=================
+
+Materialised per-suburb market aggregates (median and quartile price, land
+price per m² and average days on market), maintained incrementally as
+listings are added or removed, so explanations can cite "12% below the
+Richmond townhouse median" without scanning the catalogue.
+
+Each (suburb, state, property type) group, plus a suburb-wide group per
+(suburb, state), keeps:
+
+- QuantileSketch of prices and of price per m² of land. The sketch is
+  DDSketch-style: values fall into logarithmic buckets, so every quantile is
+  within RELATIVE_ACCURACY of a true value, and a delete is just a bucket
+  decrement (rank-based sketches such as t-digest or KLL cannot delete).
+- The sum of listing dates, so the average days on market stays exact and
+  current without recomputation.
+
+Quantiles are computed lazily once per group change and memoised; summary()
+is O(1) between changes.
+
+copy() returns a copy-on-write clone for publishing a new catalogue version:
+a group's sketches are copied only when the clone first changes them, so
+older versions keep their figures.
+
+Groups can also come from sketches precomputed elsewhere (a mapped catalogue
+file): a loader is asked for each group the first time it is used.
+
+The catalogue has no building-size column, so price per m² uses land_size
+and is only reported for listings that have one.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+# Every reported quantile is within 1% of a value actually in the group
+RELATIVE_ACCURACY = 0.01
+
+# Smaller groups fall back to the suburb-wide figures
+MIN_GROUP_LISTINGS = 3
+
+# Price differences under this share of the median read as "in line with"
+IN_LINE_SHARE = 0.01
+
+# Listings this far under their median are highlighted as priced below the market
+BELOW_MARKET_SHARE = 0.05
+
+_SECONDS_PER_DAY = 86400.0
+
+GroupKey = Tuple[str, str, Optional[str]]
+
+# A stored group: (price sketch buckets, price-per-m² sketch buckets, sum of listing days)
+GroupState = Tuple[Dict[int, int], Dict[int, int], float]
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch with relative-error guarantees that supports deletes"""
+
+    __slots__ = ("gamma", "_log_gamma", "buckets", "count")
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY, buckets: Optional[Dict[int, int]] = None):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = buckets if buckets is not None else {}
+        self.count = sum(self.buckets.values())
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float):
+        """Record a positive value; others are ignored"""
+        if value > 0:
+            key = self._key(value)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+            self.count += 1
+
+    def remove(self, value: float):
+        """Forget a value previously added"""
+        if value > 0:
+            key = self._key(value)
+            remaining = self.buckets.get(key, 0) - 1
+            if remaining < 0:
+                return
+            if remaining:
+                self.buckets[key] = remaining
+            else:
+                del self.buckets[key]
+            self.count -= 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q in [0, 1], or None when empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Bucket midpoint in relative terms: within relative_accuracy of every value in it
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return None
+
+
+@dataclass(frozen=True)
+class MarketSummary:
+    suburb: str
+    state: str
+    property_type: Optional[str]
+    listings: int
+    median_price: float
+    lower_quartile_price: float
+    upper_quartile_price: float
+    median_price_per_sqm: Optional[float]
+    average_days_on_market: float
+
+    @property
+    def label(self) -> str:
+        """"Richmond townhouse", or just "Richmond" for the suburb-wide group"""
+        return f"{self.suburb} {self.property_type}" if self.property_type else self.suburb
+
+
+class _GroupStats:
+    __slots__ = ("prices", "price_per_sqm", "listed_days_total", "_quantiles")
+
+    def __init__(self, relative_accuracy: float):
+        self.prices = QuantileSketch(relative_accuracy)
+        self.price_per_sqm = QuantileSketch(relative_accuracy)
+        self.listed_days_total = 0.0
+        self._quantiles: Optional[Tuple[float, float, float, Optional[float]]] = None
+
+    def copy(self, relative_accuracy: float) -> "_GroupStats":
+        clone = _GroupStats(relative_accuracy)
+        clone.prices = QuantileSketch(relative_accuracy, dict(self.prices.buckets))
+        clone.price_per_sqm = QuantileSketch(relative_accuracy, dict(self.price_per_sqm.buckets))
+        clone.listed_days_total = self.listed_days_total
+        clone._quantiles = self._quantiles
+        return clone
+
+    def quantiles(self) -> Tuple[float, float, float, Optional[float]]:
+        if self._quantiles is None:
+            self._quantiles = (self.prices.quantile(0.5), self.prices.quantile(0.25),
+                               self.prices.quantile(0.75), self.price_per_sqm.quantile(0.5))
+        return self._quantiles
+
+
+def _type_value(property_type: Any) -> str:
+    return getattr(property_type, "value", property_type)
+
+
+def _listed_day(listing_date: datetime) -> float:
+    return listing_date.timestamp() / _SECONDS_PER_DAY
+
+
+def price_per_sqm(prop: Any) -> Optional[float]:
+    """Price per m² of land, or None for listings without a land size"""
+    return prop.price / prop.land_size if prop.land_size else None
+
+
+class MarketStats:
+    """Per-suburb and per-suburb-and-type market aggregates over a changing catalogue"""
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY,
+                 loader: Optional[Callable[[GroupKey], Optional[GroupState]]] = None):
+        self.relative_accuracy = relative_accuracy
+        self.groups: Dict[GroupKey, _GroupStats] = {}
+        # Source of groups not yet in self.groups; each key is asked for at most once
+        self._loader = loader
+        self._loaded: Set[GroupKey] = set()
+        # Groups this instance may modify in place; None until the first copy()
+        self._owned: Optional[Set[GroupKey]] = None
+
+    @classmethod
+    def from_properties(cls, properties: Iterable[Any]) -> "MarketStats":
+        stats = cls()
+        stats.add(properties)
+        return stats
+
+    def copy(self) -> "MarketStats":
+        """Copy-on-write clone sharing unchanged groups; only the newest clone is ever written to"""
+        clone = MarketStats(self.relative_accuracy, self._loader)
+        clone.groups = dict(self.groups)
+        clone._loaded = set(self._loaded)
+        clone._owned = set()
+        self._owned = set()
+        return clone
+
+    def _keys(self, prop: Any) -> Tuple[GroupKey, GroupKey]:
+        return (prop.suburb, prop.state, _type_value(prop.property_type)), (prop.suburb, prop.state, None)
+
+    def _group(self, key: GroupKey) -> Optional[_GroupStats]:
+        group = self.groups.get(key)
+        if group is None and self._loader is not None and key not in self._loaded:
+            self._loaded.add(key)
+            state = self._loader(key)
+            if state is not None:
+                prices, rates, listed_days_total = state
+                group = self.groups[key] = _GroupStats(self.relative_accuracy)
+                group.prices = QuantileSketch(self.relative_accuracy, prices)
+                group.price_per_sqm = QuantileSketch(self.relative_accuracy, rates)
+                group.listed_days_total = listed_days_total
+        return group
+
+    def _writable_group(self, key: GroupKey, create: bool) -> Optional[_GroupStats]:
+        group = self._group(key)
+        if group is None:
+            if not create:
+                return None
+            group = self.groups[key] = _GroupStats(self.relative_accuracy)
+        elif self._owned is not None and key not in self._owned:
+            group = self.groups[key] = group.copy(self.relative_accuracy)
+        else:
+            return group
+        if self._owned is not None:
+            self._owned.add(key)
+        return group
+
+    def group_states(self) -> Dict[GroupKey, GroupState]:
+        """Every group's raw state, for storing and later serving through a loader"""
+        if self._loader is not None:
+            raise ValueError("group_states() needs every group in memory; this MarketStats loads them lazily")
+        return {key: (dict(group.prices.buckets), dict(group.price_per_sqm.buckets), group.listed_days_total)
+                for key, group in self.groups.items()}
+
+    def add(self, properties: Iterable[Any]):
+        """Fold listings into their suburb and suburb/type groups"""
+        for prop in properties:
+            rate = price_per_sqm(prop)
+            listed = _listed_day(prop.listing_date)
+            for key in self._keys(prop):
+                group = self._writable_group(key, create=True)
+                group.prices.add(prop.price)
+                if rate is not None:
+                    group.price_per_sqm.add(rate)
+                group.listed_days_total += listed
+                group._quantiles = None
+
+    def remove(self, properties: Iterable[Any]):
+        """Take delisted listings back out of their groups"""
+        for prop in properties:
+            rate = price_per_sqm(prop)
+            listed = _listed_day(prop.listing_date)
+            for key in self._keys(prop):
+                group = self._writable_group(key, create=False)
+                if group is None:
+                    continue
+                group.prices.remove(prop.price)
+                if rate is not None:
+                    group.price_per_sqm.remove(rate)
+                group.listed_days_total -= listed
+                group._quantiles = None
+                if not group.prices.count:
+                    del self.groups[key]
+
+    def summary(self, suburb: str, state: str, property_type: Any = None,
+                now: Optional[datetime] = None) -> Optional[MarketSummary]:
+        """Aggregates for a suburb (and property type), or None if it has no listings"""
+        property_type = _type_value(property_type) if property_type is not None else None
+        group = self._group((suburb, state, property_type))
+        if group is None or not group.prices.count:
+            return None
+        median, lower, upper, rate = group.quantiles()
+        count = group.prices.count
+        today = _listed_day(now if now is not None else datetime.now())
+        return MarketSummary(suburb, state, property_type, count, median, lower, upper, rate,
+                             today - group.listed_days_total / count)
+
+    def comparable(self, prop: Any, now: Optional[datetime] = None) -> Optional[MarketSummary]:
+        """The suburb/type group of a listing, or the suburb-wide group when that is too small"""
+        summary = self.summary(prop.suburb, prop.state, prop.property_type, now)
+        if summary is None or summary.listings < MIN_GROUP_LISTINGS:
+            summary = self.summary(prop.suburb, prop.state, None, now)
+        return summary
+
+    def price_context(self, prop: Any, now: Optional[datetime] = None) -> Optional[str]:
+        """e.g. "12% below the Richmond townhouse median ($965,000)" """
+        summary = self.comparable(prop, now)
+        if summary is None or summary.listings < MIN_GROUP_LISTINGS:
+            return None
+        median = summary.median_price
+        difference = (prop.price - median) / median
+        if abs(difference) < IN_LINE_SHARE:
+            return f"in line with the {summary.label} median (${median:,.0f})"
+        direction = "below" if difference < 0 else "above"
+        return f"{abs(difference):.0%} {direction} the {summary.label} median (${median:,.0f})"
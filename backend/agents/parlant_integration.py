@@ -7,8 +7,107 @@ This module provides proper Parlant AI integration for the property chat system.
 import asyncio
 import os
 import json
-from typing import Dict, List, Any, Optional
+import time
+from contextlib import aclosing
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Set, Tuple, AsyncIterator
+import numpy as np
 import parlant.sdk as p
+from range_index import PropertyRangeIndex
+from feature_index import FeatureIndex
+from criteria_extractor import get_extractor
+from intent_router import route, render
+from streaming import stream_text
+from instrumentation import metrics
+from ingestion import ListingBuilder, iter_rows, IngestionStats
+from geo_index import GeoIndex, get_centroids
+from catalogue import RowSnapshot, VersionedCatalogue
+from catalogue_file import CatalogueFile
+
+# Concurrent response-generation (LLM) calls allowed per agent for chat and chat_batch
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Concurrent streamed LLM replies; a stream holds its slot until the client has read it, so it
+# gets its own limit rather than competing with batch bursts for LLM_MAX_CONCURRENCY
+LLM_STREAM_MAX_CONCURRENCY = int(os.getenv("LLM_STREAM_MAX_CONCURRENCY", "8"))
+
+# Search replies come from templates; LLM_RESPONSES=1 has the Parlant agent write them instead
+LLM_RESPONSES = os.getenv("LLM_RESPONSES", "0") == "1"
+
+# What clients see when a chat fails; the exception itself is only logged
+CHAT_ERROR_MESSAGE = "internal error"
+
+
+class ListingSnapshot(RowSnapshot):
+    """One published version of the listing database.
+
+    Rows and their geocodes are shared and append-only across versions; each
+    version has its own copy-on-write range and feature indexes (both keyed by
+    row position). The range index holds only live rows. Readers take one
+    snapshot per request and need no lock.
+    """
+
+    __slots__ = ("range_index", "feature_index", "geo", "shortlist")
+
+    def __init__(self, version: int, rows: Sequence[Dict[str, Any]], live: np.ndarray, row_history: Any,
+                 range_index: PropertyRangeIndex, feature_index: FeatureIndex, geo: GeoIndex):
+        super().__init__(version, rows, live, row_history)
+        self.range_index = range_index
+        self.feature_index = feature_index
+        self.geo = geo
+        # Default shortlist for criteria-free replies, filled on first use
+        self.shortlist: Optional[List[Dict[str, Any]]] = None
+
+
+def _geocode_listings(listings: Sequence[Dict[str, Any]], geo: Optional[GeoIndex] = None,
+                      start: int = 0) -> GeoIndex:
+    """Add listings, at positions from start, to a GeoIndex at their suburb centroids"""
+    centroids = get_centroids()
+    points = [centroids.locate(listing["suburb"], listing.get("state")) or (float("nan"), float("nan"))
+              for listing in listings]
+    geo = geo if geo is not None else GeoIndex()
+    geo.add_many(range(start, start + len(points)), [lat for lat, _ in points], [lon for _, lon in points])
+    return geo
+
+
+class ListingCatalogue(VersionedCatalogue):
+    """VersionedCatalogue of listing dicts, published as ListingSnapshots"""
+
+    def _record_id(self, record: Dict[str, Any]) -> str:
+        return record["id"]
+
+    def _index(self, version: int, rows: Sequence[Dict[str, Any]], row_history: Any,
+               range_index: Optional[PropertyRangeIndex] = None, feature_index: Optional[FeatureIndex] = None,
+               geo: Optional[GeoIndex] = None) -> ListingSnapshot:
+        """First snapshot of a fresh row space, building whichever indexes weren't supplied"""
+        if range_index is None:
+            range_index = PropertyRangeIndex.from_listings(rows)
+        if feature_index is None:
+            feature_index = FeatureIndex()
+            for position, listing in enumerate(rows):
+                feature_index.add(position, listing["features"])
+        return ListingSnapshot(version, rows, np.ones(len(rows), dtype=bool), row_history, range_index,
+                               feature_index, geo if geo is not None else _geocode_listings(rows))
+
+    def _write(self, current: ListingSnapshot, version: int, live: np.ndarray, appended: List[Dict[str, Any]],
+               retired: List[int]) -> ListingSnapshot:
+        """Next snapshot of the current row space: appended rows (already in self._rows) added, retired rows gone"""
+        range_index = current.range_index.copy()
+        for position in retired:
+            range_index.remove(position)
+        feature_index = current.feature_index
+        if appended:
+            range_index.add_many(enumerate(appended, current.size))
+            feature_index = feature_index.copy()
+            for position, listing in enumerate(appended, current.size):
+                feature_index.add(position, listing["features"])
+            _geocode_listings(appended, current.geo, current.size)
+        return ListingSnapshot(version, self._rows, live, self._row_history, range_index, feature_index,
+                               current.geo)
+
+    def _carried_over(self, snapshot: ListingSnapshot) -> Dict[str, Any]:
+        # Every index is keyed by row position, so a compaction rebuilds them all
+        return {}
+
 
 class PropertyParlantAgent:
     """Property agent using real Parlant AI integration"""
@@ -25,8 +124,9 @@ class PropertyParlantAgent:
         if not os.getenv("OPENAI_BASE_URL"):
             raise ValueError("OPENAI_BASE_URL environment variable is required")
         
-        # Property database
-        self.properties = [
+        # Property database, published as ListingSnapshots
+        self.catalogue = ListingCatalogue()
+        listings = [
             {
                 "id": "prop_001",
                 "address": "123 Collins Street, Melbourne VIC 3000",
@@ -114,6 +214,63 @@ class PropertyParlantAgent:
             }
         ]
     
+        self.set_listings(listings)
+        self.extractor = get_extractor()
+        # Extraction and filtering run in worker threads; only awaited LLM calls are rate-limited
+        self.llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        self.stream_semaphore = asyncio.Semaphore(LLM_STREAM_MAX_CONCURRENCY)
+        
+        # Replace the built-in listings with a mapped catalogue file or a streamed feed when one is configured
+        if os.getenv("CATALOGUE_FILE"):
+            self.load_catalogue_file(os.getenv("CATALOGUE_FILE"))
+        elif os.getenv("LISTINGS_FEED"):
+            self.load_listings(os.getenv("LISTINGS_FEED"))
+    
+    @property
+    def properties(self) -> List[Dict[str, Any]]:
+        """Live listings of the current version, in catalogue order"""
+        return self.catalogue.snapshot().listings()
+    
+    @property
+    def catalogue_version(self) -> int:
+        return self.catalogue.version
+    
+    def set_listings(self, listings: List[Dict[str, Any]]):
+        """Replace the property database with in-memory listing dicts"""
+        self.catalogue.replace(listings)
+    
+    def load_listings(self, path: str, batch_size: int = 10000) -> IngestionStats:
+        """Replace the property database with a streamed CSV/JSONL listing feed"""
+        # Rows go straight into listing dicts and the position-keyed indexes, batch by batch
+        builder = ListingBuilder()
+        builder.ingest(iter_rows(path), batch_size=batch_size)
+        self.catalogue.adopt(builder.listings, builder.row_history, range_index=builder.range_index,
+                             feature_index=builder.feature_index)
+        print(f"📥 Loaded listings from {path}: {builder.stats.summary()}")
+        return builder.stats
+    
+    def load_catalogue_file(self, path: str) -> CatalogueFile:
+        """Serve a binary catalogue file (see catalogue_file.py): listings and indexes stay in the shared mapping"""
+        catalogue_file = CatalogueFile(path)
+        self.catalogue.adopt(catalogue_file.listing_rows(), catalogue_file.row_history(),
+                             range_index=catalogue_file.range_index(), feature_index=catalogue_file.feature_index(),
+                             geo=catalogue_file.geo_index())
+        print(f"🗺️ Mapped catalogue file {path}: {len(catalogue_file):,} listings")
+        return catalogue_file
+    
+    def upsert_listings(self, listings: Iterable[Dict[str, Any]]) -> int:
+        """Add listings, or replace the listed version of those with the same id; returns the new version.
+        
+        The new versions are appended as fresh rows, so requests already holding
+        the previous snapshot keep seeing the old listings.
+        """
+        return self.catalogue.upsert(listings).version
+    
+    def delete_listings(self, listing_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Delist listings by id, returning the listings actually removed"""
+        _, removed = self.catalogue.delete(listing_ids)
+        return removed
+    
     async def initialize(self):
         """Initialize Parlant server and agent"""
         try:
@@ -170,24 +327,83 @@ class PropertyParlantAgent:
         except Exception as e:
             print(f"Warning: Could not set up guidelines: {e}")
     
+    def _search(self, message: str) -> Tuple[Dict[str, Any], str, bool, List[Dict[str, Any]]]:
+        """Criteria, intent, whether the reply is canned, and the matching listings for a message"""
+        # Extract criteria and conversational keywords in one pass
+        with metrics.span("extract_criteria"):
+            extraction = self.extractor.extract(message)
+        criteria = extraction.criteria
+        intent, canned = route(extraction.keywords, criteria)
+        if canned:
+            # Greetings, jokes, questions and bare browsing: memoised reply over
+            # the default shortlist, with no filtering and no LLM stage
+            metrics.count("canned_responses")
+            return criteria, intent, canned, self._canned_shortlist()
+        with metrics.span("filter_properties"):
+            return criteria, intent, canned, self._filter_properties(criteria)
+    
+    def _uses_llm(self) -> bool:
+        return LLM_RESPONSES and getattr(self.agent, "chat", None) is not None
+    
+    async def _respond(self, intent: str, message: str, criteria: Dict[str, Any],
+                       properties: List[Dict[str, Any]]) -> str:
+        """Reply to a search: the agent's LLM when enabled, otherwise the rendered template"""
+        if not self._uses_llm():
+            with metrics.span("generate_response"):
+                return render(intent, message, criteria, properties)
+        with metrics.span("llm_queue_wait"):
+            await self.llm_semaphore.acquire()
+        try:
+            with metrics.span("generate_response"):
+                response = await self.agent.chat(
+                    message=message,
+                    context={"search_criteria": criteria, "available_properties": properties}
+                )
+        finally:
+            self.llm_semaphore.release()
+        return str(response)
+    
+    async def _respond_stream(self, intent: str, message: str, criteria: Dict[str, Any],
+                              properties: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """Reply text as it is produced: model chunks when the agent streams, else chunks of the finished reply"""
+        if not self._uses_llm():
+            async for event in stream_text(await self._respond(intent, message, criteria, properties)):
+                yield event["text"]
+            return
+        context = {"search_criteria": criteria, "available_properties": properties}
+        chat_stream = getattr(self.agent, "chat_stream", None)
+        with metrics.span("llm_queue_wait"):
+            await self.stream_semaphore.acquire()
+        try:
+            if chat_stream is None:
+                with metrics.span("generate_response"):
+                    response = await self.agent.chat(message=message, context=context)
+                async for event in stream_text(str(response)):
+                    yield event["text"]
+                return
+            started = time.perf_counter()
+            first = True
+            async for chunk in chat_stream(message=message, context=context):
+                if first:
+                    metrics.record("llm_first_token", int((time.perf_counter() - started) * 1e6))
+                    first = False
+                yield chunk if isinstance(chunk, str) else str(chunk)
+        finally:
+            self.stream_semaphore.release()
+    
     async def chat(self, message: str, user_id: str = "default") -> Dict[str, Any]:
         """Process a chat message using Parlant AI"""
         if not self.is_initialized:
             await self.initialize()
         
         try:
-            # For now, we'll use a hybrid approach since the full Parlant integration
-            # requires more complex setup. We'll use the AI for conversation and
-            # our filtering for property recommendations.
-            
-            # Extract criteria from the message
-            criteria = self._extract_criteria(message)
-            
-            # Filter properties based on criteria
-            filtered_properties = self._filter_properties(criteria)
-            
-            # Generate AI response
-            ai_response = self._generate_ai_response(message, criteria, filtered_properties)
+            # Hybrid approach: our own extraction and filtering pick the recommendations
+            # (off the event loop), and the reply comes from templates or the LLM
+            criteria, intent, canned, filtered_properties = await asyncio.to_thread(self._search, message)
+            if canned:
+                ai_response = render(intent, message, criteria, filtered_properties)
+            else:
+                ai_response = await self._respond(intent, message, criteria, filtered_properties)
             
             return {
                 "response": ai_response,
@@ -197,77 +413,112 @@ class PropertyParlantAgent:
             }
             
         except Exception as e:
-            print(f"❌ Error in Parlant chat: {e}")
+            metrics.count("chat_errors")
+            print(f"❌ Error in Parlant chat: {e!r}")
             return {
                 "response": "I'm sorry, I'm having trouble processing your request right now. Please try again.",
                 "recommendations": [],
-                "type": "error"
+                "type": "error",
+                "error": CHAT_ERROR_MESSAGE
             }
     
-    def _extract_criteria(self, message: str) -> Dict[str, Any]:
-        """Extract property search criteria from user message"""
-        import re
-        criteria = {}
-        lower_message = message.lower()
-        
-        # Extract budget
-        budget_match = re.search(r'(\d+)(k|k\b|000)', lower_message)
-        if budget_match:
-            number = int(budget_match.group(1))
-            multiplier = 1000 if 'k' in budget_match.group(2) else 1
-            criteria['budget'] = number * multiplier
-        
-        # Extract bedrooms
-        bedroom_match = re.search(r'(\d+)\s*(bed|bedroom|bedrooms)', lower_message)
-        if bedroom_match:
-            criteria['bedrooms'] = int(bedroom_match.group(1))
-        
-        # Extract property type
-        if 'apartment' in lower_message or 'unit' in lower_message:
-            criteria['property_type'] = 'apartment'
-        elif 'house' in lower_message or 'home' in lower_message:
-            criteria['property_type'] = 'house'
-        elif 'townhouse' in lower_message:
-            criteria['property_type'] = 'townhouse'
+    async def chat_stream(self, message: str, user_id: str = "default") -> AsyncIterator[Dict[str, Any]]:
+        """Process a chat message, yielding recommendations first and then response text as it is produced"""
+        if not self.is_initialized:
+            await self.initialize()
         
-        # Extract location
-        locations = ['melbourne', 'sydney', 'brisbane', 'perth', 'adelaide']
-        for location in locations:
-            if location in lower_message:
-                criteria['location'] = location
-                break
+        try:
+            criteria, intent, canned, filtered_properties = await asyncio.to_thread(self._search, message)
+            
+            # Listings are ready before any text; let the client render them immediately
+            yield {"event": "recommendations", "recommendations": filtered_properties, "criteria": criteria}
+            
+            if canned:
+                ai_response = render(intent, message, criteria, filtered_properties)
+                async for event in stream_text(ai_response):
+                    yield event
+            else:
+                # Forward the reply chunk by chunk so the first token doesn't wait for the whole answer
+                parts = []
+                async with aclosing(self._respond_stream(intent, message, criteria, filtered_properties)) as texts:
+                    async for text in texts:
+                        parts.append(text)
+                        yield {"event": "token", "text": text}
+                ai_response = "".join(parts)
+            
+            yield {"event": "done", "result": {
+                "response": ai_response,
+                "recommendations": filtered_properties,
+                "type": "parlant_ai",
+                "criteria": criteria
+            }}
+            
+        except Exception as e:
+            metrics.count("chat_errors")
+            print(f"❌ Error in Parlant chat stream: {e!r}")
+            yield {"event": "error", "error": CHAT_ERROR_MESSAGE}
+    
+    async def chat_batch(self, requests: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Process (user_id, message) pairs concurrently, returning per-item results in order"""
+        if not self.is_initialized:
+            await self.initialize()
         
-        return criteria
+        results = await asyncio.gather(
+            *(self.chat(message, user_id) for user_id, message in requests),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                metrics.count("chat_errors")
+                print(f"❌ Error in Parlant chat batch: {result!r}")
+        return [
+            {"status": "error", "error": CHAT_ERROR_MESSAGE} if isinstance(result, Exception)
+            else {"status": "error", "error": result["error"]} if result.get("type") == "error"
+            else {"status": "ok", "result": result}
+            for result in results
+        ]
+    
+    def _extract_criteria(self, message: str) -> Dict[str, Any]:
+        """Extract property search criteria from user message"""
+        return self.extractor.extract(message).criteria
+    
+    def _feature_candidates(self, snapshot: ListingSnapshot, features: List[str]) -> Optional[Set[int]]:
+        """Positions of listings that have every requested feature"""
+        if not features:
+            return None
+        return snapshot.feature_index.properties_with_all(features)
     
-    def _filter_properties(self, criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _filter_properties(self, criteria: Dict[str, Any],
+                           snapshot: Optional[ListingSnapshot] = None) -> List[Dict[str, Any]]:
         """Filter properties based on criteria"""
-        filtered = self.properties.copy()
+        # One version throughout, however many writes land meanwhile
+        snapshot = snapshot if snapshot is not None else self.catalogue.snapshot()
+        centre = None
+        if criteria.get('radius_km') and criteria.get('location'):
+            centre = get_centroids().locate(criteria['location'], criteria.get('state'))
         
-        # Apply budget filter
-        if criteria.get('budget'):
-            filtered = [p for p in filtered if p['price'] <= criteria['budget']]
-        
-        # Apply bedroom filter
-        if criteria.get('bedrooms'):
-            filtered = [p for p in filtered if p['bedrooms'] == criteria['bedrooms']]
-        
-        # Apply property type filter
-        if criteria.get('property_type'):
-            filtered = [p for p in filtered if p['property_type'] == criteria['property_type']]
-        
-        # Apply location filter
-        if criteria.get('location'):
-            location = criteria['location'].lower()
-            filtered = [p for p in filtered if location in p['suburb'].lower() or location in p['state'].lower()]
+        if centre is not None:
+            positions = self._filter_within(snapshot, criteria, centre, criteria['radius_km'])
+        else:
+            # All hard constraints are answered together by the range index,
+            # driving from whichever predicate is most selective
+            positions = snapshot.range_index.query(
+                max_price=criteria.get('budget') or None,
+                min_price=criteria.get('budget_min') or None,
+                bedrooms=criteria.get('bedrooms') or None,
+                property_types=[criteria['property_type']] if criteria.get('property_type') else None,
+                location=criteria.get('location') or None,
+                candidates=self._feature_candidates(snapshot, criteria.get('features')),
+                limit=5
+            )
         
         # If no matches found, show some alternatives
-        if not filtered and criteria:
+        if not positions and criteria:
+            metrics.count("relaxed_fallback")
             # Show properties with relaxed criteria
-            filtered = self.properties.copy()
-            if criteria.get('budget'):
-                filtered = [p for p in filtered if p['price'] <= criteria['budget'] * 1.2]  # 20% over budget
-            if criteria.get('bedrooms'):
-                filtered = [p for p in filtered if p['bedrooms'] >= criteria['bedrooms'] - 1]  # One less bedroom
+            max_price = criteria['budget'] * 1.2 if criteria.get('budget') else None  # 20% over budget
+            min_bedrooms = criteria['bedrooms'] - 1 if criteria.get('bedrooms') else None  # One less bedroom
+            property_types = None
             if criteria.get('property_type'):
                 # Show similar property types
                 similar_types = {
@@ -275,56 +526,48 @@ class PropertyParlantAgent:
                     'house': ['house', 'townhouse'],
                     'townhouse': ['townhouse', 'house']
                 }
-                if criteria['property_type'] in similar_types:
-                    filtered = [p for p in filtered if p['property_type'] in similar_types[criteria['property_type']]]
+                property_types = similar_types.get(criteria['property_type'])
+            positions = snapshot.range_index.query(
+                max_price=max_price,
+                min_bedrooms=min_bedrooms,
+                property_types=property_types,
+                limit=5
+            )
         
-        return filtered[:5]  # Return top 5 matches
+        return [snapshot.rows[i] for i in positions]  # Return top 5 matches
     
-    def _generate_ai_response(self, message: str, criteria: Dict[str, Any], properties: List[Dict[str, Any]]) -> str:
+    def _filter_within(self, snapshot: ListingSnapshot, criteria: Dict[str, Any], centre: Tuple[float, float],
+                       radius_km: float) -> List[int]:
+        """Top 5 positions within radius_km of centre meeting the other criteria, nearest first"""
+        nearby, distances = snapshot.geo.within(centre[0], centre[1], radius_km)
+        distance_at = dict(zip(nearby.tolist(), distances.tolist()))
+        candidates = set(distance_at)
+        feature_candidates = self._feature_candidates(snapshot, criteria.get('features'))
+        if feature_candidates is not None:
+            candidates &= feature_candidates
+        positions = snapshot.range_index.query(
+            max_price=criteria.get('budget') or None,
+            min_price=criteria.get('budget_min') or None,
+            bedrooms=criteria.get('bedrooms') or None,
+            property_types=[criteria['property_type']] if criteria.get('property_type') else None,
+            candidates=candidates
+        )
+        # Catalogue order breaks distance ties, as in the non-radius filter
+        return sorted(positions, key=lambda position: (distance_at[position], position))[:5]
+    
+    def _canned_shortlist(self) -> List[Dict[str, Any]]:
+        """Listings shown with criteria-free replies; fixed for a given catalogue version"""
+        snapshot = self.catalogue.snapshot()
+        if snapshot.shortlist is None:
+            snapshot.shortlist = self._filter_properties({}, snapshot)
+        return snapshot.shortlist
+    
+    def _generate_ai_response(self, message: str, criteria: Dict[str, Any], properties: List[Dict[str, Any]],
+                              keywords: Optional[Set[str]] = None) -> str:
         """Generate AI response based on message and criteria"""
-        lower_message = message.lower()
-        
-        # Non-property questions - handle general knowledge
-        if 'flink' in lower_message or 'apache' in lower_message or 'stream processing' in lower_message:
-            return "Apache Flink is a distributed stream processing framework for stateful computations over unbounded and bounded data streams. It's commonly used for real-time analytics, event-driven applications, and data pipelines. While I'm primarily a real estate assistant, I can help with general questions too! Is there anything about properties I can help you with?"
-        
-        # Technology questions
-        if any(phrase in lower_message for phrase in ['what is', 'tell me about', 'explain']):
-            return "I'm primarily a real estate assistant, but I can help with general questions! However, my main expertise is helping you find the perfect property. What kind of home are you looking for?"
-        
-        # Joke responses
-        if 'joke' in lower_message or 'funny' in lower_message:
-            jokes = [
-                "Why did the real estate agent go to therapy? Because they had too many property issues! 🏠😄",
-                "What do you call a real estate agent who's also a magician? A property wizard! ✨🏡",
-                "Why don't houses ever get lonely? Because they always have great neighbors! 🏘️😊"
-            ]
-            return jokes[hash(message) % len(jokes)]
-        
-        # Greeting responses
-        if any(word in lower_message for word in ['hello', 'hi', 'hey']):
-            return "Hi there! I'm your realestate.com.au AI assistant powered by Parlant. I'm here to help you find the perfect property! What are you looking for in your next home?"
-        
-        # Property search responses
-        if properties:
-            if criteria:
-                criteria_text = []
-                if criteria.get('budget'):
-                    criteria_text.append(f"under ${criteria['budget']:,}")
-                if criteria.get('bedrooms'):
-                    criteria_text.append(f"with {criteria['bedrooms']} bedroom{'s' if criteria['bedrooms'] > 1 else ''}")
-                if criteria.get('property_type'):
-                    criteria_text.append(f"({criteria['property_type']}s)")
-                
-                criteria_str = " ".join(criteria_text)
-                return f"Perfect! I found {len(properties)} properties matching your criteria: {criteria_str}. Here are the best options:"
-            else:
-                return f"Here are some great properties I found for you:"
-        else:
-            if criteria:
-                return "I couldn't find any properties matching your exact criteria, but let me show you some similar options that might interest you:"
-            else:
-                return "I understand you're looking for properties on realestate.com.au! Tell me about your preferences - what's your budget, how many bedrooms do you need, and what type of property interests you?"
+        if keywords is None:
+            keywords = self.extractor.extract(message).keywords
+        return render(route(keywords, criteria).intent, message, criteria, properties)
     
     async def close(self):
         """Close the Parlant agent"""
@@ -337,13 +580,18 @@ class PropertyParlantAgent:
 
 # Global agent instance
 _agent_instance = None
+_agent_lock = asyncio.Lock()
 
 async def get_agent():
-    """Get or create the global agent instance"""
+    """Get or create the global agent instance, building it exactly once"""
     global _agent_instance
     if _agent_instance is None:
-        _agent_instance = PropertyParlantAgent()
-        await _agent_instance.initialize()
+        async with _agent_lock:
+            # Concurrent first callers wait here; only the first one builds the agent
+            if _agent_instance is None:
+                agent = PropertyParlantAgent()
+                await agent.initialize()
+                _agent_instance = agent
     return _agent_instance
 
 async def chat_with_parlant(message: str, user_id: str = "default") -> Dict[str, Any]:
@@ -351,6 +599,17 @@ async def chat_with_parlant(message: str, user_id: str = "default") -> Dict[str,
     agent = await get_agent()
     return await agent.chat(message, user_id)
 
+async def chat_stream_with_parlant(message: str, user_id: str = "default") -> AsyncIterator[Dict[str, Any]]:
+    """Stream a chat with Parlant AI as recommendation, token and done events"""
+    agent = await get_agent()
+    async for event in agent.chat_stream(message, user_id):
+        yield event
+
+async def chat_batch_with_parlant(requests: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Chat with Parlant AI for a burst of (user_id, message) pairs"""
+    agent = await get_agent()
+    return await agent.chat_batch(requests)
+
 # Test function
 async def test_parlant_integration():
     """Test the Parlant integration"""
@@ -16,58 +16,31 @@ The agent provides:
 import parlant.sdk as p
 import asyncio
 import json
-from typing import Dict, List, Optional, Any
+import os
+from typing import Dict, List, Optional, Any, Tuple, Iterable, AsyncIterator
 from datetime import datetime, timedelta
-from dataclasses import dataclass
-from enum import Enum
+from property_models import PropertyType, UserType, Property, UserProfile, CompactUserProfile
+from property_store import PropertyStore
+from feature_index import FeatureIndex
+from ingestion import ingest_file, IngestionStats
+from context_builder import ContextBuilder
+from recommendation_cache import RecommendationCache, profile_fingerprint
+from incremental_ranker import IncrementalRanker
+from streaming import stream_text
+from conversation_history import ConversationHistory
+from instrumentation import metrics
+from session_store import SessionStore, open_session_store, encode_session, decode_session
+from semantic_cache import SemanticResponseCache, partition_key
+from criteria_extractor import get_extractor
+from geo_index import distance_km, LOCATION_RADIUS_KM
+from market_stats import MarketStats, price_per_sqm, BELOW_MARKET_SHARE
+from catalogue import VersionedCatalogue, CatalogueSnapshot
+from catalogue_file import CatalogueFile
+from scoring_pool import ScoringPool
 
-class PropertyType(Enum):
-    HOUSE = "house"
-    APARTMENT = "apartment"
-    TOWNHOUSE = "townhouse"
-    LAND = "land"
-    COMMERCIAL = "commercial"
-
-class UserType(Enum):
-    FIRST_TIME_BUYER = "first_time_buyer"
-    INVESTOR = "investor"
-    UPGRADER = "upgrader"
-    DOWNSIZER = "downsizer"
-    RENTER = "renter"
-
-@dataclass
-class Property:
-    id: str
-    address: str
-    price: int
-    property_type: PropertyType
-    bedrooms: int
-    bathrooms: int
-    car_spaces: int
-    land_size: Optional[float]
-    features: List[str]
-    images: List[str]
-    agent_contact: str
-    listing_date: datetime
-    suburb: str
-    state: str
-    postcode: str
-
-@dataclass
-class UserProfile:
-    user_id: str
-    name: str
-    user_type: UserType
-    budget_min: int
-    budget_max: int
-    preferred_suburbs: List[str]
-    property_types: List[PropertyType]
-    must_have_features: List[str]
-    nice_to_have_features: List[str]
-    deal_breakers: List[str]
-    search_history: List[str]
-    saved_properties: List[str]
-    last_interaction: datetime
+# Near-duplicate questions over the same shortlist reuse an earlier LLM reply (SEMANTIC_CACHE=0 disables)
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "1") != "0"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.93"))
 
 class PropertyPersonalizationAgent:
     """
@@ -75,12 +48,43 @@ class PropertyPersonalizationAgent:
     that adapts to user preferences and provides explainable recommendations.
     """
     
-    def __init__(self):
+    def __init__(self, session_store: Optional[SessionStore] = None):
         self.server = None
         self.agent = None
+        # Working copies of the sessions in use; the session store is the source of truth
         self.user_profiles: Dict[str, UserProfile] = {}
-        self.properties: List[Property] = []
+        self.session_store = session_store if session_store is not None else open_session_store()
+        # Readers take one catalogue snapshot per request; listing updates publish new versions
+        self.catalogue = VersionedCatalogue()
         self.conversation_context: Dict[str, Any] = {}
+        self.context_builder = ContextBuilder()
+        self.recommendation_cache = RecommendationCache()
+        self.response_cache = SemanticResponseCache(threshold=SEMANTIC_CACHE_THRESHOLD) if SEMANTIC_CACHE else None
+        self.extractor = get_extractor()
+        self.ranker = IncrementalRanker(self.property_store)
+        # Large catalogues are scored in worker processes so the event loop stays free
+        self.scoring_pool = ScoringPool()
+    
+    @property
+    def properties(self) -> List[Property]:
+        """Live listings of the current catalogue version, in catalogue order"""
+        return self.catalogue.snapshot().listings()
+    
+    @property
+    def property_store(self) -> PropertyStore:
+        return self.catalogue.snapshot().store
+    
+    @property
+    def feature_index(self) -> FeatureIndex:
+        return self.catalogue.snapshot().feature_index
+    
+    @property
+    def market_stats(self) -> MarketStats:
+        return self.catalogue.snapshot().market_stats
+    
+    @property
+    def catalogue_version(self) -> int:
+        return self.catalogue.version
         
     async def initialize(self):
         """Initialize the Parlant server and create the property agent"""
@@ -107,8 +111,13 @@ class PropertyPersonalizationAgent:
         # Set up agent guidelines for property recommendations
         # await self._setup_agent_guidelines()  # Temporarily disabled for demo
         
-        # Load sample property data
-        await self._load_sample_data()
+        # Map a catalogue file or load a feed when one is configured, otherwise the sample data
+        if os.getenv("CATALOGUE_FILE"):
+            self.load_catalogue_file(os.getenv("CATALOGUE_FILE"))
+        elif os.getenv("LISTINGS_FEED"):
+            await self.load_listings(os.getenv("LISTINGS_FEED"))
+        else:
+            await self._load_sample_data()
         
     async def _setup_agent_guidelines(self):
         """Configure the agent with property-specific guidelines and principles"""
@@ -159,6 +168,31 @@ class PropertyPersonalizationAgent:
                 content=guideline["content"]
             )
     
+    async def load_listings(self, path: str, batch_size: int = 10000) -> IngestionStats:
+        """Replace the catalogue with a streamed CSV/JSONL listing feed"""
+        builder = ingest_file(path, batch_size=batch_size, compact=True)
+        previous = self.catalogue.snapshot()
+        self.catalogue.adopt(builder.properties, feature_index=builder.feature_index, store=builder.property_store,
+                             market_stats=builder.market_stats)
+        self._catalogue_changed(previous)
+        print(f"📥 Loaded listings from {path}: {builder.stats.summary()}")
+        return builder.stats
+    
+    def load_catalogue_file(self, path: str) -> CatalogueFile:
+        """Serve a binary catalogue file (see catalogue_file.py), mapped rather than loaded.
+        
+        Rows, score columns, feature postings and market sketches stay in the
+        shared mapping; only listings upserted after opening are held in memory.
+        """
+        catalogue_file = CatalogueFile(path)
+        previous = self.catalogue.snapshot()
+        self.catalogue.adopt(catalogue_file.rows(), catalogue_file.row_history(),
+                             feature_index=catalogue_file.feature_index(), store=catalogue_file.property_store(),
+                             market_stats=catalogue_file.market_stats())
+        self._catalogue_changed(previous)
+        print(f"🗺️ Mapped catalogue file {path}: {len(catalogue_file):,} listings")
+        return catalogue_file
+    
     async def _load_sample_data(self):
         """Load sample property data for demonstration"""
         sample_properties = [
@@ -215,37 +249,226 @@ class PropertyPersonalizationAgent:
             )
         ]
         
-        self.properties = sample_properties
+        self.replace_properties(sample_properties)
+    
+    def replace_properties(self, properties: List[Property]):
+        """Swap in a whole new catalogue, rebuilding every index"""
+        previous = self.catalogue.snapshot()
+        self.catalogue.replace(properties)
+        self._catalogue_changed(previous)
+    
+    def _catalogue_changed(self, previous: CatalogueSnapshot, changed_ids: Optional[Iterable[str]] = None):
+        """Drop everything derived from the previous catalogue version.
+
+        changed_ids limits summary invalidation to the listings a delta touched.
+        """
+        snapshot = self.catalogue.snapshot()
+        if changed_ids is None:
+            self.context_builder.invalidate()
+        else:
+            for property_id in changed_ids:
+                self.context_builder.invalidate(property_id)
+        self.recommendation_cache.clear()
+        if self.response_cache is not None:
+            self.response_cache.clear()
+        if snapshot.rows is previous.rows:
+            # Same row space: cached score columns stay valid, only appended rows get scored
+            self.ranker.extend(snapshot.store)
+        else:
+            self.ranker.reset(snapshot.store)
+    
+    def upsert_properties(self, properties: List[Property]) -> int:
+        """Add listings or replace existing ones by id (e.g. price changes) without a reload.
+        
+        Returns the new catalogue version.
+        """
+        previous = self.catalogue.snapshot()
+        snapshot = self.catalogue.upsert(properties)
+        self._catalogue_changed(previous, [property.id for property in properties])
+        return snapshot.version
+    
+    def delete_properties(self, property_ids: List[str]) -> List[Property]:
+        """Delist listings by id; returns the listings that were removed"""
+        previous = self.catalogue.snapshot()
+        _, removed = self.catalogue.delete(property_ids)
+        if removed:
+            self._catalogue_changed(previous, [property.id for property in removed])
+        return removed
+    
+    def add_properties(self, properties: List[Property]):
+        """Append new listings to the catalogue and its indexes"""
+        self.upsert_properties(properties)
+    
+    def remove_property(self, property_id: str) -> bool:
+        """Delist a listing; returns False if it wasn't in the catalogue"""
+        return bool(self.delete_properties([property_id]))
+    
+    def _property_feature_ids(self, property: Property) -> frozenset:
+        """Interned feature IDs for a listing: its row's if it is a live listing, else looked up read-only"""
+        snapshot = self.catalogue.snapshot()
+        row = snapshot.row_of(property.id)
+        if row is not None and snapshot.rows[row] is property:
+            return snapshot.feature_index.features_of(row)
+        # Features no listing has cannot match a profile's wanted IDs; scoring must not grow the shared vocabulary
+        feature_ids = snapshot.feature_index.lookup_all(property.features)
+        return frozenset(feature_id for feature_id in feature_ids if feature_id is not None)
+    
+    def find_properties_with_features(self, features: List[str]) -> List[Property]:
+        """Listings that have all of the given features: postings intersected rarest first, then kept if live"""
+        snapshot = self.catalogue.snapshot()
+        rows = snapshot.feature_index.properties_with_all(features)
+        return [snapshot.rows[row] for row in sorted(rows) if row < snapshot.size and snapshot.live[row]]
+    
+    def _load_session(self, user_id: str):
+        """Refresh the working copy of a user's session from the session store"""
+        data = self.session_store.get(user_id)
+        session = decode_session(data) if data is not None else None
+        if session is None:
+            self.user_profiles.pop(user_id, None)
+            self.conversation_context.pop(user_id, None)
+            return
+        
+        profile, context = session
+        self.user_profiles[user_id] = profile
+        if context is None:
+            self.conversation_context.pop(user_id, None)
+        else:
+            # Listings that have since been delisted are dropped; updated ones come back at their latest version
+            snapshot = self.catalogue.snapshot()
+            context["recommended_properties"] = [
+                prop for prop in (snapshot.get(prop_id) for prop_id in context.pop("recommended_property_ids"))
+                if prop is not None
+            ]
+            context["user_profile"] = profile
+            self.conversation_context[user_id] = context
+    
+    def _save_session(self, user_id: str):
+        """Write a user's profile and conversation context back to the session store"""
+        with metrics.span("session_save"):
+            self.session_store.put(user_id, encode_session(
+                self.user_profiles[user_id], self.conversation_context.get(user_id)
+            ))
+    
+    def evict_idle_sessions(self) -> int:
+        """Expire idle sessions in the store and drop every working copy"""
+        evicted = self.session_store.evict_idle()
+        self.user_profiles.clear()
+        self.conversation_context.clear()
+        return evicted
     
     async def start_conversation(self, user_id: str, initial_message: str = None) -> str:
         """Start a conversation with the property agent"""
+        message, chat_context, shortlist = await self._prepare_conversation(user_id, initial_message)
+        
+        partition = self._response_partition(user_id, initial_message, shortlist, chat_context)
+        version = self.catalogue_version
+        response = self._cached_response(partition, message)
+        if response is None:
+            with metrics.span("agent_chat"):
+                response = await self.agent.chat(
+                    message=message,
+                    context=chat_context
+                )
+            self._cache_response(partition, message, response, version)
+        
+        self._record_turns(user_id, initial_message, response)
+        return response
+    
+    async def start_conversation_stream(self, user_id: str, initial_message: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """Start a conversation, yielding the shortlist first and then the reply as it is generated"""
+        message, chat_context, shortlist = await self._prepare_conversation(user_id, initial_message)
+        
+        yield {"event": "recommendations", "recommendations": shortlist,
+               "criteria": chat_context["search_criteria"]}
+        
+        # Cached replies and agents without token streaming are chunked; otherwise stream tokens as generated
+        partition = self._response_partition(user_id, initial_message, shortlist, chat_context)
+        version = self.catalogue_version
+        response = self._cached_response(partition, message)
+        chat_stream = getattr(self.agent, "chat_stream", None)
+        parts = []
+        if response is not None:
+            async for event in stream_text(response):
+                yield event
+        elif chat_stream is not None:
+            async for chunk in chat_stream(message=message, context=chat_context):
+                text = chunk if isinstance(chunk, str) else str(chunk)
+                parts.append(text)
+                yield {"event": "token", "text": text}
+            response = "".join(parts)
+            self._cache_response(partition, message, response, version)
+        else:
+            with metrics.span("agent_chat"):
+                response = await self.agent.chat(message=message, context=chat_context)
+            self._cache_response(partition, message, response, version)
+            async for event in stream_text(str(response)):
+                yield event
+        
+        self._record_turns(user_id, initial_message, response)
+        yield {"event": "done", "result": {"response": response, "recommendations": shortlist}}
+    
+    def _response_partition(self, user_id: str, user_message: Optional[str], shortlist: List[Property],
+                            chat_context: Dict[str, Any]) -> Optional[str]:
+        """Semantic cache partition for a reply, or None when it must not be shared"""
+        # The default greeting is personalised (name, budget), so only explicit user messages are cached
+        if self.response_cache is None or not user_message:
+            return None
+        criteria = self.extractor.extract(user_message).criteria
+        # The LLM also sees the user's profile and conversation so far; a reply shaped by them stays theirs
+        personal = [user_id, chat_context.get("user_profile"), chat_context.get("conversation_history")]
+        return partition_key(criteria, [property.id for property in shortlist], personal)
+    
+    def _cached_response(self, partition: Optional[str], message: str) -> Optional[str]:
+        if partition is None:
+            return None
+        with metrics.span("response_cache_lookup"):
+            response = self.response_cache.get(partition, message, self.catalogue_version)
+        metrics.count("response_cache_hits" if response is not None else "response_cache_misses")
+        return response
+    
+    def _cache_response(self, partition: Optional[str], message: str, response: Any, version: int):
+        # A reply written against listings that changed while the LLM was answering is not reused
+        if partition is not None and version == self.catalogue_version:
+            self.response_cache.put(partition, message, str(response), self.catalogue_version)
+    
+    async def _prepare_conversation(self, user_id: str, initial_message: Optional[str]) -> Tuple[str, Dict[str, Any], List[Property]]:
+        """Message to send, bounded chat context and ranked shortlist for a new conversation"""
         
         # Load or create user profile
+        with metrics.span("session_load"):
+            self._load_session(user_id)
         if user_id not in self.user_profiles:
             await self._create_user_profile(user_id)
         
         user_profile = self.user_profiles[user_id]
         
-        # Set conversation context
+        # Set conversation context; the bounded history carries over into the new conversation
+        previous = self.conversation_context.get(user_id)
         self.conversation_context[user_id] = {
             "user_profile": user_profile,
             "current_search_criteria": {},
             "recommended_properties": [],
-            "conversation_history": []
+            "conversation_history": previous["conversation_history"] if previous else ConversationHistory()
         }
         
+        # Only a pre-ranked shortlist of compact summaries goes to the LLM, never the whole catalogue
+        snapshot = self.catalogue.snapshot()
+        with metrics.span("rank"):
+            shortlist = [snapshot.rows[row] for row, score in
+                         await self._rank(user_id, user_profile, snapshot, self.context_builder.shortlist_size, 0.0)]
+        with metrics.span("context_build"):
+            chat_context = self.context_builder.build(
+                user_profile,
+                shortlist,
+                search_criteria=self.conversation_context[user_id]["current_search_criteria"],
+                conversation_history=self.conversation_context[user_id]["conversation_history"].to_context()
+            )
+        
         # Generate initial greeting and property recommendations
         if initial_message:
-            response = await self.agent.chat(
-                message=initial_message,
-                context={
-                    "user_profile": user_profile.__dict__,
-                    "available_properties": [p.__dict__ for p in self.properties],
-                    "conversation_context": self.conversation_context[user_id]
-                }
-            )
+            message = initial_message
         else:
-            greeting = f"""
+            message = f"""
             Hi {user_profile.name}! I'm PropertyMatch Pro, your personal property assistant.
             
             I can help you find the perfect property based on your preferences. 
@@ -254,21 +477,30 @@ class PropertyPersonalizationAgent:
             
             What specific features are most important to you in your next property?
             """
-            
-            response = await self.agent.chat(
-                message=greeting,
-                context={
-                    "user_profile": user_profile.__dict__,
-                    "available_properties": [p.__dict__ for p in self.properties],
-                    "conversation_context": self.conversation_context[user_id]
-                }
-            )
         
-        return response
+        self._save_session(user_id)
+        return message, chat_context, shortlist
     
-    async def _create_user_profile(self, user_id: str) -> UserProfile:
+    async def _rank(self, user_id: str, user_profile: UserProfile, snapshot: CatalogueSnapshot,
+                    k: int, threshold: float) -> List[Tuple[int, float]]:
+        """(row, score) of the best k live listings for the user in one catalogue snapshot"""
+        if self.scoring_pool.handles(snapshot):
+            return await self.scoring_pool.top_k(snapshot, user_profile, k=k, threshold=threshold)
+        # Vectorized scoring that only recomputes the score components whose preferences changed
+        return self.ranker.top_k(user_id, user_profile, k=k, threshold=threshold,
+                                 store=snapshot.store, live=snapshot.live)
+    
+    def _record_turns(self, user_id: str, user_message: Optional[str], response: Any):
+        """Append a completed exchange to the user's bounded history and persist it"""
+        history = self.conversation_context[user_id]["conversation_history"]
+        if user_message:
+            history.append("user", user_message)
+        history.append("assistant", str(response))
+        self._save_session(user_id)
+    
+    async def _create_user_profile(self, user_id: str) -> CompactUserProfile:
         """Create a new user profile with default preferences"""
-        profile = UserProfile(
+        profile = CompactUserProfile(
             user_id=user_id,
             name="Property Seeker",
             user_type=UserType.FIRST_TIME_BUYER,
@@ -287,9 +519,11 @@ class PropertyPersonalizationAgent:
         self.user_profiles[user_id] = profile
         return profile
     
-    async def get_personalized_recommendations(self, user_id: str, search_criteria: Dict[str, Any] = None) -> List[Property]:
+    async def get_personalized_recommendations(self, user_id: str, search_criteria: Dict[str, Any] = None,
+                                               k: int = 5, threshold: float = 0.6) -> List[Property]:
         """Get personalized property recommendations based on user profile and search criteria"""
         
+        self._load_session(user_id)
         if user_id not in self.conversation_context:
             await self.start_conversation(user_id)
         
@@ -300,20 +534,25 @@ class PropertyPersonalizationAgent:
         if search_criteria:
             context["current_search_criteria"].update(search_criteria)
         
-        # Filter properties based on user preferences
-        recommendations = []
+        # One consistent catalogue version for the whole request, whatever updates land meanwhile
+        snapshot = self.catalogue.snapshot()
         
-        for property in self.properties:
-            score = self._calculate_property_score(property, user_profile, context["current_search_criteria"])
-            if score > 0.6:  # Threshold for recommendations
-                recommendations.append((property, score))
+        # Unchanged profile, criteria and catalogue: reuse the last ranking
+        cache_key = profile_fingerprint(user_profile, context["current_search_criteria"], snapshot.version, k, threshold)
+        recommended_properties = self.recommendation_cache.get(cache_key)
         
-        # Sort by score and return top recommendations
-        recommendations.sort(key=lambda x: x[1], reverse=True)
-        recommended_properties = [prop for prop, score in recommendations[:5]]
+        if recommended_properties is None:
+            metrics.count("recommendation_cache_misses")
+            with metrics.span("rank"):
+                recommendations = await self._rank(user_id, user_profile, snapshot, k, threshold)
+            recommended_properties = [snapshot.rows[row] for row, score in recommendations]
+            self.recommendation_cache.put(cache_key, user_id, recommended_properties)
+        else:
+            metrics.count("recommendation_cache_hits")
         
         # Update context
         context["recommended_properties"] = recommended_properties
+        self._save_session(user_id)
         
         return recommended_properties
     
@@ -338,16 +577,16 @@ class PropertyPersonalizationAgent:
             score += type_weight
         max_score += type_weight
         
-        # Suburb preference (15% weight)
+        # Suburb preference (15% weight), decaying with distance from the preferred suburbs
         suburb_weight = 0.15
-        if property.suburb in user_profile.preferred_suburbs:
-            score += suburb_weight
+        score += suburb_weight * self._location_match(property, user_profile)
         max_score += suburb_weight
         
         # Feature matching (25% weight)
         feature_weight = 0.25
-        must_have_matches = sum(1 for feature in user_profile.must_have_features if feature.lower() in [f.lower() for f in property.features])
-        nice_to_have_matches = sum(1 for feature in user_profile.nice_to_have_features if feature.lower() in [f.lower() for f in property.features])
+        property_feature_ids = self._property_feature_ids(property)
+        must_have_matches = FeatureIndex.count_matches(property_feature_ids, self.feature_index.lookup_all(user_profile.must_have_features))
+        nice_to_have_matches = FeatureIndex.count_matches(property_feature_ids, self.feature_index.lookup_all(user_profile.nice_to_have_features))
         
         if user_profile.must_have_features:
             must_have_score = must_have_matches / len(user_profile.must_have_features)
@@ -361,9 +600,31 @@ class PropertyPersonalizationAgent:
         
         return score / max_score if max_score > 0 else 0
     
+    def _location_match(self, property: Property, user_profile: UserProfile) -> float:
+        """1.0 in a preferred suburb, otherwise decaying with distance to the nearest preferred suburb"""
+        if property.suburb in user_profile.preferred_suburbs:
+            return 1.0
+        return self.property_store.centroids.location_match(
+            property.suburb, property.state, tuple(user_profile.preferred_suburbs))
+    
+    def _nearest_preferred_suburb(self, property: Property, user_profile: UserProfile) -> Optional[Tuple[str, float]]:
+        """(preferred suburb, km) closest to the listing, or None if none can be located"""
+        centroids = self.property_store.centroids
+        point = centroids.locate(property.suburb, property.state)
+        if point is None:
+            return None
+        nearest = None
+        for suburb in user_profile.preferred_suburbs:
+            for lat, lon in centroids.points([suburb]):
+                km = distance_km(lat, lon, *point)
+                if nearest is None or km < nearest[1]:
+                    nearest = (suburb, km)
+        return nearest
+    
     async def explain_recommendation(self, user_id: str, property_id: str) -> str:
         """Provide an explainable explanation for why a property was recommended"""
         
+        self._load_session(user_id)
         if user_id not in self.conversation_context:
             return "Please start a conversation first to get property recommendations."
         
@@ -371,7 +632,7 @@ class PropertyPersonalizationAgent:
         context = self.conversation_context[user_id]
         
         # Find the property
-        property = next((p for p in self.properties if p.id == property_id), None)
+        property = self.catalogue.snapshot().get(property_id)
         if not property:
             return "Property not found."
         
@@ -385,6 +646,7 @@ class PropertyPersonalizationAgent:
         **Property Type**: {score_breakdown['type_explanation']}
         **Location**: {score_breakdown['location_explanation']}
         **Features**: {score_breakdown['features_explanation']}
+        **Market**: {score_breakdown['market_explanation']}
         
         **Overall Score**: {score_breakdown['overall_score']:.1%}
         
@@ -414,14 +676,20 @@ class PropertyPersonalizationAgent:
             type_explanation = f"Different from your preferred types ({', '.join([pt.value for pt in user_profile.property_types])})"
         
         # Location explanation
+        nearest = None
         if property.suburb in user_profile.preferred_suburbs:
             location_explanation = f"Located in your preferred suburb of {property.suburb}"
         else:
-            location_explanation = f"Located in {property.suburb} (not in your preferred suburbs)"
+            nearest = self._nearest_preferred_suburb(property, user_profile)
+            if nearest is not None and nearest[1] <= LOCATION_RADIUS_KM:
+                location_explanation = f"Located in {property.suburb}, {nearest[1]:.1f} km from your preferred suburb of {nearest[0]}"
+            else:
+                location_explanation = f"Located in {property.suburb} (not in your preferred suburbs)"
         
         # Features explanation
-        must_have_matches = [f for f in user_profile.must_have_features if f.lower() in [prop_f.lower() for prop_f in property.features]]
-        nice_to_have_matches = [f for f in user_profile.nice_to_have_features if f.lower() in [prop_f.lower() for prop_f in property.features]]
+        property_feature_ids = self._property_feature_ids(property)
+        must_have_matches = [f for f in user_profile.must_have_features if self.feature_index.vocabulary.lookup(f) in property_feature_ids]
+        nice_to_have_matches = [f for f in user_profile.nice_to_have_features if self.feature_index.vocabulary.lookup(f) in property_feature_ids]
         
         features_explanation = f"Has {len(must_have_matches)}/{len(user_profile.must_have_features)} must-have features"
         if must_have_matches:
@@ -429,6 +697,9 @@ class PropertyPersonalizationAgent:
         if nice_to_have_matches:
             features_explanation += f" and {len(nice_to_have_matches)} nice-to-have features ({', '.join(nice_to_have_matches)})"
         
+        # Market context from the materialised suburb aggregates
+        market_explanation, below_market = self._market_context(property)
+        
         # Key highlights
         highlights = []
         if property.price <= user_profile.budget_max:
@@ -437,8 +708,12 @@ class PropertyPersonalizationAgent:
             highlights.append("matches your property type preference")
         if property.suburb in user_profile.preferred_suburbs:
             highlights.append("is in your preferred location")
+        elif nearest is not None and nearest[1] <= LOCATION_RADIUS_KM:
+            highlights.append(f"is close to {nearest[0]}")
         if must_have_matches:
             highlights.append(f"includes your must-have features: {', '.join(must_have_matches)}")
+        if below_market:
+            highlights.append("is priced below the local median")
         
         key_highlights = ", ".join(highlights) if highlights else "meets several of your criteria"
         
@@ -450,13 +725,30 @@ class PropertyPersonalizationAgent:
             "type_explanation": type_explanation,
             "location_explanation": location_explanation,
             "features_explanation": features_explanation,
+            "market_explanation": market_explanation,
             "key_highlights": key_highlights,
             "overall_score": overall_score
         }
     
+    def _market_context(self, property: Property) -> Tuple[str, bool]:
+        """Market explanation for a listing and whether it is priced below its local median"""
+        summary = self.market_stats.comparable(property)
+        price_context = self.market_stats.price_context(property)
+        if summary is None or price_context is None:
+            return f"Not enough {property.suburb} listings to compare against", False
+        
+        parts = [price_context[0].upper() + price_context[1:]]
+        rate = price_per_sqm(property)
+        if rate is not None and summary.median_price_per_sqm is not None:
+            parts.append(f"${rate:,.0f}/m² of land vs ${summary.median_price_per_sqm:,.0f}/m² typical")
+        days_listed = (datetime.now() - property.listing_date).days
+        parts.append(f"listed {days_listed} days ago ({summary.label} listings average {summary.average_days_on_market:.0f} days)")
+        return "; ".join(parts), property.price < summary.median_price * (1 - BELOW_MARKET_SHARE)
+    
     async def update_user_preferences(self, user_id: str, preferences: Dict[str, Any]) -> str:
         """Update user preferences based on conversation feedback"""
         
+        self._load_session(user_id)
         if user_id not in self.user_profiles:
             await self._create_user_profile(user_id)
         
@@ -479,11 +771,15 @@ class PropertyPersonalizationAgent:
             user_profile.deal_breakers = preferences["deal_breakers"]
         
         user_profile.last_interaction = datetime.now()
+        self.recommendation_cache.invalidate_user(user_id)
+        self._save_session(user_id)
         
         return f"Preferences updated! I'll use these new criteria for future recommendations."
     
     async def cleanup(self):
         """Clean up resources"""
+        self.session_store.close()
+        self.scoring_pool.close()
         if self.server:
             await self.server.__aexit__(None, None, None)
 
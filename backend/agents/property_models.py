@@ -0,0 +1,327 @@
+"""
+Property Domain Models
+======================
+
+Listing and user-profile records shared by the agents, the scoring indexes and
+the ingestion pipeline. Kept free of the Parlant SDK so data tooling can import
+them without starting an agent.
+
+Property and UserProfile are plain dataclasses. CompactProperty and
+CompactUserProfile expose the same attributes from __slots__ storage, with
+enums held as small ints, location strings interned, listing features held as
+an integer bitmask over a shared FeatureVocabulary and timestamps held as epoch
+seconds, for catalogues of millions of listings and large numbers of live profiles.
+"""
+
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+from dataclasses import dataclass
+from enum import Enum
+from feature_index import FeatureVocabulary
+
+class PropertyType(Enum):
+    HOUSE = "house"
+    APARTMENT = "apartment"
+    TOWNHOUSE = "townhouse"
+    LAND = "land"
+    COMMERCIAL = "commercial"
+
+class UserType(Enum):
+    FIRST_TIME_BUYER = "first_time_buyer"
+    INVESTOR = "investor"
+    UPGRADER = "upgrader"
+    DOWNSIZER = "downsizer"
+    RENTER = "renter"
+
+@dataclass
+class Property:
+    id: str
+    address: str
+    price: int
+    property_type: PropertyType
+    bedrooms: int
+    bathrooms: int
+    car_spaces: int
+    land_size: Optional[float]
+    features: List[str]
+    images: List[str]
+    agent_contact: str
+    listing_date: datetime
+    suburb: str
+    state: str
+    postcode: str
+
+@dataclass
+class UserProfile:
+    user_id: str
+    name: str
+    user_type: UserType
+    budget_min: int
+    budget_max: int
+    preferred_suburbs: List[str]
+    property_types: List[PropertyType]
+    must_have_features: List[str]
+    nice_to_have_features: List[str]
+    deal_breakers: List[str]
+    search_history: List[str]
+    saved_properties: List[str]
+    last_interaction: datetime
+
+
+_PROPERTY_TYPES = list(PropertyType)
+_PROPERTY_TYPE_CODES = {pt: i for i, pt in enumerate(_PROPERTY_TYPES)}
+_USER_TYPES = list(UserType)
+_USER_TYPE_CODES = {ut: i for i, ut in enumerate(_USER_TYPES)}
+
+
+def _encode_features(features: Iterable[str], vocabulary: FeatureVocabulary) -> int:
+    mask = 0
+    for feature in features:
+        mask |= 1 << vocabulary.intern(feature)
+    return mask
+
+
+def _decode_features(mask: int, vocabulary: FeatureVocabulary) -> List[str]:
+    features = []
+    feature_id = 0
+    while mask:
+        if mask & 1:
+            features.append(vocabulary.display_names[feature_id])
+        mask >>= 1
+        feature_id += 1
+    return features
+
+
+def _intern_all(values: Iterable[str]) -> tuple:
+    return tuple(sys.intern(v) for v in values)
+
+
+class CompactProperty:
+    """Slotted Property with the same public attributes.
+
+    ``features`` is decoded from ``feature_mask`` on access, in vocabulary
+    order, using each feature's first-seen spelling.
+    """
+
+    __slots__ = ("id", "address", "price", "_type_code", "bedrooms", "bathrooms", "car_spaces",
+                 "land_size", "feature_mask", "_images", "agent_contact", "_listed_at",
+                 "_suburb", "_state", "_postcode", "vocabulary")
+
+    def __init__(self, id: str, address: str, price: int, property_type: PropertyType, bedrooms: int,
+                 bathrooms: int, car_spaces: int, land_size: Optional[float], features: List[str],
+                 images: List[str], agent_contact: str, listing_date: datetime, suburb: str, state: str,
+                 postcode: str, vocabulary: FeatureVocabulary):
+        self.id = id
+        self.address = address
+        self.price = price
+        self.property_type = property_type
+        self.bedrooms = bedrooms
+        self.bathrooms = bathrooms
+        self.car_spaces = car_spaces
+        self.land_size = land_size
+        self.vocabulary = vocabulary
+        self.features = features
+        self.images = images
+        self.agent_contact = agent_contact
+        self.listing_date = listing_date
+        self.suburb = suburb
+        self.state = state
+        self.postcode = postcode
+
+    @classmethod
+    def from_property(cls, prop: Property, vocabulary: FeatureVocabulary) -> "CompactProperty":
+        return cls(prop.id, prop.address, prop.price, prop.property_type, prop.bedrooms, prop.bathrooms,
+                   prop.car_spaces, prop.land_size, prop.features, prop.images, prop.agent_contact,
+                   prop.listing_date, prop.suburb, prop.state, prop.postcode, vocabulary)
+
+    @property
+    def property_type(self) -> PropertyType:
+        return _PROPERTY_TYPES[self._type_code]
+
+    @property_type.setter
+    def property_type(self, value: PropertyType):
+        self._type_code = _PROPERTY_TYPE_CODES[value]
+
+    @property
+    def features(self) -> List[str]:
+        return _decode_features(self.feature_mask, self.vocabulary)
+
+    @features.setter
+    def features(self, value: Iterable[str]):
+        self.feature_mask = _encode_features(value, self.vocabulary)
+
+    @property
+    def images(self) -> List[str]:
+        return list(self._images)
+
+    @images.setter
+    def images(self, value: Iterable[str]):
+        self._images = tuple(value)
+
+    @property
+    def listing_date(self) -> datetime:
+        return datetime.fromtimestamp(self._listed_at)
+
+    @listing_date.setter
+    def listing_date(self, value: datetime):
+        self._listed_at = int(value.timestamp())
+
+    @property
+    def suburb(self) -> str:
+        return self._suburb
+
+    @suburb.setter
+    def suburb(self, value: str):
+        self._suburb = sys.intern(value)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @state.setter
+    def state(self, value: str):
+        self._state = sys.intern(value)
+
+    @property
+    def postcode(self) -> str:
+        return self._postcode
+
+    @postcode.setter
+    def postcode(self, value: str):
+        self._postcode = sys.intern(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in Property.__dataclass_fields__}
+
+    def __repr__(self) -> str:
+        return f"CompactProperty(id={self.id!r}, address={self.address!r}, price={self.price})"
+
+
+class CompactUserProfile:
+    """Slotted UserProfile with the same public attributes.
+
+    List attributes are stored as tuples and returned as fresh lists, so
+    updates must assign the attribute rather than mutate the returned list.
+    """
+
+    __slots__ = ("user_id", "name", "_user_type_code", "budget_min", "budget_max", "_preferred_suburbs",
+                 "_property_type_mask", "_must_have_features", "_nice_to_have_features", "_deal_breakers",
+                 "_search_history", "_saved_properties", "_last_interaction")
+
+    def __init__(self, user_id: str, name: str, user_type: UserType, budget_min: int, budget_max: int,
+                 preferred_suburbs: List[str], property_types: List[PropertyType], must_have_features: List[str],
+                 nice_to_have_features: List[str], deal_breakers: List[str], search_history: List[str],
+                 saved_properties: List[str], last_interaction: datetime):
+        self.user_id = user_id
+        self.name = name
+        self.user_type = user_type
+        self.budget_min = budget_min
+        self.budget_max = budget_max
+        self.preferred_suburbs = preferred_suburbs
+        self.property_types = property_types
+        self.must_have_features = must_have_features
+        self.nice_to_have_features = nice_to_have_features
+        self.deal_breakers = deal_breakers
+        self.search_history = search_history
+        self.saved_properties = saved_properties
+        self.last_interaction = last_interaction
+
+    @classmethod
+    def from_profile(cls, profile: UserProfile) -> "CompactUserProfile":
+        return cls(**{name: getattr(profile, name) for name in UserProfile.__dataclass_fields__})
+
+    @property
+    def user_type(self) -> UserType:
+        return _USER_TYPES[self._user_type_code]
+
+    @user_type.setter
+    def user_type(self, value: UserType):
+        self._user_type_code = _USER_TYPE_CODES[value]
+
+    @property
+    def property_types(self) -> List[PropertyType]:
+        return [pt for i, pt in enumerate(_PROPERTY_TYPES) if self._property_type_mask >> i & 1]
+
+    @property_types.setter
+    def property_types(self, value: Iterable[PropertyType]):
+        mask = 0
+        for pt in value:
+            mask |= 1 << _PROPERTY_TYPE_CODES[pt]
+        self._property_type_mask = mask
+
+    @property
+    def preferred_suburbs(self) -> List[str]:
+        return list(self._preferred_suburbs)
+
+    @preferred_suburbs.setter
+    def preferred_suburbs(self, value: Iterable[str]):
+        self._preferred_suburbs = _intern_all(value)
+
+    @property
+    def must_have_features(self) -> List[str]:
+        return list(self._must_have_features)
+
+    @must_have_features.setter
+    def must_have_features(self, value: Iterable[str]):
+        self._must_have_features = _intern_all(value)
+
+    @property
+    def nice_to_have_features(self) -> List[str]:
+        return list(self._nice_to_have_features)
+
+    @nice_to_have_features.setter
+    def nice_to_have_features(self, value: Iterable[str]):
+        self._nice_to_have_features = _intern_all(value)
+
+    @property
+    def deal_breakers(self) -> List[str]:
+        return list(self._deal_breakers)
+
+    @deal_breakers.setter
+    def deal_breakers(self, value: Iterable[str]):
+        self._deal_breakers = _intern_all(value)
+
+    @property
+    def search_history(self) -> List[str]:
+        return list(self._search_history)
+
+    @search_history.setter
+    def search_history(self, value: Iterable[str]):
+        self._search_history = tuple(value)
+
+    @property
+    def saved_properties(self) -> List[str]:
+        return list(self._saved_properties)
+
+    @saved_properties.setter
+    def saved_properties(self, value: Iterable[str]):
+        self._saved_properties = tuple(value)
+
+    @property
+    def last_interaction(self) -> datetime:
+        return datetime.fromtimestamp(self._last_interaction)
+
+    @last_interaction.setter
+    def last_interaction(self, value: datetime):
+        self._last_interaction = value.timestamp()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in UserProfile.__dataclass_fields__}
+
+    def to_record(self) -> list:
+        """Raw slot values in slot order: enum codes, bitmask and epoch instead of names and datetimes"""
+        return [list(value) if isinstance(value, tuple) else value
+                for value in (getattr(self, slot) for slot in self.__slots__)]
+
+    @classmethod
+    def from_record(cls, record: list) -> "CompactUserProfile":
+        """Inverse of to_record"""
+        profile = cls.__new__(cls)
+        for slot, value in zip(cls.__slots__, record):
+            object.__setattr__(profile, slot, _intern_all(value) if isinstance(value, list) else value)
+        return profile
+
+    def __repr__(self) -> str:
+        return f"CompactUserProfile(user_id={self.user_id!r}, name={self.name!r})"
+
@@ -0,0 +1,307 @@
+"""
+Columnar Property Store
+=======================
+
+Holds the listing catalogue as NumPy columns (price, type code, suburb code,
+bedrooms and a feature bitmask) so a UserProfile can be scored against every
+listing in one vectorized pass instead of a Python loop over Property objects.
+Listings are also geocoded to their suburb centroid. Every listing in a
+suburb shares that point, so the distance-decayed suburb-preference component
+runs the haversine once per distinct suburb and gathers it by place code.
+
+Rows are never rewritten once appended, so view() hands out read-only stores
+over a row range that stay valid while this one keeps growing.
+
+from_columns() adopts columns built elsewhere (e.g. mapped from a catalogue
+file) without copying them; the first append copies them into growable buffers.
+Such a store records the file in ``source``, so other processes can map the
+same rows rather than be sent a copy of them.
+
+The scoring arithmetic mirrors PropertyPersonalizationAgent._calculate_property_score
+operation for operation, so the vectorized scores are identical to the scalar ones.
+"""
+
+import copy
+from typing import Dict, List, Tuple, Iterable, Any, Optional
+import numpy as np
+from feature_index import FeatureVocabulary
+from geo_index import SuburbCentroids, get_centroids, haversine_km, location_decay
+
+# Component weights, kept in the same order the scalar scorer accumulates them
+BUDGET_WEIGHT = 0.4
+TYPE_WEIGHT = 0.2
+SUBURB_WEIGHT = 0.15
+FEATURE_WEIGHT = 0.25
+UNDER_BUDGET_FACTOR = 0.8
+MUST_HAVE_SHARE = 0.7
+NICE_TO_HAVE_SHARE = 0.3
+
+MAX_SCORE = 0.0 + BUDGET_WEIGHT + TYPE_WEIGHT + SUBURB_WEIGHT + FEATURE_WEIGHT
+
+_WORD_MASK = (1 << 64) - 1
+
+# PropertyType members in declaration order; the index is the stored type code
+_TYPE_VALUES = ["house", "apartment", "townhouse", "land", "commercial"]
+
+
+def _type_value(property_type: Any) -> str:
+    """Accept either a PropertyType member or its string value"""
+    return getattr(property_type, "value", property_type)
+
+
+class PropertyStore:
+    """Column-oriented, vectorized view over a list of Property records"""
+
+    def __init__(self, vocabulary: Optional[FeatureVocabulary] = None, centroids: Optional[SuburbCentroids] = None):
+        self.size = 0
+        self.type_codes: Dict[str, int] = {value: i for i, value in enumerate(_TYPE_VALUES)}
+        self.suburb_codes: Dict[str, int] = {}
+        self.vocabulary = vocabulary if vocabulary is not None else FeatureVocabulary()
+        self.centroids = centroids if centroids is not None else get_centroids()
+        # (suburb, state) -> place code; place_lat/place_lon are NaN where the suburb has no centroid
+        self.place_codes: Dict[Tuple[str, Optional[str]], int] = {}
+        self.place_lat = np.zeros(0, dtype=np.float64)
+        self.place_lon = np.zeros(0, dtype=np.float64)
+        # Backing buffers grow geometrically; the public columns are views of the first `size` rows
+        self._price = np.zeros(0, dtype=np.int64)
+        self._type_code = np.zeros(0, dtype=np.int8)
+        self._suburb_code = np.zeros(0, dtype=np.int32)
+        self._place_code = np.zeros(0, dtype=np.int32)
+        self._bedrooms = np.zeros(0, dtype=np.int16)
+        self._feature_mask = np.zeros((0, 1), dtype=np.uint64)
+        # (path, rows, file identity) of a catalogue file whose rows are this store's first rows, if any
+        self.source: Optional[Tuple[str, int, Tuple[int, ...]]] = None
+        self._sync_views()
+
+    @classmethod
+    def from_properties(cls, properties: Iterable[Any], vocabulary: Optional[FeatureVocabulary] = None) -> "PropertyStore":
+        """Build the columns from Property records, preserving their order.
+
+        Pass the FeatureIndex vocabulary to share feature IDs with the inverted index.
+        """
+        store = cls(vocabulary)
+        store.append(properties)
+        return store
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], type_values: List[str], suburbs: List[str],
+                     places: List[Tuple[str, Optional[str]]], place_lat: np.ndarray, place_lon: np.ndarray,
+                     vocabulary: FeatureVocabulary) -> "PropertyStore":
+        """Store over ready-made columns (price, type_code, suburb_code, place_code, bedrooms,
+        feature_mask) and the code tables they use; the columns may be read-only"""
+        store = cls(vocabulary)
+        store.type_codes = {value: i for i, value in enumerate(type_values)}
+        store.suburb_codes = {suburb: i for i, suburb in enumerate(suburbs)}
+        store.place_codes = {place: i for i, place in enumerate(places)}
+        store.place_lat = place_lat
+        store.place_lon = place_lon
+        for name in ("price", "type_code", "suburb_code", "place_code", "bedrooms", "feature_mask"):
+            column = columns[name]
+            setattr(store, "_" + name, column.astype(getattr(store, "_" + name).dtype, copy=False))
+        store.size = len(store._price)
+        store._sync_views()
+        return store
+
+    def append(self, properties: Iterable[Any]):
+        """Append a batch of Property records as new rows"""
+        properties = list(properties)
+        start = self.size
+        n = len(properties)
+        end = start + n
+
+        row_masks = [self._row_mask(prop) for prop in properties]
+        words = max(1, (len(self.vocabulary) + 63) // 64)
+        self._reserve(end, words)
+
+        self._price[start:end] = np.fromiter((p.price for p in properties), dtype=np.int64, count=n)
+        self._type_code[start:end] = np.fromiter((self._code_for_type(p.property_type) for p in properties), dtype=np.int8, count=n)
+        self._suburb_code[start:end] = np.fromiter((self._code_for_suburb(p.suburb) for p in properties), dtype=np.int32, count=n)
+        self._bedrooms[start:end] = np.fromiter((p.bedrooms for p in properties), dtype=np.int16, count=n)
+        places = len(self.place_codes)
+        self._place_code[start:end] = np.fromiter((self._code_for_place(p.suburb, p.state) for p in properties), dtype=np.int32, count=n)
+        if len(self.place_codes) > places:
+            self._locate_places(places)
+        for row, mask in enumerate(row_masks, start):
+            word = 0
+            while mask:
+                self._feature_mask[row, word] = mask & _WORD_MASK
+                mask >>= 64
+                word += 1
+
+        self.size = end
+        self._sync_views()
+
+    def _row_mask(self, prop: Any) -> int:
+        """Feature bitmask of a listing as a Python int over this store's vocabulary"""
+        if getattr(prop, "vocabulary", None) is self.vocabulary:
+            # CompactProperty already carries a mask over the shared vocabulary
+            return prop.feature_mask
+        mask = 0
+        for feature in prop.features:
+            mask |= 1 << self.vocabulary.intern(feature)
+        return mask
+
+    def _reserve(self, rows: int, words: int):
+        """Grow the backing buffers to hold at least `rows` rows and `words` mask words"""
+        capacity = len(self._price)
+        if rows > capacity:
+            capacity = max(rows, capacity * 2, 1024)
+            for name in ("_price", "_type_code", "_suburb_code", "_place_code", "_bedrooms"):
+                old = getattr(self, name)
+                grown = np.zeros(capacity, dtype=old.dtype)
+                grown[:self.size] = old[:self.size]
+                setattr(self, name, grown)
+        if rows > len(self._feature_mask) or words > self._feature_mask.shape[1]:
+            grown = np.zeros((capacity, max(words, self._feature_mask.shape[1])), dtype=np.uint64)
+            grown[:self.size, :self._feature_mask.shape[1]] = self._feature_mask[:self.size]
+            self._feature_mask = grown
+
+    def _sync_views(self, start: int = 0, stop: Optional[int] = None):
+        stop = self.size if stop is None else stop
+        self.price = self._price[start:stop]
+        self.type_code = self._type_code[start:stop]
+        self.suburb_code = self._suburb_code[start:stop]
+        self.place_code = self._place_code[start:stop]
+        self.bedrooms = self._bedrooms[start:stop]
+        self.feature_mask = self._feature_mask[start:stop]
+
+    def view(self, start: int = 0, stop: Optional[int] = None) -> "PropertyStore":
+        """Read-only store over rows [start, stop) as they are now (stop defaults to size).
+
+        The view shares buffers and code tables with this store; later appends
+        here don't show through. Never append to a view.
+        """
+        stop = self.size if stop is None else stop
+        view = copy.copy(self)
+        view._sync_views(start, stop)
+        view.size = stop - start
+        return view
+
+    def _code_for_type(self, property_type: Any) -> int:
+        value = _type_value(property_type)
+        if value not in self.type_codes:
+            self.type_codes[value] = len(self.type_codes)
+        return self.type_codes[value]
+
+    def _code_for_suburb(self, suburb: str) -> int:
+        return self.suburb_codes.setdefault(suburb, len(self.suburb_codes))
+
+    def _code_for_place(self, suburb: str, state: Optional[str]) -> int:
+        return self.place_codes.setdefault((suburb, state), len(self.place_codes))
+
+    def _locate_places(self, start: int):
+        """Geocode places added from code `start` onwards"""
+        points = [self.centroids.locate(suburb, state) or (np.nan, np.nan)
+                  for suburb, state in list(self.place_codes)[start:]]
+        self.place_lat = np.concatenate([self.place_lat, [lat for lat, _ in points]])
+        self.place_lon = np.concatenate([self.place_lon, [lon for _, lon in points]])
+
+    def _feature_matches(self, features: List[str]) -> np.ndarray:
+        """Per-listing count of profile features present, duplicates counted like the scalar scorer"""
+        counts = np.zeros(self.size, dtype=np.int64)
+        for feature in features:
+            feature_id = self.vocabulary.lookup(feature)
+            # Features interned after a view was taken can't be present in its rows
+            if feature_id is None or feature_id >> 6 >= self.feature_mask.shape[1]:
+                continue
+            word = self.feature_mask[:, feature_id >> 6]
+            counts += ((word >> np.uint64(feature_id & 63)) & np.uint64(1)).astype(np.int64)
+        return counts
+
+    def has_all_features(self, features: List[str]) -> np.ndarray:
+        """Per-listing flag: has every one of the features"""
+        matches = np.ones(self.size, dtype=bool)
+        for feature in features:
+            feature_id = self.vocabulary.lookup(feature)
+            if feature_id is None or feature_id >> 6 >= self.feature_mask.shape[1]:
+                return np.zeros(self.size, dtype=bool)
+            word = self.feature_mask[:, feature_id >> 6]
+            matches &= ((word >> np.uint64(feature_id & 63)) & np.uint64(1)).astype(bool)
+        return matches
+
+    def budget_component(self, user_profile: Any) -> np.ndarray:
+        """Weighted budget-match score per listing"""
+        budget_min = user_profile.budget_min
+        budget_max = user_profile.budget_max
+        price = self.price
+        in_budget = (price >= budget_min) & (price <= budget_max)
+        under_budget = price < budget_min
+        over_budget = BUDGET_WEIGHT * np.maximum(0, 1 - (price - budget_max) / budget_max)
+        return np.where(in_budget, BUDGET_WEIGHT,
+                        np.where(under_budget, BUDGET_WEIGHT * UNDER_BUDGET_FACTOR, over_budget))
+
+    def type_component(self, user_profile: Any) -> np.ndarray:
+        """Weighted property-type match per listing"""
+        wanted_types = [self.type_codes[v] for v in (_type_value(pt) for pt in user_profile.property_types)
+                        if v in self.type_codes]
+        return np.where(np.isin(self.type_code, wanted_types), TYPE_WEIGHT, 0.0)
+
+    def suburb_component(self, user_profile: Any) -> np.ndarray:
+        """Weighted suburb-preference match per listing, decaying with distance from the preferred suburbs"""
+        wanted_suburbs = [self.suburb_codes[s] for s in user_profile.preferred_suburbs if s in self.suburb_codes]
+        place_match = np.zeros(len(self.place_lat), dtype=np.float64)
+        for lat, lon in self.centroids.points(user_profile.preferred_suburbs):
+            place_match = np.maximum(place_match, location_decay(haversine_km(lat, lon, self.place_lat, self.place_lon)))
+        match = place_match[self.place_code]
+        # A name match is full weight even where the suburb has no centroid
+        match[np.isin(self.suburb_code, wanted_suburbs)] = 1.0
+        return SUBURB_WEIGHT * match
+
+    def must_have_component(self, user_profile: Any) -> Optional[np.ndarray]:
+        """Weighted must-have feature share per listing, or None if the profile has none"""
+        if not user_profile.must_have_features:
+            return None
+        must_have_score = self._feature_matches(user_profile.must_have_features) / len(user_profile.must_have_features)
+        return FEATURE_WEIGHT * MUST_HAVE_SHARE * must_have_score
+
+    def nice_to_have_component(self, user_profile: Any) -> Optional[np.ndarray]:
+        """Weighted nice-to-have feature share per listing, or None if the profile has none"""
+        if not user_profile.nice_to_have_features:
+            return None
+        nice_to_have_score = self._feature_matches(user_profile.nice_to_have_features) / len(user_profile.nice_to_have_features)
+        return FEATURE_WEIGHT * NICE_TO_HAVE_SHARE * nice_to_have_score
+
+    @staticmethod
+    def combine(components: List[Optional[np.ndarray]]) -> np.ndarray:
+        """Sum components in scorer order (budget, type, suburb, must-have, nice-to-have) and normalise"""
+        score = components[0]
+        for component in components[1:]:
+            if component is not None:
+                score = score + component
+        return score / MAX_SCORE
+
+    def score(self, user_profile: Any) -> np.ndarray:
+        """Score every listing against the profile in one vectorized pass"""
+        return self.combine([
+            self.budget_component(user_profile),
+            self.type_component(user_profile),
+            self.suburb_component(user_profile),
+            self.must_have_component(user_profile),
+            self.nice_to_have_component(user_profile),
+        ])
+
+    def top_k(self, user_profile: Any, k: int = 5, threshold: float = 0.6) -> List[Tuple[int, float]]:
+        """Return (row, score) for the best k listings scoring above threshold.
+
+        Ties keep catalogue order, matching a stable descending sort.
+        """
+        return select_top_k(self.score(user_profile), k, threshold)
+
+
+def select_top_k(scores: np.ndarray, k: int, threshold: float) -> List[Tuple[int, float]]:
+    """Threshold-filter a score column and pick the top k rows deterministically"""
+    rows = np.flatnonzero(scores > threshold)
+    if k <= 0 or rows.size == 0:
+        return []
+
+    candidate_scores = scores[rows]
+    if rows.size > k:
+        # O(n) partition to find the k-th best score, then resolve ties by row order
+        kth = np.partition(candidate_scores, rows.size - k)[rows.size - k]
+        above = candidate_scores > kth
+        tied = np.flatnonzero(candidate_scores == kth)[:k - int(above.sum())]
+        keep = np.concatenate([np.flatnonzero(above), tied])
+        rows, candidate_scores = rows[keep], candidate_scores[keep]
+
+    order = np.lexsort((rows, -candidate_scores))
+    return [(int(rows[i]), float(candidate_scores[i])) for i in order]
@@ -0,0 +1,350 @@
+"""
+Multi-dimensional Range Index
+=============================
+
+Answers the conjunctive hard-constraint filters used by
+PropertyParlantAgent._filter_properties (price range, bedrooms, property type and
+suburb/state) without scanning the whole catalogue.
+
+Listings are bucketed by (property_type, bedrooms); each bucket keeps its
+prices sorted so a budget cap is a binary search. Suburb and state values map
+to posting sets of listing positions. A query estimates how many listings each
+access path would touch, drives from the most selective one and verifies the
+remaining predicates only on those candidates.
+
+Results come back in catalogue (position) order. When a limited query expects
+many more matches than its limit, buckets are walked in position order
+(heapq.merge over each bucket's sorted positions) and the walk stops at the
+limit; otherwise the matches are collected and the smallest positions picked
+with heapq.nsmallest.
+
+copy() returns a copy-on-write clone for publishing a new catalogue version:
+buckets and posting sets stay shared until one side first modifies them, and
+the position -> record table is shared outright (a record is never rewritten
+while a clone may read it, since positions are not reused across versions).
+
+from_precomputed() wraps buckets, postings and records built elsewhere, such as
+arrays mapped from a catalogue file (see catalogue_file.py); buckets then hold
+price and position arrays and postings are SortedPostings.
+"""
+
+import bisect
+import heapq
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+# (price, property_type, bedrooms, suburb_lower, state_lower)
+_Record = Tuple[float, str, int, str, str]
+
+# Batches up to 1/BULK_MERGE_RATIO of a bucket's size are inserted one by one; larger ones are merged
+BULK_MERGE_RATIO = 32
+
+
+def _as_list(values: Any) -> list:
+    """A list copy of a list or NumPy array, with Python scalars either way"""
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+class _PriceBucket:
+    """Positions of one (type, bedrooms) bucket, kept sorted by price"""
+
+    __slots__ = ("prices", "positions", "_ordered")
+
+    def __init__(self, prices: Optional[List[float]] = None, positions: Optional[List[int]] = None,
+                 ordered: Optional[List[int]] = None):
+        # Lists, or read-only arrays in a precomputed index (copied to lists before any change)
+        self.prices = prices if prices is not None else []
+        self.positions = positions if positions is not None else []
+        # The same positions in ascending order; built on first use, then kept up to date
+        self._ordered = ordered
+
+    def copy(self) -> "_PriceBucket":
+        return _PriceBucket(_as_list(self.prices), _as_list(self.positions),
+                            list(self._ordered) if self._ordered is not None else None)
+
+    def ordered(self) -> List[int]:
+        """The bucket's positions in catalogue order"""
+        if self._ordered is None:
+            self._ordered = sorted(_as_list(self.positions))
+        return self._ordered
+
+    def add(self, price: float, position: int):
+        i = bisect.bisect_right(self.prices, price)
+        self.prices.insert(i, price)
+        self.positions.insert(i, position)
+        if self._ordered is not None:
+            bisect.insort(self._ordered, position)
+
+    def extend(self, entries: List[Tuple[float, int]]):
+        """Insert (price, position) pairs; equal prices keep insertion order, as with per-item adds"""
+        if len(entries) * BULK_MERGE_RATIO <= len(self.prices):
+            for price, position in entries:
+                self.add(price, position)
+            return
+        # One linear merge of the (stably) sorted batch into the bucket
+        batch = sorted(entries, key=lambda entry: entry[0])
+        merged = batch
+        if self.prices:
+            merged = list(heapq.merge(zip(self.prices, self.positions), batch, key=lambda entry: entry[0]))
+        self.prices = [price for price, _ in merged]
+        self.positions = [position for _, position in merged]
+        if self._ordered is not None:
+            added = sorted(position for _, position in batch)
+            if not self._ordered or added[0] > self._ordered[-1]:
+                # New catalogue rows always come after the existing ones
+                self._ordered.extend(added)
+            else:
+                self._ordered = list(heapq.merge(self._ordered, added))
+
+    def remove(self, price: float, position: int):
+        lo = bisect.bisect_left(self.prices, price)
+        hi = bisect.bisect_right(self.prices, price)
+        i = self.positions.index(position, lo, hi)
+        del self.prices[i]
+        del self.positions[i]
+        if self._ordered is not None:
+            del self._ordered[bisect.bisect_left(self._ordered, position)]
+
+    def _span(self, min_price: Optional[float], max_price: Optional[float]) -> Tuple[int, int]:
+        lo = 0 if min_price is None else bisect.bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect.bisect_right(self.prices, max_price)
+        return lo, max(lo, hi)
+
+    def count_between(self, min_price: Optional[float], max_price: Optional[float]) -> int:
+        lo, hi = self._span(min_price, max_price)
+        return hi - lo
+
+    def between(self, min_price: Optional[float], max_price: Optional[float]) -> List[int]:
+        lo, hi = self._span(min_price, max_price)
+        positions = self.positions[lo:hi]
+        return positions if isinstance(positions, list) else positions.tolist()
+
+
+class PropertyRangeIndex:
+    """Price/bedroom/type buckets plus suburb and state posting sets"""
+
+    def __init__(self):
+        self.records: Dict[int, _Record] = {}
+        self.buckets: Dict[Tuple[str, int], _PriceBucket] = {}
+        self.suburbs: Dict[str, Set[int]] = {}
+        self.states: Dict[str, Set[int]] = {}
+        # Containers this index may modify in place, as (table, key); None until the first copy()
+        self._owned: Optional[Set[Tuple[str, Any]]] = None
+
+    @classmethod
+    def from_precomputed(cls, records: Mapping[int, _Record], buckets: Dict[Tuple[str, int], Tuple[Any, Any]],
+                         suburbs: Dict[str, Any], states: Dict[str, Any]) -> "PropertyRangeIndex":
+        """Index over structures built elsewhere; nothing passed in is modified.
+
+        buckets maps (property_type, bedrooms) to price-sorted (prices, positions)
+        sequences; suburbs and states map lowercase values to posting sets.
+        """
+        index = cls()
+        index.records = records
+        index.buckets = {key: _PriceBucket(prices, positions) for key, (prices, positions) in buckets.items()}
+        index.suburbs = suburbs
+        index.states = states
+        # Everything counts as shared, so each container is copied before its first change
+        index._owned = set()
+        return index
+
+    def copy(self) -> "PropertyRangeIndex":
+        """Copy-on-write clone; both indexes copy a shared bucket or posting set before changing it"""
+        clone = PropertyRangeIndex()
+        clone.records = self.records
+        clone.buckets = dict(self.buckets)
+        clone.suburbs = dict(self.suburbs)
+        clone.states = dict(self.states)
+        clone._owned = set()
+        self._owned = set()
+        return clone
+
+    def _writable(self, table: str, key: Any, factory):
+        """The container at table[key], copied first if it may be shared; created if missing"""
+        containers = getattr(self, table)
+        container = containers.get(key)
+        if container is None:
+            container = containers[key] = factory()
+        elif self._owned is not None and (table, key) not in self._owned:
+            container = containers[key] = container.copy()
+        else:
+            return container
+        if self._owned is not None:
+            self._owned.add((table, key))
+        return container
+
+    @classmethod
+    def from_listings(cls, listings: Iterable[Dict[str, Any]]) -> "PropertyRangeIndex":
+        """Index listing dicts by their position in the iterable"""
+        index = cls()
+        for position, listing in enumerate(listings):
+            index.add(position, listing)
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(bucket.positions) for bucket in self.buckets.values())
+
+    def is_indexed(self, position: int) -> bool:
+        """Whether a position is live in this index (records may outlive removals in shared tables)"""
+        record = self.records.get(position)
+        return record is not None and position in self.suburbs.get(record[3], ())
+
+    def add(self, position: int, listing: Dict[str, Any]):
+        """Index one listing dict at the given catalogue position"""
+        self.remove(position)
+        price, property_type, bedrooms, suburb, state = self._record(position, listing)
+        self._writable("buckets", (property_type, bedrooms), _PriceBucket).add(price, position)
+
+    def add_many(self, entries: Iterable[Tuple[int, Dict[str, Any]]]):
+        """Index (position, listing) pairs for new positions, merging each bucket once"""
+        pending: Dict[Tuple[str, int], List[Tuple[float, int]]] = {}
+        for position, listing in entries:
+            self.remove(position)
+            price, property_type, bedrooms, _, _ = self._record(position, listing)
+            pending.setdefault((property_type, bedrooms), []).append((price, position))
+        for key, bucket_entries in pending.items():
+            self._writable("buckets", key, _PriceBucket).extend(bucket_entries)
+
+    def _record(self, position: int, listing: Dict[str, Any]) -> _Record:
+        record = (
+            listing["price"],
+            getattr(listing["property_type"], "value", listing["property_type"]),
+            listing["bedrooms"],
+            listing["suburb"].lower(),
+            listing["state"].lower(),
+        )
+        self.records[position] = record
+        self._writable("suburbs", record[3], set).add(position)
+        self._writable("states", record[4], set).add(position)
+        return record
+
+    @staticmethod
+    def property_fields(property: Any) -> Dict[str, Any]:
+        """The indexed fields of a Property record, in listing-dict form"""
+        return {
+            "price": property.price,
+            "property_type": property.property_type,
+            "bedrooms": property.bedrooms,
+            "suburb": property.suburb,
+            "state": property.state,
+        }
+
+    def remove(self, position: int):
+        """Drop a listing from every access path"""
+        if not self.is_indexed(position):
+            return
+        if self._owned is None:
+            record = self.records.pop(position)
+        else:
+            # Clones may still read the record; it stays until the table is rebuilt
+            record = self.records[position]
+        price, property_type, bedrooms, suburb, state = record
+        key = (property_type, bedrooms)
+        bucket = self._writable("buckets", key, _PriceBucket)
+        bucket.remove(price, position)
+        if not bucket.positions:
+            del self.buckets[key]
+        for table, value in (("suburbs", suburb), ("states", state)):
+            postings = self._writable(table, value, set)
+            postings.discard(position)
+            if not postings:
+                del getattr(self, table)[value]
+
+    def query(
+        self,
+        max_price: Optional[float] = None,
+        min_price: Optional[float] = None,
+        bedrooms: Optional[int] = None,
+        min_bedrooms: Optional[int] = None,
+        property_types: Optional[List[str]] = None,
+        location: Optional[str] = None,
+        candidates: Optional[Set[int]] = None,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """Positions matching every given predicate, in catalogue order.
+
+        ``location`` matches as a case-insensitive substring of suburb or state,
+        the same rule the list-comprehension filter used. ``candidates`` restricts
+        results to positions pre-selected elsewhere (e.g. by a feature index).
+        """
+        buckets = [
+            bucket for (property_type, beds), bucket in self.buckets.items()
+            if (property_types is None or property_type in property_types)
+            and (bedrooms is None or beds == bedrooms)
+            and (min_bedrooms is None or beds >= min_bedrooms)
+        ]
+        bucket_cost = sum(bucket.count_between(min_price, max_price) for bucket in buckets)
+
+        location_postings = None
+        if location is not None:
+            location = location.lower()
+            location_postings = [
+                postings
+                for values in (self.suburbs, self.states)
+                for value, postings in values.items()
+                if location in value
+            ]
+            location_cost = sum(len(postings) for postings in location_postings)
+
+        if candidates is not None and len(candidates) < bucket_cost and (
+                location_postings is None or len(candidates) <= location_cost):
+            # Pre-selected candidates are the smallest set: verify everything on them
+            matches = [
+                position for position in candidates
+                if self.is_indexed(position)
+                and self._matches(self.records[position], min_price, max_price, bedrooms, min_bedrooms, property_types)
+                and (location_postings is None or any(position in p for p in location_postings))
+            ]
+            candidates = None
+        elif location_postings is not None and location_cost < bucket_cost:
+            # Location is the most selective predicate: drive from its postings
+            matches = [
+                position for position in set().union(*location_postings)
+                if self._matches(self.records[position], min_price, max_price, bedrooms, min_bedrooms, property_types)
+            ]
+        else:
+            if limit and bucket_cost:
+                # Share of the buckets' positions expected to pass every predicate
+                bucket_size = sum(len(bucket.positions) for bucket in buckets)
+                hit_rate = bucket_cost / bucket_size
+                total = len(self)
+                if location_postings is not None:
+                    hit_rate *= min(1.0, location_cost / total)
+                if candidates is not None:
+                    hit_rate *= min(1.0, len(candidates) / total)
+                if limit < bucket_cost * hit_rate:
+                    # Walking in catalogue order reaches `limit` hits before touching every match
+                    return self._first_in_order(buckets, min_price, max_price, location_postings, candidates, limit)
+            matches = [position for bucket in buckets for position in bucket.between(min_price, max_price)]
+            if location_postings is not None:
+                matches = [position for position in matches if any(position in p for p in location_postings)]
+        if candidates is not None:
+            matches = [position for position in matches if position in candidates]
+
+        return heapq.nsmallest(limit, matches) if limit is not None else sorted(matches)
+
+    def _first_in_order(self, buckets: List[_PriceBucket], min_price: Optional[float], max_price: Optional[float],
+                        location_postings: Optional[List[Set[int]]], candidates: Optional[Set[int]],
+                        limit: int) -> List[int]:
+        """The first `limit` matching positions, merging the buckets in position order"""
+        matches = []
+        records = self.records
+        for position in heapq.merge(*(bucket.ordered() for bucket in buckets)):
+            price = records[position][0]
+            if ((min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+                    and (location_postings is None or any(position in p for p in location_postings))
+                    and (candidates is None or position in candidates)):
+                matches.append(position)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    @staticmethod
+    def _matches(record: _Record, min_price, max_price, bedrooms, min_bedrooms, property_types) -> bool:
+        price, property_type, beds, _, _ = record
+        return (
+            (min_price is None or price >= min_price)
+            and (max_price is None or price <= max_price)
+            and (bedrooms is None or beds == bedrooms)
+            and (min_bedrooms is None or beds >= min_bedrooms)
+            and (property_types is None or property_type in property_types)
+        )
@@ -0,0 +1,116 @@
+"""
+Recommendation Cache
+====================
+
+LRU + TTL cache for get_personalized_recommendations results. Entries are keyed
+by a stable fingerprint of the profile fields that affect scoring, the search
+criteria, the ranking parameters and the catalogue version, so an unchanged
+profile against an unchanged catalogue never rescores.
+
+Entries are also tracked per user so update_user_preferences can drop a
+user's entries eagerly rather than waiting for them to age out.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Profile fields read by _calculate_property_score; other fields never change a ranking
+SCORING_FIELDS = ["budget_min", "budget_max", "preferred_suburbs", "property_types",
+                  "must_have_features", "nice_to_have_features"]
+
+
+def profile_fingerprint(user_profile: Any, search_criteria: Optional[Dict[str, Any]],
+                        catalogue_version: int, k: int, threshold: float) -> str:
+    """Stable hash of everything a ranking depends on"""
+    payload = {
+        field: getattr(user_profile, field) for field in SCORING_FIELDS
+    }
+    payload["property_types"] = [getattr(pt, "value", pt) for pt in payload["property_types"]]
+    payload["criteria"] = search_criteria or {}
+    payload["catalogue_version"] = catalogue_version
+    payload["k"] = k
+    payload["threshold"] = threshold
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+class RecommendationCache:
+    """Bounded LRU cache with per-entry TTL and hit/miss/eviction counters"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, user_id, value)
+        self._entries: "OrderedDict[str, Tuple[float, str, List[Any]]]" = OrderedDict()
+        self._user_keys: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        """Cached value for key, or None on a miss or expired entry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        if time.monotonic() >= expires_at:
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return list(value)
+
+    def put(self, key: str, user_id: str, value: List[Any]):
+        """Store a result, evicting the least recently used entries beyond max_entries"""
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, user_id, list(value))
+        self._user_keys.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: str):
+        """Drop every entry computed for a user"""
+        for key in list(self._user_keys.get(user_id, ())):
+            self._drop(key)
+            self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the catalogue changes"""
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._user_keys.clear()
+
+    def _drop(self, key: str):
+        _, user_id, _ = self._entries.pop(key)
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
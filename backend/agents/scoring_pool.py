@@ -0,0 +1,348 @@
+"""
+Multi-process Scoring Pool
+==========================
+
+Vectorized scoring of a large catalogue is CPU-bound and, run inline, holds
+the event loop (and every other session's I/O, LLM calls included) for the
+whole pass. ScoringPool moves it to a pool of worker processes and is awaited
+instead, so the loop keeps serving while the workers score, one shard each.
+
+The store's score columns and code tables are exported once per row space
+into a POSIX shared-memory segment; workers attach to it by name, wrap the
+columns in a PropertyStore without copying them and keep the attachment for
+later requests. A request sends only shard bounds, the rows retired in that
+shard and the scored profile fields, and each worker returns its local top-k,
+which merge_top_k combines. Scores are computed exactly as in-process, and
+shards are merged in row order, so results (ties included) match
+IncrementalRanker.top_k.
+
+A store mapped from a catalogue file (catalogue_file.py) is not exported:
+workers map the same file and score its rows from the shared page cache,
+after checking it is still the version the agent mapped.
+
+If a worker dies, the pool is restarted for later requests and the request
+that saw it is scored in-process instead.
+
+Catalogue rows are append-only (see catalogue.py): rows appended since the
+export are scored in-process until they exceed REEXPORT_SHARE of the
+exported rows, and a new row space (a reload or compaction) is exported
+afresh. A superseded segment is unlinked once no request still uses it.
+
+Catalogues smaller than SCORING_POOL_MIN_ROWS are cheaper to score inline
+than to ship to another process, so the agent only uses the pool above it.
+SCORING_WORKERS=0 disables the pool. Workers are spawned rather than forked,
+so a script that scores through the pool needs an ``if __name__ == "__main__"``
+guard.
+"""
+
+import asyncio
+import os
+import pickle
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from catalogue_file import CatalogueFile, file_identity
+from feature_index import FeatureVocabulary
+from incremental_ranker import COMPONENTS
+from instrumentation import metrics
+from property_store import PropertyStore, select_top_k
+from topk import merge_top_k
+
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", str(os.cpu_count() or 1)))
+SCORING_POOL_MIN_ROWS = int(os.getenv("SCORING_POOL_MIN_ROWS", "100000"))
+# Re-export once rows appended since the last export exceed this share of it
+REEXPORT_SHARE = 0.1
+
+# Profile fields the store's score components read
+SCORED_FIELDS = tuple(field for _, fields, _ in COMPONENTS for field in fields)
+
+_COLUMNS = ("price", "type_code", "suburb_code", "place_code", "bedrooms", "feature_mask", "place_lat", "place_lon")
+_HEADER = struct.Struct("<Q")
+_ALIGNMENT = 64
+
+
+def profile_fields(user_profile: Any) -> Dict[str, Any]:
+    """The scored fields of a profile as plain, picklable values"""
+    fields = {}
+    for field in SCORED_FIELDS:
+        value = getattr(user_profile, field)
+        if isinstance(value, list):
+            value = [getattr(v, "value", v) for v in value]
+        fields[field] = value
+    return fields
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class _Segment:
+    """One exported row space: where workers find its columns, and the requests still using it"""
+
+    def __init__(self, name: str, rows: int, row_space: Any, shm: Optional[SharedMemory] = None,
+                 identity: Optional[Tuple[int, ...]] = None):
+        # A shared-memory segment's name, or the path of a mapped catalogue file (then shm is None)
+        self.name = name
+        self.shm = shm
+        self.identity = identity
+        self.rows = rows
+        # The catalogue's row list; a snapshot with another one belongs to a different row space
+        self.row_space = row_space
+        self.in_use = 0
+        self.superseded = False
+
+    @classmethod
+    def export(cls, store: PropertyStore, row_space: Any) -> "_Segment":
+        """The store's catalogue file if it still holds nearly all the rows, else a copy in shared memory"""
+        if store.source is not None:
+            path, rows, identity = store.source
+            try:
+                if store.size - rows <= REEXPORT_SHARE * rows and file_identity(os.stat(path)) == identity:
+                    return cls(path, min(rows, store.size), row_space, identity=identity)
+            except OSError:
+                pass
+
+        columns = {name: np.ascontiguousarray(getattr(store, name)) for name in _COLUMNS}
+        layout = {}
+        offset = 0
+        for name, column in columns.items():
+            layout[name] = (column.dtype.str, column.shape, offset)
+            offset = _aligned(offset + column.nbytes)
+        directory = pickle.dumps({
+            "columns": layout,
+            "type_values": list(store.type_codes),
+            "suburbs": list(store.suburb_codes),
+            "places": list(store.place_codes),
+            "features": list(store.vocabulary.names),
+        })
+        base = _aligned(_HEADER.size + len(directory))
+
+        shm = SharedMemory(create=True, size=max(1, base + offset))
+        _HEADER.pack_into(shm.buf, 0, len(directory))
+        shm.buf[_HEADER.size:_HEADER.size + len(directory)] = directory
+        for name, column in columns.items():
+            dtype, shape, column_offset = layout[name]
+            target = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=base + column_offset)
+            target[...] = column
+            del target
+        return cls(shm.name, store.size, row_space, shm)
+
+    def release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+
+
+# Worker side: the segment this process is attached to, as (name, shared memory or catalogue file, store)
+_attached: Optional[Tuple[str, Any, PropertyStore]] = None
+
+
+def _attach(name: str, identity: Optional[Tuple[int, ...]]) -> PropertyStore:
+    """Store over a segment's columns, attaching (and dropping any older segment) on first use.
+
+    identity is given for a catalogue file and None for a shared-memory segment.
+    """
+    global _attached
+    if _attached is not None and _attached[0] == name:
+        return _attached[2]
+    if _attached is not None:
+        previous = _attached[1]
+        _attached = None
+        if isinstance(previous, SharedMemory):
+            try:
+                previous.close()
+            except BufferError:
+                # A view of the old columns is still alive; the mapping goes when it does
+                pass
+
+    if identity is not None:
+        catalogue_file = CatalogueFile(name)
+        if catalogue_file.identity != tuple(identity):
+            raise ValueError(f"{name} was replaced after the agent mapped it")
+        _attached = (name, catalogue_file, catalogue_file.property_store())
+        return _attached[2]
+
+    shm = SharedMemory(name=name)
+    (length,) = _HEADER.unpack_from(shm.buf, 0)
+    directory = pickle.loads(shm.buf[_HEADER.size:_HEADER.size + length])
+    base = _aligned(_HEADER.size + length)
+    columns = {column: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=base + offset)
+               for column, (dtype, shape, offset) in directory["columns"].items()}
+    vocabulary = FeatureVocabulary()
+    vocabulary.names = directory["features"]
+    vocabulary.display_names = directory["features"]
+    vocabulary.ids = {feature: i for i, feature in enumerate(directory["features"])}
+    store = PropertyStore.from_columns(columns, directory["type_values"], directory["suburbs"],
+                                       directory["places"], columns["place_lat"], columns["place_lon"], vocabulary)
+    _attached = (name, shm, store)
+    return store
+
+
+def _score_shard(name: str, identity: Optional[Tuple[int, ...]], start: int, stop: int, retired: np.ndarray,
+                 profile: Dict[str, Any], k: int, threshold: float) -> List[Tuple[int, float]]:
+    """Local top-k (row, score) of rows [start, stop), skipping the retired rows"""
+    scores = _attach(name, identity).view(start, stop).score(SimpleNamespace(**profile))
+    scores[retired - start] = -np.inf
+    return [(start + row, score) for row, score in select_top_k(scores, k, threshold)]
+
+
+def _score_here(snapshot: Any, user_profile: Any, start: int, k: int, threshold: float) -> List[Tuple[int, float]]:
+    """Local top-k (row, score) of a snapshot's rows from start on, scored in this process"""
+    scores = snapshot.store.view(start).score(user_profile)
+    scores = np.where(snapshot.live[start:], scores, -np.inf)
+    return [(start + row, score) for row, score in select_top_k(scores, k, threshold)]
+
+
+class ScoringPool:
+    """Shards catalogue scoring across worker processes attached to shared memory or a catalogue file"""
+
+    def __init__(self, workers: int = SCORING_WORKERS, min_rows: int = SCORING_POOL_MIN_ROWS):
+        self.workers = workers
+        self.min_rows = min_rows
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._segment: Optional[_Segment] = None
+        self._lock = threading.Lock()
+        self._export_lock = asyncio.Lock()
+        self.exports = 0
+        self.requests = 0
+        self.restarts = 0
+
+    def handles(self, snapshot: Any) -> bool:
+        """Whether a catalogue snapshot is big enough to be worth scoring in the pool"""
+        return self.workers > 0 and snapshot.size >= self.min_rows
+
+    def start(self):
+        """Start the worker processes now rather than on the first request"""
+        if self._executor is None and self.workers > 0:
+            # Spawned, not forked: the parent runs an event loop and other threads
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+
+    async def _acquire(self, snapshot: Any) -> _Segment:
+        """The segment to score a snapshot against, exporting one if it is missing or stale"""
+        while True:
+            with self._lock:
+                segment = self._segment
+                if (segment is not None and segment.row_space is snapshot.rows
+                        and snapshot.size - segment.rows <= REEXPORT_SHARE * segment.rows):
+                    segment.in_use += 1
+                    return segment
+            async with self._export_lock:
+                segment = self._segment
+                if (segment is None or segment.row_space is not snapshot.rows
+                        or snapshot.size - segment.rows > REEXPORT_SHARE * segment.rows):
+                    with metrics.span("scoring_export"):
+                        # Copying a million rows takes a while; keep it off the event loop too
+                        exported = await asyncio.get_running_loop().run_in_executor(
+                            None, _Segment.export, snapshot.store, snapshot.rows)
+                    self.exports += 1
+                    with self._lock:
+                        previous, self._segment = self._segment, exported
+                        if previous is not None:
+                            previous.superseded = True
+                            if not previous.in_use:
+                                previous.release()
+
+    def _release(self, segment: _Segment):
+        with self._lock:
+            segment.in_use -= 1
+            if segment.superseded and not segment.in_use:
+                segment.release()
+
+    async def _score_shards(self, executor: ProcessPoolExecutor, segment: _Segment, snapshot: Any,
+                            user_profile: Any, exported: int, k: int, threshold: float) -> List[List[Tuple[int, float]]]:
+        """Each worker's local top-k over the exported rows; raises BrokenProcessPool if a worker died"""
+        loop = asyncio.get_running_loop()
+        profile = profile_fields(user_profile)
+        bounds = np.linspace(0, exported, self.workers + 1).astype(np.int64).tolist()
+        partials = []
+        failures = []
+        for start, stop in zip(bounds, bounds[1:]):
+            if start == stop:
+                continue
+            retired = np.flatnonzero(~snapshot.live[start:stop]) + start
+            try:
+                partials.append(loop.run_in_executor(executor, _score_shard, segment.name, segment.identity,
+                                                     start, stop, retired, profile, k, threshold))
+            except BrokenProcessPool as e:
+                # The pool broke before this request: nothing more can be submitted to it
+                failures.append(e)
+                break
+        # Wait for every shard, so none is left running against a segment about to be released
+        results = await asyncio.gather(*partials, return_exceptions=True)
+        failures += [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            raise next((failure for failure in failures if isinstance(failure, BrokenProcessPool)), failures[0])
+        return results
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace a pool whose worker died; concurrent requests that saw the same pool restart it once"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.restarts += 1
+        metrics.count("scoring_pool_restarts")
+        print("⚠️ A scoring worker died; restarting the scoring pool", file=sys.stderr)
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    async def top_k(self, snapshot: Any, user_profile: Any, k: int = 5,
+                    threshold: float = 0.6) -> List[Tuple[int, float]]:
+        """(row, score) of the best k live listings of a catalogue snapshot above threshold"""
+        self.start()
+        self.requests += 1
+        executor = self._executor
+        segment = await self._acquire(snapshot)
+        exported = min(segment.rows, snapshot.size)
+        loop = asyncio.get_running_loop()
+        tail = None
+        if exported < snapshot.size:
+            # Rows appended since the export: few enough to score in a thread while the workers take the rest
+            tail = loop.run_in_executor(None, _score_here, snapshot, user_profile, exported, k, threshold)
+        try:
+            partials = await self._score_shards(executor, segment, snapshot, user_profile, exported, k, threshold)
+        except BrokenProcessPool:
+            self._restart(executor)
+            # This request can't wait for new workers to spawn: score all its rows in a thread instead
+            partials = [await loop.run_in_executor(None, _score_here, snapshot, user_profile, 0, k, threshold)]
+            if tail is not None:
+                # Already covered by the full scoring above
+                await tail
+                tail = None
+        finally:
+            self._release(segment)
+
+        if tail is not None:
+            partials.append(await tail)
+        return merge_top_k(partials, k)
+
+    def close(self):
+        """Stop the workers and free the exported segment"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        with self._lock:
+            if self._segment is not None:
+                self._segment.superseded = True
+                if not self._segment.in_use:
+                    self._segment.release()
+                self._segment = None
+
+    def stats(self) -> Dict[str, Any]:
+        segment = self._segment
+        return {
+            "workers": self.workers,
+            "requests": self.requests,
+            "exports": self.exports,
+            "restarts": self.restarts,
+            "exported_rows": segment.rows if segment is not None else 0,
+            "mapped_file": segment is not None and segment.shm is None,
+        }
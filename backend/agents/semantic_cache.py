@@ -0,0 +1,259 @@
+"""
+Semantic Response Cache
+=======================
+
+Reuses LLM replies for near-duplicate questions ("3 bed house under 1M in
+Melbourne" vs "3 bedroom house in melbourne under $1m?").
+
+A lookup matches in two stages:
+
+1. Exact partition: the normalised criteria extracted from the message, the
+   shortlist the LLM would be shown and the catalogue version must all be
+   identical. Questions that would be answered from different listings never
+   share a reply, however similar their wording.
+2. Approximate text match within the partition: messages are canonicalised
+   (stopwords dropped, plurals and common synonyms folded: "bedrooms" ->
+   "bed", "units" -> "apartment") and embedded as weighted hashed words,
+   adjacent word pairs and character trigrams (CPU only, no model download).
+   Random-hyperplane LSH tables propose candidates whose exact cosine
+   similarity must reach the threshold. Paraphrases score ~0.95; the same
+   question with an extra condition ("... close to schools?") stays below ~0.9.
+3. Verification: word order can flip the meaning of an otherwise identical
+   question ("is the first one cheaper than the second?" vs "... the second
+   one cheaper than the first?" still scores ~0.94). A candidate is only
+   reused when the numbers, ordinals and negations of both messages appear in
+   the same order, and, for comparisons ("than", "vs"), when the words they
+   share do too.
+
+Entries are bounded (LRU) and expire after a TTL. The whole cache is dropped
+when the catalogue version changes.
+
+Callers put everything else the reply depends on into the partition: the
+agent includes the user's profile and conversation history, so a reply
+personalised for one user is never served to another.
+"""
+
+import hashlib
+import json
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Embedding width; collisions only blur similarity slightly at this size
+EMBEDDING_DIMS = 512
+
+# LSH tables and hyperplanes per table: more tables raise recall, more bits cut candidates
+LSH_TABLES = 6
+LSH_BITS = 10
+
+# Words carry the meaning; trigrams only absorb typos and inflections
+WORD_WEIGHT = 3.0
+# Adjacent word pairs make the embedding sensitive to word order
+BIGRAM_WEIGHT = 1.0
+
+_NON_WORD = re.compile(r"[^a-z0-9.]+")
+
+STOPWORDS = frozenset(
+    "a an the i im me my we our you your is are am be to of in on at for with and or please can could "
+    "would like want need looking look find show any some hi hello hey there just also get give".split()
+)
+
+# Words whose order decides the meaning of a question
+ORDINALS = frozenset("first second third fourth fifth last former latter other".split())
+NEGATIONS = frozenset("no not without never except".split())
+COMPARISONS = frozenset("than vs versus compared".split())
+
+SYNONYMS = {
+    "bedroom": "bed", "beds": "bed", "br": "bed", "bdr": "bed", "bedder": "bed",
+    "unit": "apartment", "flat": "apartment", "home": "house",
+    "below": "under", "less": "under", "million": "m", "mil": "m",
+}
+
+
+def canonical_words(text: str) -> List[str]:
+    words = []
+    for word in _NON_WORD.sub(" ", text.lower().replace("$", "").replace("n't", " not")).split():
+        if word in STOPWORDS:
+            continue
+        word = SYNONYMS.get(word, word)
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = SYNONYMS.get(word[:-1], word[:-1])
+        words.append(word)
+    return words
+
+
+def _salient(words: List[str]) -> List[str]:
+    return [word for word in words if word in ORDINALS or word in NEGATIONS or any(c.isdigit() for c in word)]
+
+
+def same_meaning_order(words: List[str], other: List[str]) -> bool:
+    """Whether two similar canonical word lists agree on the order of the words that decide their meaning"""
+    if _salient(words) != _salient(other):
+        return False
+    if COMPARISONS.intersection(words) or COMPARISONS.intersection(other):
+        # Shared words in order of first appearance, so a repeated word ("one") doesn't count as a reordering
+        shared = set(words) & set(other)
+        return ([word for word in dict.fromkeys(words) if word in shared]
+                == [word for word in dict.fromkeys(other) if word in shared])
+    return True
+
+
+class HashedNgramEmbedder:
+    """Unit vectors from signed hashed canonical words and character trigrams"""
+
+    def __init__(self, dims: int = EMBEDDING_DIMS, ngram: int = 3, word_weight: float = WORD_WEIGHT,
+                 bigram_weight: float = BIGRAM_WEIGHT):
+        self.dims = dims
+        self.ngram = ngram
+        self.word_weight = word_weight
+        self.bigram_weight = bigram_weight
+
+    def features(self, text: str) -> Iterable[Tuple[str, float]]:
+        return self.word_features(canonical_words(text))
+
+    def word_features(self, words: List[str]) -> Iterable[Tuple[str, float]]:
+        for word in words:
+            yield "w:" + word, self.word_weight
+        for first, second in zip(words, words[1:]):
+            yield f"b:{first} {second}", self.bigram_weight
+        padded = f" {' '.join(words)} "
+        for i in range(len(padded) - self.ngram + 1):
+            yield padded[i:i + self.ngram], 1.0
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_words(canonical_words(text))
+
+    def embed_words(self, words: List[str]) -> np.ndarray:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for feature, weight in self.word_features(words):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dims] += weight if h & 0x80000000 else -weight
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector
+
+
+def partition_key(criteria: Dict[str, Any], shortlist_ids: List[str], personal: Any = None) -> str:
+    """Exact-match part of the key: extracted criteria, the listings the LLM sees and any per-user
+    context it is given (JSON-serialisable, e.g. the user's profile and history)"""
+    encoded = json.dumps([criteria, shortlist_ids, personal], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+class SemanticResponseCache:
+    """LRU + TTL cache of replies, matched by partition and LSH text similarity"""
+
+    def __init__(self, threshold: float = 0.93, max_entries: int = 5000, ttl_seconds: float = 3600.0,
+                 embedder: Optional[HashedNgramEmbedder] = None, tables: int = LSH_TABLES,
+                 bits: int = LSH_BITS, seed: int = 7):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder if embedder is not None else HashedNgramEmbedder()
+        rng = np.random.default_rng(seed)
+        # (tables, bits, dims) hyperplanes; one matrix product hashes a vector into every table
+        self._planes = rng.standard_normal((tables, bits, self.embedder.dims)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(bits)).astype(np.int64)
+        self.catalogue_version: Optional[int] = None
+        # entry id -> (expires_at, partition, vector, response, bucket keys, canonical words)
+        self._entries: "OrderedDict[int, Tuple[float, str, np.ndarray, str, List[Tuple[str, int, int]], List[str]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, int], Set[int]] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        # Candidates above the threshold rejected by the word-order check
+        self.rejections = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _bucket_keys(self, partition: str, vector: np.ndarray) -> List[Tuple[str, int, int]]:
+        codes = ((self._planes @ vector) > 0).astype(np.int64) @ self._bit_weights
+        return [(partition, table, int(code)) for table, code in enumerate(codes)]
+
+    def _check_version(self, catalogue_version: int):
+        if catalogue_version != self.catalogue_version:
+            self.clear()
+            self.catalogue_version = catalogue_version
+
+    def get(self, partition: str, text: str, catalogue_version: int) -> Optional[str]:
+        """Cached reply for a sufficiently similar message in the same partition, or None"""
+        self._check_version(catalogue_version)
+        words = canonical_words(text)
+        vector = self.embedder.embed_words(words)
+        candidates: Set[int] = set()
+        for key in self._bucket_keys(partition, vector):
+            candidates.update(self._buckets.get(key, ()))
+        now = time.monotonic()
+        best_id, best_score = None, self.threshold
+        for entry_id in candidates:
+            expires_at, _, entry_vector, _, _, entry_words = self._entries[entry_id]
+            if now >= expires_at:
+                self._drop(entry_id)
+                self.expirations += 1
+                continue
+            score = float(entry_vector @ vector)
+            if score >= best_score:
+                if not same_meaning_order(words, entry_words):
+                    self.rejections += 1
+                    continue
+                best_id, best_score = entry_id, score
+        if best_id is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best_id)
+        self.hits += 1
+        return self._entries[best_id][3]
+
+    def put(self, partition: str, text: str, response: str, catalogue_version: int):
+        """Store a reply, evicting the least recently used entries beyond max_entries"""
+        self._check_version(catalogue_version)
+        words = canonical_words(text)
+        vector = self.embedder.embed_words(words)
+        keys = self._bucket_keys(partition, vector)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (time.monotonic() + self.ttl_seconds, partition, vector, response, keys, words)
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the catalogue changes"""
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._buckets.clear()
+
+    def _drop(self, entry_id: int):
+        keys = self._entries.pop(entry_id)[4]
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "rejections": self.rejections,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Session Store
+=============
+
+Persists PropertyPersonalizationAgent sessions (the user profile plus the
+conversation context) outside the process, so a user's state survives
+per-request processes and can be shared by several workers behind a load
+balancer.
+
+A session is serialised as one compact JSON record: the profile's raw slot
+values (enum codes, property-type bitmask, epoch timestamp) and the context's
+search criteria, recommended property IDs and bounded history (recent turns
+plus the rolling summary). Listings are stored by
+ID and resolved against the catalogue on load.
+
+Backends, selected by URL (SESSION_STORE, default memory://):
+    memory://                      in-process LRU, bounded and idle-evicted
+    sqlite:///path/sessions.db     SQLite in WAL mode with batched writes
+    redis://host:6379/0            any Redis-protocol server, expiry via EX
+
+``python3 session_store.py --standin --port 6390`` runs a small local
+Redis-protocol stand-in so the Redis backend can be exercised without Redis.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import argparse
+import socketserver
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from property_models import CompactUserProfile
+from conversation_history import ConversationHistory
+
+# Bumped whenever the record layout changes; older records are treated as missing
+SESSION_FORMAT = 2
+
+# Sessions untouched for this long are evicted (seconds)
+DEFAULT_IDLE_TTL = 24 * 60 * 60
+
+
+def encode_session(profile: CompactUserProfile, context: Optional[Dict[str, Any]]) -> bytes:
+    """Compact serialised form of one user's profile and conversation context"""
+    record: List[Any] = [SESSION_FORMAT, profile.to_record()]
+    if context is not None:
+        record.append([
+            context.get("current_search_criteria", {}),
+            [prop.id for prop in context.get("recommended_properties", [])],
+            context["conversation_history"].to_record() if "conversation_history" in context else None,
+        ])
+    return json.dumps(record, separators=(",", ":"), default=str).encode()
+
+
+def decode_session(data: bytes) -> Optional[Tuple[CompactUserProfile, Optional[Dict[str, Any]]]]:
+    """Profile and raw context (recommended properties as IDs) or None for unreadable records"""
+    try:
+        record = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(record, list) or not record or record[0] != SESSION_FORMAT:
+        return None
+    profile = CompactUserProfile.from_record(record[1])
+    context = None
+    if len(record) > 2:
+        criteria, recommended_ids, history = record[2]
+        context = {
+            "current_search_criteria": criteria,
+            "recommended_property_ids": recommended_ids,
+            "conversation_history": ConversationHistory.from_record(history),
+        }
+    return profile, context
+
+
+class SessionStore(ABC):
+    """Key-value store of serialised sessions keyed by user ID"""
+
+    idle_ttl: float = DEFAULT_IDLE_TTL
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[bytes]:
+        """Serialised session, refreshing its idle timer, or None"""
+
+    @abstractmethod
+    def put(self, user_id: str, data: bytes):
+        """Store or replace a serialised session"""
+
+    @abstractmethod
+    def delete(self, user_id: str):
+        """Forget a session"""
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle for longer than idle_ttl; returns how many were dropped"""
+        return 0
+
+    def flush(self):
+        """Make buffered writes durable"""
+
+    def close(self):
+        self.flush()
+
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU of serialised sessions with idle expiry"""
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = DEFAULT_IDLE_TTL):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        # user_id -> (last_access, data); most recently used last
+        self._sessions: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, user_id: str) -> Optional[bytes]:
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now - entry[0] > self.idle_ttl:
+            del self._sessions[user_id]
+            self.evictions += 1
+            return None
+        self._sessions[user_id] = (now, entry[1])
+        self._sessions.move_to_end(user_id)
+        return entry[1]
+
+    def put(self, user_id: str, data: bytes):
+        self._sessions[user_id] = (time.monotonic(), data)
+        self._sessions.move_to_end(user_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, user_id: str):
+        self._sessions.pop(user_id, None)
+
+    def evict_idle(self) -> int:
+        cutoff = time.monotonic() - self.idle_ttl
+        dropped = 0
+        # Oldest entries come first, so stop at the first one still in use
+        while self._sessions:
+            user_id, (last_access, _) = next(iter(self._sessions.items()))
+            if last_access > cutoff:
+                break
+            del self._sessions[user_id]
+            dropped += 1
+        self.evictions += dropped
+        return dropped
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed sessions in WAL mode, writing in batched transactions.
+
+    Writes are buffered and committed together once ``batch_size`` sessions
+    are pending, or by a background flusher every ``flush_interval`` seconds,
+    trading a bounded window of unflushed updates for far fewer fsyncs. Reads
+    through this store see buffered writes immediately; other processes see
+    them within ``flush_interval``.
+    """
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 1.0,
+                 idle_ttl: float = DEFAULT_IDLE_TTL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.idle_ttl = idle_ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " user_id TEXT PRIMARY KEY, data BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions(last_access)")
+        self._pending: Dict[str, Optional[Tuple[bytes, float]]] = {}
+        # Reads of flushed sessions only bump last_access, applied with the next batch
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="session-flush", daemon=True)
+            self._flusher.start()
+
+    def get(self, user_id: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            if user_id in self._pending:
+                entry = self._pending[user_id]
+                if entry is None:
+                    return None
+                self._pending[user_id] = (entry[0], now)
+                return entry[0]
+            row = self._conn.execute(
+                "SELECT data, last_access FROM sessions WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None or now - row[1] > self.idle_ttl:
+                return None
+            self._touched[user_id] = now
+        return bytes(row[0])
+
+    def put(self, user_id: str, data: bytes):
+        with self._lock:
+            self._pending[user_id] = (data, time.time())
+        self._maybe_flush()
+
+    def delete(self, user_id: str):
+        with self._lock:
+            self._pending[user_id] = None
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._pending) >= self.batch_size or self._flusher is None:
+            self.flush()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"⚠️  Session flush failed: {e}", file=sys.stderr)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched, {}
+            if not pending and not touched:
+                return
+            upserts = [(user_id, entry[0], entry[1]) for user_id, entry in pending.items() if entry is not None]
+            deletes = [(user_id,) for user_id, entry in pending.items() if entry is None]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO sessions (user_id, data, last_access) VALUES (?, ?, ?)"
+                    " ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, last_access = excluded.last_access",
+                    upserts
+                )
+                self._conn.executemany("DELETE FROM sessions WHERE user_id = ?", deletes)
+                self._conn.executemany(
+                    "UPDATE sessions SET last_access = ? WHERE user_id = ? AND last_access < ?",
+                    [(last_access, user_id, last_access) for user_id, last_access in touched.items()
+                     if user_id not in pending]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # Keep the batch buffered so the next flush retries it
+                self._pending, self._touched = pending, touched
+                raise
+
+    def evict_idle(self) -> int:
+        self.flush()
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE last_access < ?", (time.time() - self.idle_ttl,))
+            return cursor.rowcount
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self._conn.close()
+
+
+class RespClient:
+    """Minimal blocking Redis-protocol (RESP2) client: pipelined commands, bulk string replies"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        if self.db:
+            self._send([("SELECT", self.db)])
+
+    @staticmethod
+    def _encode(command: Iterable[Any]) -> bytes:
+        parts = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in command]
+        out = [b"*%d\r\n" % len(parts)]
+        for part in parts:
+            out.append(b"$%d\r\n%s\r\n" % (len(part), part))
+        return b"".join(out)
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(f"Redis error: {body.decode()}")
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+
+    def _send(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        self._sock.sendall(b"".join(self._encode(command) for command in commands))
+        return [self._read_reply() for _ in commands]
+
+    def pipeline(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        """Send several commands in one write and return their replies in order"""
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                return self._send(commands)
+            except (ConnectionError, OSError):
+                # One reconnect attempt; the commands used here are idempotent
+                self.close()
+                self._connect()
+                return self._send(commands)
+
+    def execute(self, *command: Any) -> Any:
+        return self.pipeline([command])[0]
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._reader = None
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions in a Redis-protocol server; idle eviction is the server's key expiry"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0,
+                 prefix: str = "session:", idle_ttl: float = DEFAULT_IDLE_TTL):
+        self.client = RespClient(host, port, db)
+        self.prefix = prefix
+        self.idle_ttl = idle_ttl
+
+    def _key(self, user_id: str) -> str:
+        return self.prefix + user_id
+
+    def get(self, user_id: str) -> Optional[bytes]:
+        # Read and refresh the expiry in one round trip
+        data, _ = self.client.pipeline([
+            ("GET", self._key(user_id)),
+            ("EXPIRE", self._key(user_id), int(self.idle_ttl)),
+        ])
+        return data
+
+    def put(self, user_id: str, data: bytes):
+        self.client.execute("SET", self._key(user_id), data, "EX", int(self.idle_ttl))
+
+    def delete(self, user_id: str):
+        self.client.execute("DEL", self._key(user_id))
+
+    def close(self):
+        self.client.close()
+
+
+def open_session_store(url: Optional[str] = None) -> SessionStore:
+    """Session store for a memory://, sqlite:/// or redis:// URL"""
+    url = url or os.getenv("SESSION_STORE") or "memory://"
+    parsed = urlparse(url)
+    idle_ttl = float(os.getenv("SESSION_IDLE_TTL", DEFAULT_IDLE_TTL))
+    if parsed.scheme == "memory":
+        return MemorySessionStore(idle_ttl=idle_ttl)
+    if parsed.scheme == "sqlite":
+        return SQLiteSessionStore(parsed.path or "sessions.db", idle_ttl=idle_ttl)
+    if parsed.scheme == "redis":
+        db = int(parsed.path.lstrip("/") or 0)
+        return RedisSessionStore(parsed.hostname or "127.0.0.1", parsed.port or 6379, db, idle_ttl=idle_ttl)
+    raise ValueError(f"Unsupported session store URL: {url}")
+
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    """Answers the subset of Redis commands the session store uses"""
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if not line.startswith(b"*"):
+                continue
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self._execute(data, args))
+
+    def _execute(self, data: Dict[bytes, Tuple[bytes, Optional[float]]], args: List[bytes]) -> bytes:
+        command = args[0].upper()
+        now = time.monotonic()
+        with self.server.lock:
+            if command == b"PING":
+                return b"+PONG\r\n"
+            if command == b"SELECT":
+                return b"+OK\r\n"
+            if command == b"SET":
+                expires = now + int(args[4]) if len(args) >= 5 and args[3].upper() == b"EX" else None
+                data[args[1]] = (args[2], expires)
+                return b"+OK\r\n"
+            entry = data.get(args[1]) if len(args) > 1 else None
+            if entry is not None and entry[1] is not None and entry[1] <= now:
+                del data[args[1]]
+                entry = None
+            if command == b"GET":
+                return b"$-1\r\n" if entry is None else b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+            if command == b"EXPIRE":
+                if entry is None:
+                    return b":0\r\n"
+                data[args[1]] = (entry[0], now + int(args[2]))
+                return b":1\r\n"
+            if command == b"DEL":
+                return b":%d\r\n" % (data.pop(args[1], None) is not None)
+        return b"-ERR unknown command '%s'\r\n" % command
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """Local in-memory Redis-protocol server for development and tests"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6390):
+        super().__init__((host, port), _StandInHandler)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Session store utilities')
+    parser.add_argument('--standin', action='store_true', help='Run a local Redis-protocol stand-in server')
+    parser.add_argument('--host', default='127.0.0.1', help='Stand-in bind address')
+    parser.add_argument('--port', type=int, default=6390, help='Stand-in port')
+
+    args = parser.parse_args()
+    if args.standin:
+        server = RedisStandIn(args.host, args.port)
+        print(f"✅ Redis stand-in listening on {args.host}:{args.port}")
+        server.serve_forever()
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
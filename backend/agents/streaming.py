@@ -0,0 +1,42 @@
+"""
+Streaming Chat Events
+=====================
+
+Event shapes shared by the streaming chat paths (PropertyParlantAgent.chat_stream,
+PropertyPersonalizationAgent.start_conversation_stream and the chat worker's
+chat_stream op):
+
+    {"event": "recommendations", "recommendations": [...], "criteria": {...}}
+    {"event": "token", "text": "..."}
+    {"event": "done", "result": {...}}
+    {"event": "error", "error": "..."}
+
+Recommendations are emitted as soon as filtering finishes, before any response
+text, so clients can render listings while the answer is still arriving.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterator
+
+# Roughly a few LLM tokens per chunk: small enough to feel live, large enough to keep framing cheap
+CHUNK_CHARS = 24
+
+
+def text_chunks(text: str, max_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """Split text into chunks that end on whitespace where possible; joining them restores the text"""
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            space = text.rfind(" ", start + 1, end)
+            if space != -1:
+                end = space + 1
+        yield text[start:end]
+        start = end
+
+
+async def stream_text(text: str, max_chars: int = CHUNK_CHARS) -> AsyncIterator[Dict[str, Any]]:
+    """Token events for an already-complete response, yielding to the loop between chunks"""
+    for chunk in text_chunks(text, max_chars):
+        yield {"event": "token", "text": chunk}
+        await asyncio.sleep(0)
@@ -0,0 +1,95 @@
+"""
+Streaming Top-K Selection
+=========================
+
+A bounded min-heap that keeps the best k scored items seen so far, in
+O(n log k) time and O(k) memory. Ties are broken by arrival order (earlier
+wins), which matches a stable descending sort of the full list.
+
+Callers that can cheaply bound an item's score from above can ask
+``would_accept`` first and skip the expensive part of scoring for items that
+could not enter the heap anyway.
+"""
+
+import heapq
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+class TopK:
+    """Bounded heap of the k highest-scoring items strictly above a threshold"""
+
+    def __init__(self, k: int = 5, threshold: float = float("-inf")):
+        self.k = k
+        self.threshold = threshold
+        # (score, -sequence, item): the root is the entry evicted first, i.e. the
+        # lowest score and, among equal scores, the one that arrived last
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._sequence = 0
+        self.pruned = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def floor(self) -> float:
+        """Score an item must beat to be kept right now"""
+        if len(self._heap) < self.k:
+            return self.threshold
+        return max(self.threshold, self._heap[0][0])
+
+    def would_accept(self, upper_bound: float) -> bool:
+        """Whether an item whose score is at most ``upper_bound`` could still be kept"""
+        return self.k > 0 and upper_bound > self.floor()
+
+    def skip(self):
+        """Record an item that was discarded by upper-bound pruning"""
+        self._sequence += 1
+        self.pruned += 1
+
+    def push(self, score: float, item: Any) -> bool:
+        """Offer a scored item; returns True if it was kept"""
+        sequence = self._sequence
+        self._sequence += 1
+        if self.k <= 0 or not score > self.floor():
+            return False
+        entry = (score, -sequence, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heapreplace(self._heap, entry)
+        return True
+
+    def results(self) -> List[Tuple[Any, float]]:
+        """Kept items as (item, score), best first, ties in arrival order"""
+        ordered = sorted(self._heap, key=lambda entry: (-entry[0], -entry[1]))
+        return [(item, score) for score, _, item in ordered]
+
+
+def stream_top_k(
+    items: Iterable[Any],
+    score: Callable[[Any], float],
+    k: int = 5,
+    threshold: float = float("-inf"),
+    upper_bound: Optional[Callable[[Any], float]] = None,
+) -> List[Tuple[Any, float]]:
+    """Select the top k items from a stream without materialising every score.
+
+    When ``upper_bound`` is given it must never return less than ``score`` for
+    the same item; items whose bound cannot beat the current floor are skipped
+    before ``score`` is called.
+    """
+    selector = TopK(k, threshold)
+    for item in items:
+        if upper_bound is not None and not selector.would_accept(upper_bound(item)):
+            selector.skip()
+            continue
+        selector.push(score(item), item)
+    return selector.results()
+
+
+def merge_top_k(partials: Iterable[List[Tuple[Any, float]]], k: int = 5) -> List[Tuple[Any, float]]:
+    """Merge already-ranked (item, score) lists, keeping partial order for ties"""
+    selector = TopK(k)
+    for partial in partials:
+        for item, score in partial:
+            selector.push(score, item)
+    return selector.results()
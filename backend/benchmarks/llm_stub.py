@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Local LLM Stub Server
+=====================
+
+A deterministic OpenAI-compatible HTTP server for offline development and
+load testing. Point OPENAI_BASE_URL at it and the agents run their full
+conversation path without network access or API spend.
+
+Endpoints:
+    POST /v1/chat/completions   canned/templated replies, optional SSE streaming
+    POST /v1/embeddings         deterministic hashed unit vectors
+    GET  /v1/models             the served model
+    GET  /health, /stats        liveness and request counters
+
+Replies are chosen by the first response rule whose pattern matches the last
+user message (rules from --responses, then the built-in defaults) and filled
+in with {message}, {model} and {turn}. The same prompt always gets the same
+reply. Requests asking for JSON output get ``{}`` or, with a JSON schema,
+a skeleton object that satisfies the schema's required fields.
+
+Latency is drawn per request from a distribution (time to first token), plus
+--token-latency between streamed chunks. Error injection returns 429/5xx
+responses, hangs requests past client timeouts or aborts streams mid-reply
+at the configured rates. All randomness comes from one seeded generator.
+
+Latency specs:
+    0                      no delay
+    fixed:MS               constant
+    uniform:LOW_MS:HIGH_MS
+    normal:MEAN_MS:SD_MS   clipped at zero
+    lognormal:MEDIAN_MS:SIGMA
+
+Usage:
+    python3 llm_stub.py --port 8089 --latency lognormal:400:0.5 --error-rate 0.01
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python3 parlant_chat.py
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MODEL = "stub-gpt"
+
+# Characters per streamed chunk, roughly one token
+STREAM_CHUNK_CHARS = 4
+
+DEFAULT_RESPONSES = [
+    {"pattern": r"\b(hi|hello|hey|g'day)\b",
+     "reply": "Hello! I'm here to help you find a property. What area and budget do you have in mind?"},
+    {"pattern": r"\b(why|explain)\b",
+     "reply": "This listing scores well because it sits inside your budget, is in one of your preferred "
+              "suburbs and has most of the features you marked as must-haves."},
+    {"pattern": r"\b(bed|bedroom|house|apartment|unit|townhouse|home)\b",
+     "reply": "Based on \"{message}\", I've shortlisted a few listings that fit your budget and "
+              "preferred suburbs. Would you like me to narrow them down by features or commute?"},
+    {"pattern": r"",
+     "reply": "Thanks for the details. Tell me a bit more about the suburbs, budget and features that "
+              "matter most and I'll refine the recommendations."},
+]
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests",
+                500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+
+class LatencyModel:
+    """Samples a delay in seconds from a parsed latency spec"""
+
+    def __init__(self, kind: str, params: Tuple[float, ...]):
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, rest = spec.partition(":")
+        if kind in ("", "0", "none"):
+            return cls("fixed", (0.0,))
+        params = tuple(float(p) for p in rest.split(":")) if rest else ()
+        arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in arity or len(params) != arity[kind]:
+            raise ValueError(f"Invalid latency spec {spec!r}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            ms = max(0.0, rng.gauss(*self.params))
+        else:
+            median, sigma = self.params
+            ms = median * math.exp(rng.gauss(0.0, sigma))
+        return ms / 1000.0
+
+
+def schema_skeleton(schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None) -> Any:
+    """Smallest value satisfying a JSON schema's types, enums and required fields"""
+    defs = defs if defs is not None else schema.get("$defs", schema.get("definitions", {}))
+    if "$ref" in schema:
+        return schema_skeleton(defs.get(schema["$ref"].rsplit("/", 1)[-1], {}), defs)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if schema.get(key):
+            return schema_skeleton(schema[key][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+    if "default" in schema:
+        return schema["default"]
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {name: schema_skeleton(properties.get(name, {}), defs) for name in schema.get("required", properties)}
+    if kind == "array":
+        return [schema_skeleton(schema["items"], defs) for _ in range(schema.get("minItems", 0))] if "items" in schema else []
+    return {"string": "", "integer": 0, "number": 0, "boolean": False}.get(kind)
+
+
+def embed(text: str, dimensions: int) -> List[float]:
+    """Deterministic unit vector for a text (hashed bag of words)"""
+    vector = [0.0] * dimensions
+    for word in text.lower().split():
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        slot = int.from_bytes(digest[:4], "little") % dimensions
+        vector[slot] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [round(v / norm, 6) for v in vector]
+
+
+class StubLLMServer:
+    """OpenAI-compatible HTTP/1.1 server with configurable latency and faults"""
+
+    def __init__(self, model: str = DEFAULT_MODEL, latency: str = "0", token_latency_ms: float = 0.0,
+                 error_rate: float = 0.0, error_codes: Tuple[int, ...] = (429, 500, 503),
+                 hang_rate: float = 0.0, hang_seconds: float = 60.0, abort_rate: float = 0.0,
+                 responses: Optional[List[Dict[str, str]]] = None, seed: int = 42):
+        self.model = model
+        self.latency = LatencyModel.parse(latency)
+        self.token_latency = token_latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.abort_rate = abort_rate
+        self.rng = random.Random(seed)
+        self.rules = [(re.compile(rule["pattern"], re.IGNORECASE), rule["reply"])
+                      for rule in (responses or []) + DEFAULT_RESPONSES]
+        self.stats: Dict[str, int] = {"requests": 0, "completions": 0, "streams": 0, "embeddings": 0,
+                                      "errors": 0, "hangs": 0, "aborts": 0}
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8089) -> str:
+        """Start listening; returns the base URL (port 0 picks a free port)"""
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        bound_port = self.server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}/v1"
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def reply_for(self, messages: List[Dict[str, Any]]) -> str:
+        user_turns = [m for m in messages if m.get("role") == "user"]
+        content = user_turns[-1].get("content", "") if user_turns else ""
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        for pattern, reply in self.rules:
+            if pattern.search(content):
+                return reply.format_map({"message": " ".join(content.split())[:200], "model": self.model,
+                                         "turn": len(user_turns)})
+        return ""
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = await self._dispatch(writer, method, path, body)
+                if not keep_alive or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], headers, body
+
+    @staticmethod
+    async def _send_json(writer: asyncio.StreamWriter, status: int, payload: Any):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'Error')}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes) -> bool:
+        """Answer one request; returns False when the connection must close"""
+        self.stats["requests"] += 1
+        if path.startswith("/v1"):
+            path = path[3:]
+        if method == "GET" and path == "/health":
+            await self._send_json(writer, 200, {"status": "ok"})
+            return True
+        if method == "GET" and path == "/stats":
+            await self._send_json(writer, 200, self.stats)
+            return True
+        if method == "GET" and path == "/models":
+            await self._send_json(writer, 200, {"object": "list", "data": [
+                {"id": self.model, "object": "model", "created": 0, "owned_by": "stub"}]})
+            return True
+        if method != "POST" or path not in ("/chat/completions", "/embeddings"):
+            await self._send_json(writer, 404, {"error": {"message": f"No route {method} {path}", "type": "invalid_request_error"}})
+            return True
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            await self._send_json(writer, 400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return True
+
+        # Faults are decided before any work so their rates hold under every request mix
+        roll = self.rng.random()
+        if roll < self.hang_rate:
+            self.stats["hangs"] += 1
+            await asyncio.sleep(self.hang_seconds)
+            return False
+        if roll < self.hang_rate + self.error_rate:
+            self.stats["errors"] += 1
+            status = self.rng.choice(self.error_codes)
+            await asyncio.sleep(self.latency.sample(self.rng) / 4)
+            await self._send_json(writer, status, {"error": {"message": f"Injected {status}", "type": "stub_error",
+                                                             "code": status}})
+            return True
+        delay = self.latency.sample(self.rng)
+
+        if path == "/embeddings":
+            self.stats["embeddings"] += 1
+            inputs = payload.get("input", "")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            dimensions = int(payload.get("dimensions", 1536))
+            await asyncio.sleep(delay)
+            await self._send_json(writer, 200, {
+                "object": "list", "model": payload.get("model", self.model),
+                "data": [{"object": "embedding", "index": i, "embedding": embed(str(text), dimensions)}
+                         for i, text in enumerate(inputs)],
+                "usage": {"prompt_tokens": sum(len(str(t).split()) for t in inputs),
+                          "total_tokens": sum(len(str(t).split()) for t in inputs)},
+            })
+            return True
+
+        messages = payload.get("messages", [])
+        response_format = (payload.get("response_format") or {})
+        if response_format.get("type") == "json_schema":
+            content = json.dumps(schema_skeleton(response_format.get("json_schema", {}).get("schema", {})))
+        elif response_format.get("type") == "json_object":
+            content = "{}"
+        else:
+            content = self.reply_for(messages)
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        completion_id = "chatcmpl-" + hashlib.blake2b(f"{self.stats['requests']}".encode(), digest_size=8).hexdigest()
+        await asyncio.sleep(delay)
+
+        if payload.get("stream"):
+            self.stats["streams"] += 1
+            return await self._stream(writer, completion_id, content, prompt_tokens,
+                                      abort=self.rng.random() < self.abort_rate)
+
+        self.stats["completions"] += 1
+        completion_tokens = len(content.split())
+        await self._send_json(writer, 200, {
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": self.model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+        return True
+
+    async def _stream(self, writer: asyncio.StreamWriter, completion_id: str, content: str,
+                      prompt_tokens: int, abort: bool) -> bool:
+        """Server-sent chat.completion.chunk events; the connection closes at the end"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        created = int(time.time())
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra: Any) -> bytes:
+            event = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": self.model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+            return b"data: " + json.dumps(event).encode("utf-8") + b"\n\n"
+
+        writer.write(chunk({"role": "assistant", "content": ""}))
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        abort_at = len(pieces) // 2 if abort else -1
+        for index, piece in enumerate(pieces):
+            if index == abort_at:
+                self.stats["aborts"] += 1
+                return False
+            writer.write(chunk({"content": piece}))
+            await writer.drain()
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+        completion_tokens = len(content.split())
+        writer.write(chunk({}, "stop", usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                              "total_tokens": prompt_tokens + completion_tokens}))
+        writer.write(b"data: [DONE]\n\n")
+        await writer.drain()
+        return False
+
+
+async def serve(args: argparse.Namespace):
+    responses = None
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+    server = StubLLMServer(
+        model=args.model, latency=args.latency, token_latency_ms=args.token_latency,
+        error_rate=args.error_rate, error_codes=tuple(int(c) for c in args.error_codes.split(",")),
+        hang_rate=args.hang_rate, hang_seconds=args.hang_seconds, abort_rate=args.abort_rate,
+        responses=responses, seed=args.seed,
+    )
+    base_url = await server.start(args.host, args.port)
+    print(f"✅ LLM stub listening on {base_url}", flush=True)
+    await server.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local OpenAI-compatible LLM stub')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=8089, help='Port (0 picks a free port)')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Model name reported in responses')
+    parser.add_argument('--latency', default='0', help='Time-to-first-token distribution, e.g. lognormal:400:0.5')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='Milliseconds between streamed chunks')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with an error status')
+    parser.add_argument('--error-codes', default='429,500,503', help='Comma-separated statuses to inject')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='Fraction of requests that never answer')
+    parser.add_argument('--hang-seconds', type=float, default=60.0, help='How long a hung request is held open')
+    parser.add_argument('--abort-rate', type=float, default=0.0, help='Fraction of streams cut off mid-reply')
+    parser.add_argument('--responses', help='JSON file of [{"pattern": regex, "reply": template}] rules')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for latency and fault sampling')
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
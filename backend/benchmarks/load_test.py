@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Conversation Load Test
+======================
+
+Drives the conversation pipeline at a fixed concurrency against the local LLM
+stub (llm_stub.py) and reports throughput, latency percentiles and errors.
+
+Targets:
+    personalization  PropertyPersonalizationAgent.start_conversation turns (or
+                     start_conversation_stream with --stream) for synthetic
+                     users, with the LLM reached over HTTP through the stub
+    parlant          chat_with_parlant, as the chat worker calls it
+
+By default the stub is started as a subprocess on a free port and
+OPENAI_BASE_URL points at it; pass --llm-url to use a stub (or any
+OpenAI-compatible endpoint) that is already running. With --agent parlant the
+personalization agent is initialised through Parlant as in production; the
+default --agent openai uses a minimal chat-completions client instead so the
+test runs with nothing but the stub.
+
+Usage:
+    python3 load_test.py --users 200 --concurrency 50 --turns 3 --latency lognormal:400:0.5
+    python3 load_test.py --stream --token-latency 15 --error-rate 0.02 --out load.json
+    python3 load_test.py --target parlant --users 1000 --concurrency 100
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import argparse
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "agents"))
+
+from instrumentation import LatencyHistogram
+from synthetic import SyntheticCatalogue
+
+SYSTEM_PROMPT = ("You are PropertyMatch Pro, an assistant for Australian real estate. Recommend listings "
+                 "from the provided shortlist and explain why they suit the user.")
+
+
+class LLMRequestError(Exception):
+    """Non-200 answer or broken stream from the chat completions endpoint"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"LLM request failed ({status}): {message}")
+        self.status = status
+
+
+class OpenAIChatAgent:
+    """Minimal chat-completions client exposing the agent.chat / chat_stream interface"""
+
+    def __init__(self, base_url: str, api_key: str, model: str = "stub-gpt", timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = parts.scheme == "https"
+        self.path = parts.path.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+    def _messages(self, message: str, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": json.dumps(context, separators=(",", ":"), default=str)},
+            {"role": "user", "content": message.strip()},
+        ]
+
+    async def _post(self, payload: Dict[str, Any]) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, int]:
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(f"POST {self.path} HTTP/1.1\r\nHost: {self.host}\r\nAuthorization: Bearer {self.api_key}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+                     .encode("latin-1") + body)
+        await writer.drain()
+        status = int((await reader.readline()).split(b" ", 2)[1])
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        return reader, writer, status
+
+    async def chat(self, message: str, context: Dict[str, Any]) -> str:
+        async def request() -> str:
+            reader, writer, status = await self._post({"model": self.model, "messages": self._messages(message, context)})
+            try:
+                body = await reader.read()
+            finally:
+                writer.close()
+            if status != 200:
+                raise LLMRequestError(status, body.decode("utf-8", "replace")[:200])
+            return json.loads(body)["choices"][0]["message"]["content"]
+        return await asyncio.wait_for(request(), self.timeout)
+
+    async def chat_stream(self, message: str, context: Dict[str, Any]) -> AsyncIterator[str]:
+        reader, writer, status = await asyncio.wait_for(
+            self._post({"model": self.model, "messages": self._messages(message, context), "stream": True}), self.timeout)
+        try:
+            if status != 200:
+                body = await asyncio.wait_for(reader.read(), self.timeout)
+                raise LLMRequestError(status, body.decode("utf-8", "replace")[:200])
+            finished = False
+            while True:
+                line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not line:
+                    break
+                if not line.startswith(b"data: "):
+                    continue
+                data = line[6:].strip()
+                if data == b"[DONE]":
+                    finished = True
+                    break
+                text = json.loads(data)["choices"][0]["delta"].get("content")
+                if text:
+                    yield text
+            if not finished:
+                raise LLMRequestError(200, "stream ended before [DONE]")
+        finally:
+            writer.close()
+
+
+async def start_stub(args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    """Launch llm_stub.py on a free port and wait for its listening line"""
+    command = [sys.executable, os.path.join(BENCH_DIR, "llm_stub.py"), "--port", "0",
+               "--latency", args.latency, "--token-latency", str(args.token_latency),
+               "--error-rate", str(args.error_rate), "--hang-rate", str(args.hang_rate),
+               "--abort-rate", str(args.abort_rate), "--seed", str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = await asyncio.get_running_loop().run_in_executor(None, process.stdout.readline)
+    if "listening on " not in line:
+        process.kill()
+        raise RuntimeError(f"LLM stub failed to start: {line.strip()!r}")
+    return process, line.rsplit("listening on ", 1)[1].strip()
+
+
+async def build_target(args: argparse.Namespace, catalogue: SyntheticCatalogue):
+    """The coroutine each virtual user calls per turn, plus a cleanup hook"""
+    if args.target == "parlant":
+        import parlant_integration
+        from ingestion import property_to_listing
+        agent = parlant_integration.PropertyParlantAgent()
+        if args.listings:
+            agent.set_listings([property_to_listing(p) for p in catalogue.listings(args.listings)])
+        await agent.initialize()
+        parlant_integration._agent_instance = agent
+
+        async def turn(user_id: str, message: str, record_first_event):
+            result = await parlant_integration.chat_with_parlant(message, user_id)
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+
+        async def cleanup():
+            parlant_integration._agent_instance = None
+        return turn, cleanup
+
+    from property_agent_example import PropertyPersonalizationAgent
+    agent = PropertyPersonalizationAgent()
+    if args.agent == "parlant":
+        await agent.initialize()
+    else:
+        agent.agent = OpenAIChatAgent(os.environ["OPENAI_BASE_URL"], os.environ["OPENAI_API_KEY"],
+                                      timeout=args.timeout)
+        if os.getenv("LISTINGS_FEED"):
+            await agent.load_listings(os.getenv("LISTINGS_FEED"))
+        else:
+            await agent._load_sample_data()
+    if args.listings:
+        agent.replace_properties(list(catalogue.listings(args.listings)))
+
+    async def turn(user_id: str, message: str, record_first_event):
+        if not args.stream:
+            await agent.start_conversation(user_id, message)
+            return
+        async for event in agent.start_conversation_stream(user_id, message):
+            if event["event"] == "token":
+                record_first_event()
+                record_first_event = _noop
+    return turn, agent.cleanup
+
+
+def _noop():
+    pass
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    catalogue = SyntheticCatalogue(args.seed)
+    turn, cleanup = await build_target(args, catalogue)
+    conversations = [(f"load_{i}", catalogue.messages(args.turns)) for i in range(args.users)]
+
+    latency = LatencyHistogram()
+    first_token = LatencyHistogram()
+    errors: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def converse(user_id: str, messages: List[str]):
+        async with semaphore:
+            for message in messages:
+                started = time.perf_counter_ns()
+
+                def record_first_event():
+                    first_token.record((time.perf_counter_ns() - started) // 1000)
+                try:
+                    await turn(user_id, message, record_first_event)
+                except Exception as e:
+                    name = f"{type(e).__name__}:{e.status}" if isinstance(e, LLMRequestError) else type(e).__name__
+                    errors[name] = errors.get(name, 0) + 1
+                    continue
+                latency.record((time.perf_counter_ns() - started) // 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(converse(user_id, messages) for user_id, messages in conversations))
+    elapsed = time.perf_counter() - started
+    await cleanup()
+
+    turns = args.users * args.turns
+    report = {
+        "target": args.target,
+        "agent": args.agent,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "turns": turns,
+        "stream": args.stream,
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_sec": round(turns / elapsed, 1) if elapsed > 0 else 0.0,
+        "succeeded": latency.total,
+        "errors": errors,
+        "latency": latency.snapshot(),
+    }
+    if first_token.total:
+        report["first_token"] = first_token.snapshot()
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n🚦 {report['target']} load test: {report['users']} users x {report['turns'] // report['users']} turns, "
+          f"concurrency {report['concurrency']}{' (streaming)' if report['stream'] else ''}")
+    print(f"   {report['turns_per_sec']:,.1f} turns/sec over {report['elapsed_s']}s, "
+          f"{report['succeeded']:,}/{report['turns']:,} succeeded")
+    for name in ("latency", "first_token"):
+        if name in report:
+            snap = report[name]
+            print(f"   {name:<12} p50 {snap['p50_ms']:.1f}ms  p90 {snap['p90_ms']:.1f}ms  "
+                  f"p99 {snap['p99_ms']:.1f}ms  max {snap['max_ms']:.1f}ms")
+    for name, count in sorted(report["errors"].items()):
+        print(f"   ❌ {name}: {count}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Load test the conversation pipeline against the LLM stub')
+    parser.add_argument('--target', choices=['personalization', 'parlant'], default='personalization',
+                        help='Pipeline to drive')
+    parser.add_argument('--agent', choices=['openai', 'parlant'], default='openai',
+                        help='How the personalization agent reaches the LLM')
+    parser.add_argument('--users', type=int, default=100, help='Virtual users')
+    parser.add_argument('--concurrency', type=int, default=20, help='Users in flight at once')
+    parser.add_argument('--turns', type=int, default=3, help='Messages per user')
+    parser.add_argument('--stream', action='store_true', help='Use start_conversation_stream and report first-token latency')
+    parser.add_argument('--listings', type=int, default=0, help='Synthetic catalogue size (0 keeps the default data)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request LLM timeout in seconds')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for synthetic users and stub faults')
+    parser.add_argument('--llm-url', help='Use a running OpenAI-compatible endpoint instead of starting the stub')
+    parser.add_argument('--latency', default='lognormal:300:0.4', help='Stub time-to-first-token distribution')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='Stub milliseconds between streamed chunks')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Stub error response rate')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='Stub hung request rate')
+    parser.add_argument('--abort-rate', type=float, default=0.0, help='Stub aborted stream rate')
+    parser.add_argument('--out', help='Write the JSON report here')
+
+    args = parser.parse_args()
+    stub = None
+    if args.llm_url:
+        base_url = args.llm_url
+    else:
+        stub, base_url = await start_stub(args)
+        print(f"✅ LLM stub running at {base_url}")
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    try:
+        report = await run_load(args)
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.out}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+===============
+
+Measures the recommendation and chat hot paths on seeded synthetic catalogues
+(see synthetic.py) and compares the results with a stored baseline.
+
+Benchmarks, per catalogue scale:
+    extract_criteria       PropertyParlantAgent._extract_criteria over the message corpus, matching
+                           against a --gazetteer-suburbs synthetic national gazetteer
+    filter_properties      PropertyParlantAgent._filter_properties for the extracted criteria
+    chat_e2e               chat_with_parlant end to end (hybrid mode: no network LLM call)
+    score_property         PropertyPersonalizationAgent._calculate_property_score per listing
+    recommendations_cold   get_personalized_recommendations with no cached ranking
+    recommendations_warm   get_personalized_recommendations answered from the cache
+    recommendations_pooled cold recommendations scored by a ScoringPool of --scoring-workers processes
+
+The personalization agent's LLM is a stub that answers after --llm-latency-ms.
+Cold and warm recommendations always score in-process, whatever the catalogue
+size, so only recommendations_pooled depends on the core count.
+
+Each result records ops/sec and latency percentiles. With a baseline, every
+benchmark present in both runs is compared on p50 latency; a slowdown beyond
+--tolerance is reported as a regression (and fails the run with
+--fail-on-regression).
+
+Usage:
+    python3 run_benchmarks.py                              # 10k listings
+    python3 run_benchmarks.py --scales 10k 100k 1m --out results.json
+    python3 run_benchmarks.py --save-baseline              # record baseline.json
+    python3 run_benchmarks.py --fail-on-regression         # CI gate
+"""
+
+import asyncio
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "agents"))
+
+# The hybrid chat path never calls the LLM provider; these only satisfy the agent's startup checks
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+
+import numpy as np
+import parlant_integration
+from parlant_integration import PropertyParlantAgent, chat_with_parlant
+from property_agent_example import PropertyPersonalizationAgent
+from property_models import CompactUserProfile
+from session_store import MemorySessionStore
+from scoring_pool import ScoringPool
+from ingestion import property_to_listing
+from criteria_extractor import CriteriaExtractor
+from instrumentation import LatencyHistogram
+from synthetic import SyntheticCatalogue, synthetic_gazetteer
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+SCALES = {"10k": 10000, "100k": 100000, "1m": 1000000}
+
+
+class StubLLM:
+    """Stands in for the Parlant agent: fixed latency, canned reply"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    async def chat(self, message: str, context: Dict[str, Any]) -> str:
+        self.calls += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        return "Here are a few listings that match what you're after."
+
+
+def _summarise(histogram: LatencyHistogram, iterations: int, elapsed: float) -> Dict[str, Any]:
+    result = histogram.snapshot()
+    result["iterations"] = iterations
+    result["ops_per_sec"] = round(iterations / elapsed, 1) if elapsed > 0 else 0.0
+    return result
+
+
+def measure(fn: Callable[[int], Any], iterations: int, warmup: int = 10) -> Dict[str, Any]:
+    """Time fn(i) for i in range(iterations) after a short warm-up"""
+    for i in range(min(warmup, iterations)):
+        fn(i)
+    histogram = LatencyHistogram()
+    gc.collect()
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter_ns()
+        fn(i)
+        histogram.record((time.perf_counter_ns() - t0) // 1000)
+    return _summarise(histogram, iterations, time.perf_counter() - started)
+
+
+async def measure_async(fn: Callable[[int], Awaitable[Any]], iterations: int, warmup: int = 10) -> Dict[str, Any]:
+    """Async counterpart of measure"""
+    for i in range(min(warmup, iterations)):
+        await fn(i)
+    histogram = LatencyHistogram()
+    gc.collect()
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter_ns()
+        await fn(i)
+        histogram.record((time.perf_counter_ns() - t0) // 1000)
+    return _summarise(histogram, iterations, time.perf_counter() - started)
+
+
+async def run_scale(size: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Build both agents over one synthetic catalogue and run every selected benchmark"""
+    catalogue = SyntheticCatalogue(args.seed)
+    started = time.perf_counter()
+    properties = list(catalogue.listings(size))
+    messages = catalogue.messages(args.messages)
+    profiles = [catalogue.profile(f"bench_{i}") for i in range(args.users)]
+    generate_s = time.perf_counter() - started
+    results: Dict[str, Any] = {}
+    selected = set(args.only) if args.only else None
+
+    def wanted(name: str) -> bool:
+        return selected is None or name in selected
+
+    # Chat path: PropertyParlantAgent over listing dicts
+    if wanted("extract_criteria") or wanted("filter_properties") or wanted("chat_e2e"):
+        chat_agent = PropertyParlantAgent()
+        chat_agent.set_listings([property_to_listing(p) for p in properties])
+        chat_agent.is_initialized = True
+        # Extraction cost grows with the automaton, so match against a national-sized suburb list
+        chat_agent.extractor = CriteriaExtractor(synthetic_gazetteer(args.gazetteer_suburbs, args.seed))
+        parlant_integration._agent_instance = chat_agent
+
+        criteria = [chat_agent._extract_criteria(m) for m in messages]
+        if wanted("extract_criteria"):
+            results["extract_criteria"] = measure(
+                lambda i: chat_agent._extract_criteria(messages[i % len(messages)]), args.iterations)
+        if wanted("filter_properties"):
+            results["filter_properties"] = measure(
+                lambda i: chat_agent._filter_properties(criteria[i % len(criteria)]), args.iterations)
+        if wanted("chat_e2e"):
+            results["chat_e2e"] = await measure_async(
+                lambda i: chat_with_parlant(messages[i % len(messages)], f"bench_{i % args.users}"), args.iterations)
+        parlant_integration._agent_instance = None
+        del chat_agent
+
+    # Personalisation path: PropertyPersonalizationAgent over Property records
+    if (wanted("score_property") or wanted("recommendations_cold") or wanted("recommendations_warm")
+            or wanted("recommendations_pooled")):
+        agent = PropertyPersonalizationAgent(session_store=MemorySessionStore(max_sessions=args.users * 2))
+        agent.agent = StubLLM(args.llm_latency_ms)
+        agent.scoring_pool = ScoringPool(workers=0)
+        agent.replace_properties(properties)
+        for profile in profiles:
+            agent.user_profiles[profile.user_id] = CompactUserProfile.from_profile(profile)
+            agent._save_session(profile.user_id)
+            await agent.start_conversation(profile.user_id)
+
+        if wanted("score_property"):
+            results["score_property"] = measure(
+                lambda i: agent._calculate_property_score(properties[i % size], profiles[i % len(profiles)], {}),
+                args.iterations)
+
+        if wanted("recommendations_cold"):
+            async def cold(i: int):
+                user_id = profiles[i % len(profiles)].user_id
+                agent.recommendation_cache.invalidate_user(user_id)
+                agent.ranker.forget(user_id)
+                await agent.get_personalized_recommendations(user_id)
+            results["recommendations_cold"] = await measure_async(cold, args.rank_iterations)
+
+        if wanted("recommendations_warm"):
+            async def warm(i: int):
+                await agent.get_personalized_recommendations(profiles[i % len(profiles)].user_id)
+            results["recommendations_warm"] = await measure_async(warm, args.iterations, warmup=len(profiles))
+
+        if wanted("recommendations_pooled"):
+            agent.scoring_pool = ScoringPool(workers=args.scoring_workers, min_rows=0)
+            async def pooled(i: int):
+                user_id = profiles[i % len(profiles)].user_id
+                agent.recommendation_cache.invalidate_user(user_id)
+                await agent.get_personalized_recommendations(user_id)
+            # The warmup spawns the workers and exports the catalogue
+            results["recommendations_pooled"] = await measure_async(pooled, args.rank_iterations)
+            agent.scoring_pool.close()
+        del agent
+
+    return {"listings": size, "generate_s": round(generate_s, 3), "benchmarks": results}
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "rank_iterations": args.rank_iterations,
+        "users": args.users,
+        "messages": args.messages,
+        "llm_latency_ms": args.llm_latency_ms,
+        "scoring_workers": args.scoring_workers,
+        "gazetteer_suburbs": args.gazetteer_suburbs,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Per-benchmark p50 and throughput ratios against the baseline"""
+    rows = []
+    for scale, run in current["scales"].items():
+        base_run = baseline.get("scales", {}).get(scale)
+        if not base_run:
+            continue
+        for name, result in run["benchmarks"].items():
+            base = base_run["benchmarks"].get(name)
+            if not base or not base.get("p50_ms"):
+                continue
+            ratio = result["p50_ms"] / base["p50_ms"]
+            rows.append({
+                "scale": scale,
+                "benchmark": name,
+                "baseline_p50_ms": base["p50_ms"],
+                "p50_ms": result["p50_ms"],
+                "p50_ratio": round(ratio, 3),
+                "ops_ratio": round(result["ops_per_sec"] / base["ops_per_sec"], 3) if base.get("ops_per_sec") else None,
+                "regression": ratio > 1.0 + tolerance,
+            })
+    return rows
+
+
+def print_report(report: Dict[str, Any]):
+    for scale, run in report["scales"].items():
+        print(f"\n📊 {scale} listings ({run['listings']:,}, generated in {run['generate_s']}s)")
+        print(f"   {'benchmark':<22}{'ops/sec':>12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+        for name, result in run["benchmarks"].items():
+            print(f"   {name:<22}{result['ops_per_sec']:>12,.1f}{result['p50_ms']:>10.3f}"
+                  f"{result['p90_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+    if report.get("comparison"):
+        print(f"\n📈 Compared with baseline {report['baseline_revision'] or ''}")
+        for row in report["comparison"]:
+            flag = "❌ regression" if row["regression"] else "✅"
+            print(f"   {row['scale']:<6}{row['benchmark']:<22}{row['baseline_p50_ms']:>10.3f} → "
+                  f"{row['p50_ms']:<10.3f}x{row['p50_ratio']:<8} {flag}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Run the scoring, filtering and chat benchmarks')
+    parser.add_argument('--scales', nargs='+', default=['10k'], choices=list(SCALES), help='Catalogue sizes to run')
+    parser.add_argument('--only', nargs='+', help='Run only these benchmarks')
+    parser.add_argument('--seed', type=int, default=42, help='Synthetic data seed')
+    parser.add_argument('--iterations', type=int, default=2000, help='Iterations for per-call benchmarks')
+    parser.add_argument('--rank-iterations', type=int, default=200, help='Iterations for cold recommendations')
+    parser.add_argument('--users', type=int, default=50, help='Synthetic user profiles')
+    parser.add_argument('--messages', type=int, default=500, help='Synthetic chat messages')
+    parser.add_argument('--scoring-workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes for recommendations_pooled')
+    parser.add_argument('--gazetteer-suburbs', type=int, default=16000,
+                        help='Suburbs in the gazetteer criteria extraction matches against')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='Stub LLM response latency')
+    parser.add_argument('--out', help='Write the JSON report here')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline report to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p50 slowdown before flagging')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero on any regression')
+
+    args = parser.parse_args()
+    report: Dict[str, Any] = {"environment": environment(args), "scales": {}}
+    for scale in args.scales:
+        print(f"⏱️  Running {scale}...", file=sys.stderr)
+        report["scales"][scale] = await run_scale(SCALES[scale], args)
+        gc.collect()
+
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["baseline_revision"] = baseline.get("environment", {}).get("git_revision")
+        report["comparison"] = compare(report, baseline, args.tolerance)
+
+    print_report(report)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.out}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline written to {args.baseline}")
+
+    if args.fail_on_regression and any(row["regression"] for row in report.get("comparison", [])):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Synthetic Benchmark Data
+========================
+
+Seeded generators for listings, user profiles and chat messages, shaped like a
+real Australian catalogue rather than uniform noise:
+
+- suburbs come from the gazetteer with Zipf-like popularity, so a few inner
+  suburbs hold many listings and most hold few
+- prices are log-normal around a per-type median, scaled by state
+- bedrooms depend on property type
+- features are drawn from a fixed vocabulary with Zipf popularity and mild
+  type affinity (pools on houses, concierges on apartments)
+
+The same seed always produces the same data, so benchmark runs are comparable.
+
+synthetic_gazetteer extends the bundled suburb sample to a national-sized
+list (about 15k suburbs in Australia) of generated place names, so criteria
+extraction can be measured against an automaton of realistic size.
+
+Usage:
+    python3 synthetic.py --listings 100000 --out listings.csv.gz
+    python3 synthetic.py --gazetteer 16000 --out suburbs.csv
+"""
+
+import csv
+import gzip
+import math
+import os
+import random
+import sys
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+from property_models import Property, PropertyType, UserProfile, UserType
+from criteria_extractor import load_gazetteer
+
+# Relative frequency of each property type in the catalogue
+TYPE_WEIGHTS = {
+    PropertyType.HOUSE: 0.45,
+    PropertyType.APARTMENT: 0.35,
+    PropertyType.TOWNHOUSE: 0.13,
+    PropertyType.LAND: 0.05,
+    PropertyType.COMMERCIAL: 0.02,
+}
+
+# Median price and log-normal sigma per type
+PRICE_MEDIANS = {
+    PropertyType.HOUSE: (1050000, 0.45),
+    PropertyType.APARTMENT: (620000, 0.40),
+    PropertyType.TOWNHOUSE: (820000, 0.35),
+    PropertyType.LAND: (450000, 0.55),
+    PropertyType.COMMERCIAL: (1400000, 0.70),
+}
+
+STATE_PRICE_FACTORS = {"NSW": 1.35, "VIC": 1.0, "QLD": 0.85, "WA": 0.8, "SA": 0.75,
+                       "ACT": 0.95, "TAS": 0.7, "NT": 0.65}
+
+# (bedrooms, weight) per type
+BEDROOM_WEIGHTS = {
+    PropertyType.HOUSE: [(2, 0.1), (3, 0.45), (4, 0.33), (5, 0.12)],
+    PropertyType.APARTMENT: [(1, 0.35), (2, 0.5), (3, 0.15)],
+    PropertyType.TOWNHOUSE: [(2, 0.3), (3, 0.55), (4, 0.15)],
+    PropertyType.LAND: [(0, 1.0)],
+    PropertyType.COMMERCIAL: [(0, 1.0)],
+}
+
+# Ordered by popularity; draws follow a Zipf distribution over this list
+FEATURES = [
+    "Air conditioning", "Modern kitchen", "Secure parking", "Balcony", "Built-in wardrobes",
+    "Dishwasher", "Garden", "Ducted heating", "Double garage", "Study nook",
+    "City views", "Pool", "Gym", "Solar panels", "Large backyard",
+    "Renovated kitchen", "Timber floors", "Outdoor entertaining", "Ensuite", "Walk-in robe",
+    "Alarm system", "Intercom", "Lift access", "Concierge", "Rainwater tank",
+    "Ocean views", "Park views", "Fireplace", "High ceilings", "Period features",
+    "Shed", "Courtyard", "Pet friendly", "Close to transport", "Storage cage",
+    "Rooftop terrace", "Wine cellar", "Home theatre", "Tennis court", "Spa",
+]
+
+# Features that mostly belong to one type get their weight scaled for that type
+TYPE_FEATURE_AFFINITY = {
+    PropertyType.HOUSE: {"Pool": 2.0, "Large backyard": 3.0, "Double garage": 2.0, "Shed": 3.0},
+    PropertyType.APARTMENT: {"Concierge": 4.0, "Lift access": 4.0, "Gym": 3.0, "City views": 2.0,
+                             "Large backyard": 0.05, "Shed": 0.05},
+    PropertyType.TOWNHOUSE: {"Courtyard": 3.0},
+}
+
+STREETS = ["High", "Main", "Church", "Station", "Park", "Victoria", "George", "King", "Queen", "Chapel",
+           "Bridge", "Smith", "Elizabeth", "Collins", "Beach", "Oak", "River", "Hill", "Albert", "Railway"]
+STREET_TYPES = ["Street", "Road", "Avenue", "Lane", "Parade", "Crescent", "Drive"]
+
+USER_TYPES = list(UserType)
+
+# Generated suburb names: [prefix] stem + link + suffix, e.g. "North Ashingvale", "Kelley Heights"
+SUBURB_PREFIXES = ["", "North ", "South ", "East ", "West ", "Upper ", "Lower ", "Mount ", "Port "]
+SUBURB_STEMS = ["Ash", "Bel", "Bir", "Bur", "Car", "Cas", "Clar", "Cor", "Dar", "Den", "Ed", "Elm", "Fair",
+                "Glen", "Gran", "Green", "Ham", "Hart", "Hol", "Kel", "Ken", "Kin", "Lang", "Lee", "Lin",
+                "Mar", "Mel", "Mil", "Mor", "New", "Nor", "Oak", "Pem", "Ply", "Red", "Ros", "Rye", "San",
+                "Shel", "Stan", "Sum", "Tal", "Thorn", "War", "Wel", "Wes", "Whit", "Wil", "Win", "Yar"]
+SUBURB_LINKS = ["", "ing", "ley"]
+SUBURB_SUFFIXES = ["field", "wood", "vale", "dale", "ton", "ville", "brook", "ford", "mere", "hurst",
+                   " Park", " Heights", " Hills", " Beach", " Creek", " Downs", " Point", " Gardens",
+                   " Valley", " Ridge"]
+
+# (share of suburbs, first postcode, last postcode) per state
+STATE_POSTCODES = {
+    "NSW": (0.31, 2000, 2599), "VIC": (0.26, 3000, 3999), "QLD": (0.2, 4000, 4999), "WA": (0.1, 6000, 6797),
+    "SA": (0.07, 5000, 5799), "TAS": (0.03, 7000, 7799), "ACT": (0.015, 2600, 2620), "NT": (0.015, 800, 899),
+}
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return [1.0 / (rank ** s) for rank in range(1, n + 1)]
+
+
+class SyntheticCatalogue:
+    """Seeded generator of listings, profiles and messages"""
+
+    def __init__(self, seed: int = 42, gazetteer: Optional[List[Dict[str, str]]] = None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.suburbs = gazetteer if gazetteer is not None else load_gazetteer()
+        # Popularity order is itself seeded so it does not just follow the file order
+        order = list(range(len(self.suburbs)))
+        random.Random(seed + 1).shuffle(order)
+        self.suburbs = [self.suburbs[i] for i in order]
+        self.suburb_weights = _zipf_weights(len(self.suburbs), 0.9)
+        self.feature_weights = {
+            pt: [w * TYPE_FEATURE_AFFINITY.get(pt, {}).get(f, 1.0) for f, w in zip(FEATURES, _zipf_weights(len(FEATURES)))]
+            for pt in PropertyType
+        }
+        self._types = list(TYPE_WEIGHTS)
+        self._type_weights = list(TYPE_WEIGHTS.values())
+        self._epoch = datetime(2024, 1, 1)
+
+    def _features(self, property_type: PropertyType) -> List[str]:
+        count = min(len(FEATURES), max(0, int(self.rng.gauss(5, 2))))
+        picked = []
+        weights = self.feature_weights[property_type]
+        while len(picked) < count:
+            feature = self.rng.choices(FEATURES, weights)[0]
+            if feature not in picked:
+                picked.append(feature)
+        return picked
+
+    def listing(self, index: int) -> Property:
+        rng = self.rng
+        property_type = rng.choices(self._types, self._type_weights)[0]
+        location = rng.choices(self.suburbs, self.suburb_weights)[0]
+        median, sigma = PRICE_MEDIANS[property_type]
+        price = median * STATE_PRICE_FACTORS.get(location["state"], 1.0) * math.exp(rng.gauss(0, sigma))
+        bedrooms_options, bedroom_weights = zip(*BEDROOM_WEIGHTS[property_type])
+        bedrooms = rng.choices(bedrooms_options, bedroom_weights)[0]
+        return Property(
+            id=f"syn_{index:07d}",
+            address=f"{rng.randint(1, 399)} {rng.choice(STREETS)} {rng.choice(STREET_TYPES)}, "
+                    f"{location['suburb']} {location['state']} {location['postcode']}",
+            price=int(round(price, -3)),
+            property_type=property_type,
+            bedrooms=bedrooms,
+            bathrooms=max(1, bedrooms - rng.randint(0, 2)) if bedrooms else 0,
+            car_spaces=rng.choice([0, 1, 1, 2, 2, 3]),
+            land_size=round(rng.uniform(150, 900), 1) if property_type in (PropertyType.HOUSE, PropertyType.LAND) else None,
+            features=self._features(property_type),
+            images=[],
+            agent_contact="",
+            listing_date=self._epoch + timedelta(days=rng.randint(0, 365)),
+            suburb=location["suburb"],
+            state=location["state"],
+            postcode=location["postcode"],
+        )
+
+    def listings(self, count: int) -> Iterator[Property]:
+        for index in range(count):
+            yield self.listing(index)
+
+    def profile(self, user_id: str) -> UserProfile:
+        rng = self.rng
+        property_types = rng.sample(self._types[:3], rng.randint(1, 2))
+        median = sum(PRICE_MEDIANS[pt][0] for pt in property_types) / len(property_types)
+        budget_max = int(round(median * math.exp(rng.gauss(0.1, 0.3)), -4))
+        return UserProfile(
+            user_id=user_id,
+            name=f"User {user_id}",
+            user_type=rng.choice(USER_TYPES),
+            budget_min=int(round(budget_max * rng.uniform(0.5, 0.8), -4)),
+            budget_max=budget_max,
+            preferred_suburbs=[s["suburb"] for s in rng.choices(self.suburbs, self.suburb_weights, k=rng.randint(1, 4))],
+            property_types=property_types,
+            must_have_features=rng.sample(FEATURES[:15], rng.randint(0, 3)),
+            nice_to_have_features=rng.sample(FEATURES[:25], rng.randint(0, 4)),
+            deal_breakers=[],
+            search_history=[],
+            saved_properties=[],
+            last_interaction=self._epoch,
+        )
+
+    def message(self) -> str:
+        """A chat message mixing the criteria real users give, in varied phrasings"""
+        rng = self.rng
+        parts = []
+        if rng.random() < 0.6:
+            parts.append(f"{rng.choice([1, 2, 3, 4])} bed")
+        parts.append(rng.choice(["apartment", "house", "townhouse", "unit", "home", "place"]))
+        if rng.random() < 0.7:
+            parts.append(f"in {rng.choices(self.suburbs, self.suburb_weights)[0]['suburb']}")
+        roll = rng.random()
+        if roll < 0.4:
+            parts.append(f"under ${rng.randrange(400, 2000, 50)}k")
+        elif roll < 0.55:
+            low = rng.randrange(400, 1200, 50)
+            parts.append(f"between {low}k-{low + rng.randrange(100, 600, 50)}k")
+        elif roll < 0.65:
+            parts.append(f"around ${rng.choice(['1.2m', '1.5m', '2m', '950k'])}")
+        if rng.random() < 0.35:
+            parts.append(f"with {rng.choice(['a pool', 'a balcony', 'parking', 'a garden', 'a garage', 'city views'])}")
+        prefix = rng.choice(["", "Hi, ", "Show me ", "I'm looking for a ", "Any ", "Looking for "])
+        return prefix + " ".join(parts)
+
+    def messages(self, count: int) -> List[str]:
+        return [self.message() for _ in range(count)]
+
+
+def synthetic_gazetteer(count: int, seed: int = 42,
+                        gazetteer: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+    """The bundled gazetteer plus generated suburbs, `count` rows in all.
+
+    Generated suburbs sit within about 50 km of a bundled suburb in the same state.
+    """
+    rows = list(gazetteer if gazetteer is not None else load_gazetteer())
+    rng = random.Random(seed)
+    taken = {row["suburb"].lower() for row in rows}
+    anchors: Dict[str, List[Dict[str, str]]] = {}
+    for row in rows:
+        anchors.setdefault(row["state"], []).append(row)
+    states = list(STATE_POSTCODES)
+    state_weights = [STATE_POSTCODES[state][0] for state in states]
+
+    bases = len(SUBURB_STEMS) * len(SUBURB_LINKS) * len(SUBURB_SUFFIXES)
+    for name_id in rng.sample(range(bases * len(SUBURB_PREFIXES)), bases * len(SUBURB_PREFIXES)):
+        if len(rows) >= count:
+            break
+        prefix, base = divmod(name_id, bases)
+        stem, rest = divmod(base, len(SUBURB_LINKS) * len(SUBURB_SUFFIXES))
+        link, suffix = divmod(rest, len(SUBURB_SUFFIXES))
+        suburb = SUBURB_PREFIXES[prefix] + SUBURB_STEMS[stem] + SUBURB_LINKS[link] + SUBURB_SUFFIXES[suffix]
+        if suburb.lower() in taken:
+            continue
+        taken.add(suburb.lower())
+        state = rng.choices(states, state_weights)[0]
+        _, first, last = STATE_POSTCODES[state]
+        anchor = rng.choice(anchors[state])
+        rows.append({
+            "suburb": suburb,
+            "state": state,
+            "postcode": f"{rng.randint(first, last):04d}",
+            "latitude": f"{float(anchor['latitude']) + rng.uniform(-0.45, 0.45):.4f}",
+            "longitude": f"{float(anchor['longitude']) + rng.uniform(-0.45, 0.45):.4f}",
+        })
+    return rows
+
+
+def write_gazetteer(rows: List[Dict[str, str]], path: str) -> int:
+    """Write suburb,state,postcode,latitude,longitude rows in the bundled gazetteer's format"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, ["suburb", "state", "postcode", "latitude", "longitude"], extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def write_csv(properties: Iterator[Property], path: str) -> int:
+    """Write listings in the ingestion CSV format (gzip when path ends in .gz)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    written = 0
+    with opener(path, "wt", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "address", "price", "property_type", "bedrooms", "bathrooms", "car_spaces",
+                         "land_size", "features", "suburb", "state", "postcode", "listing_date"])
+        for prop in properties:
+            writer.writerow([prop.id, prop.address, prop.price, prop.property_type.value, prop.bedrooms,
+                             prop.bathrooms, prop.car_spaces, prop.land_size or "", "|".join(prop.features),
+                             prop.suburb, prop.state, prop.postcode, prop.listing_date.date().isoformat()])
+            written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic listing feed')
+    parser.add_argument('--listings', type=int, default=10000, help='Number of listings to generate')
+    parser.add_argument('--gazetteer', type=int, help='Write a suburb gazetteer of this many rows instead')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--out', required=True, help='Output .csv or .csv.gz path')
+
+    args = parser.parse_args()
+    if args.gazetteer:
+        written = write_gazetteer(synthetic_gazetteer(args.gazetteer, args.seed), args.out)
+        print(f"✅ Wrote {written:,} suburbs to {args.out}")
+        return
+    catalogue = SyntheticCatalogue(args.seed)
+    written = write_csv(catalogue.listings(args.listings), args.out)
+    print(f"✅ Wrote {written:,} listings to {args.out}")
+
+if __name__ == "__main__":
+    main()
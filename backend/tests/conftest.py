@@ -0,0 +1,27 @@
+"""Shared fixtures: the agents and benchmarks directories on sys.path, and a seeded catalogue"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for directory in ("agents", "benchmarks"):
+    path = os.path.join(BACKEND, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from ingestion import property_to_listing  # noqa: E402
+from synthetic import SyntheticCatalogue  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def properties():
+    """2,000 seeded synthetic Property records"""
+    return list(SyntheticCatalogue(seed=7).listings(2000))
+
+
+@pytest.fixture(scope="session")
+def listings(properties):
+    """The same records in listing-dict form"""
+    return [property_to_listing(prop) for prop in properties]
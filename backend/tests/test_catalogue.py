@@ -0,0 +1,135 @@
+import dataclasses
+from datetime import datetime
+
+import pytest
+from catalogue import COMPACT_DEAD_SHARE, VersionedCatalogue
+
+NOW = datetime(2026, 1, 1)
+FEATURES = ["Pool", "Garage", "Balcony"]
+
+
+def market(snapshot, places):
+    """Each place's suburb-wide summary as a tuple, days on market rounded off float summation order"""
+    summaries = {}
+    for place in places:
+        summary = snapshot.market_stats.summary(*place, now=NOW)
+        if summary is not None:
+            summary = dataclasses.replace(summary, average_days_on_market=round(summary.average_days_on_market, 6))
+        summaries[place] = summary
+    return summaries
+
+
+def observed(snapshot, places):
+    """Everything a reader can see in a catalogue snapshot: listings, feature matches and market figures"""
+    features = {
+        feature: sorted(snapshot.rows[row].id for row in snapshot.feature_index.properties_with_all([feature])
+                        if row < snapshot.size and snapshot.live[row])
+        for feature in FEATURES
+    }
+    return [prop.id for prop in snapshot.listings()], features, market(snapshot, places)
+
+
+def rebuilt(snapshot, places):
+    fresh = VersionedCatalogue()
+    fresh.replace(snapshot.listings())
+    return observed(fresh.snapshot(), places)
+
+
+def test_snapshots_are_isolated_across_upsert_delete_and_compaction(properties):
+    catalogue = VersionedCatalogue()
+    catalogue.replace(properties[:1500])
+    places = sorted({(prop.suburb, prop.state) for prop in properties[:1500]})[:40]
+    history = []
+
+    def write(change):
+        history.append((catalogue.snapshot(), observed(catalogue.snapshot(), places)))
+        change()
+        for snapshot, seen in history:
+            assert observed(snapshot, places) == seen
+        assert observed(catalogue.snapshot(), places) == rebuilt(catalogue.snapshot(), places)
+
+    # Price and feature changes to listed properties, plus new listings in the same suburbs
+    changed = [dataclasses.replace(prop, price=prop.price // 2, features=prop.features + ["Pool"])
+               for prop in properties[:1500:7]]
+    write(lambda: catalogue.upsert(changed + properties[1500:1600]))
+    write(lambda: catalogue.delete([prop.id for prop in properties[:300:3]] + ["missing"]))
+
+    # Enough deletes to cross the compaction threshold
+    live = catalogue.snapshot().listings()
+    doomed = [prop.id for prop in live[:int(len(live) * COMPACT_DEAD_SHARE) + 1]]
+    write(lambda: catalogue.delete(doomed))
+    assert catalogue.compactions == 1
+    assert catalogue.snapshot().size == catalogue.snapshot().live_count
+    assert catalogue.snapshot().rows is not history[0][0].rows
+
+    write(lambda: catalogue.upsert(properties[1600:1700]))
+
+
+def test_listing_snapshots_are_isolated_across_upsert_delete_and_compaction(listings):
+    pytest.importorskip("parlant")
+    from parlant_integration import ListingCatalogue
+
+    def seen(snapshot):
+        return ([listing["id"] for listing in snapshot.listings()],
+                [snapshot.rows[row]["id"] for row in snapshot.range_index.query(max_price=900000, bedrooms=3)],
+                sorted(snapshot.rows[row]["id"]
+                       for row in snapshot.range_index.query(candidates=snapshot.feature_index.properties_with_all(["Pool"]))))
+
+    catalogue = ListingCatalogue()
+    catalogue.replace(listings[:1500])
+    history = []
+
+    def write(change):
+        history.append((catalogue.snapshot(), seen(catalogue.snapshot())))
+        change()
+        for snapshot, expected in history:
+            assert seen(snapshot) == expected
+        fresh = ListingCatalogue()
+        fresh.replace(catalogue.snapshot().listings())
+        assert seen(catalogue.snapshot()) == seen(fresh.snapshot())
+
+    write(lambda: catalogue.upsert([dict(listing, price=listing["price"] // 2, features=listing["features"] + ["Pool"])
+                                    for listing in listings[:1500:7]] + listings[1500:1600]))
+    write(lambda: catalogue.delete([listing["id"] for listing in listings[:300:3]]))
+    live = catalogue.snapshot().listings()
+    write(lambda: catalogue.delete([listing["id"] for listing in live[:int(len(live) * COMPACT_DEAD_SHARE) + 1]]))
+    assert catalogue.compactions == 1
+    write(lambda: catalogue.upsert(listings[1600:1700]))
+
+
+def test_find_properties_with_features_skips_retired_rows(properties):
+    pytest.importorskip("parlant")
+    from property_agent_example import PropertyPersonalizationAgent
+
+    agent = PropertyPersonalizationAgent()
+    agent.replace_properties(properties[:1000])
+    agent.upsert_properties([dataclasses.replace(prop, features=["Pool", "Garage"]) for prop in properties[:50]])
+    agent.delete_properties([prop.id for prop in properties[50:400:2]])
+    for features in (["Pool"], ["pool", "Garage"], ["Pool", "Balcony", "Garage"], ["No such feature"]):
+        wanted = {feature.lower() for feature in features}
+        expected = [prop for prop in agent.properties if wanted <= {feature.lower() for feature in prop.features}]
+        assert agent.find_properties_with_features(features) == expected
+    agent.scoring_pool.close()
+
+
+def test_scoring_off_catalogue_listings_leaves_the_vocabulary_alone(properties):
+    pytest.importorskip("parlant")
+    from property_agent_example import PropertyPersonalizationAgent
+    from synthetic import SyntheticCatalogue
+
+    agent = PropertyPersonalizationAgent()
+    agent.replace_properties(properties[:200])
+    vocabulary = agent.feature_index.vocabulary
+    names = list(vocabulary.names)
+    profile = dataclasses.replace(SyntheticCatalogue(seed=5).profile("u1"), must_have_features=["Pool", "Sauna"])
+
+    listed = properties[0]
+    unlisted = dataclasses.replace(listed, id="unlisted", features=listed.features + ["Sauna", "Helipad"])
+    assert agent._property_feature_ids(listed) == agent.feature_index.features_of(0)
+    assert agent._property_feature_ids(unlisted) == agent.feature_index.features_of(0)
+    # A stale copy of a listed property is looked up too, not read from its row
+    assert agent._property_feature_ids(dataclasses.replace(listed, features=["Pool"])) == \
+        frozenset([vocabulary.lookup("Pool")])
+    assert agent._calculate_property_score(unlisted, profile, {}) == agent._calculate_property_score(listed, profile, {})
+    assert vocabulary.names == names
+    agent.scoring_pool.close()
@@ -0,0 +1,66 @@
+import dataclasses
+from datetime import datetime
+
+import numpy as np
+import pytest
+from catalogue_file import CatalogueFile, write_catalogue
+from feature_index import FeatureIndex
+from ingestion import property_to_listing
+from market_stats import MarketStats
+from property_store import PropertyStore
+from range_index import PropertyRangeIndex
+from synthetic import SyntheticCatalogue
+
+NOW = datetime(2026, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def catalogue_file(tmp_path_factory, properties):
+    path = str(tmp_path_factory.mktemp("catalogue") / "catalogue.bin")
+    assert write_catalogue(path, properties) == len(properties)
+    return CatalogueFile(path)
+
+
+def comparable(prop):
+    """A Property with the fields a catalogue file normalises: feature spelling and sub-millisecond dates"""
+    return dataclasses.replace(prop, features=[feature.lower() for feature in prop.features],
+                               listing_date=round(prop.listing_date.timestamp(), 3))
+
+
+def test_rows_round_trip(catalogue_file, properties):
+    assert len(catalogue_file) == len(properties)
+    rows = catalogue_file.rows()
+    for row, prop in enumerate(properties):
+        assert comparable(rows[row]) == comparable(prop)
+        assert catalogue_file.row_of(prop.id) == row
+    assert catalogue_file.row_of("missing") is None
+    assert catalogue_file.listing(5)["id"] == property_to_listing(properties[5])["id"]
+
+
+def test_indexes_match_in_memory_builds(catalogue_file, properties):
+    listings = [property_to_listing(prop) for prop in properties]
+    range_index = PropertyRangeIndex.from_listings(listings)
+    mapped_range = catalogue_file.range_index()
+    for criteria in ({}, {"max_price": 900000, "bedrooms": 3}, {"min_price": 1500000, "property_types": ["house"]},
+                     {"location": listings[10]["suburb"]}, {"location": listings[10]["state"], "min_bedrooms": 4}):
+        assert mapped_range.query(**criteria) == range_index.query(**criteria)
+
+    feature_index = FeatureIndex()
+    for position, prop in enumerate(properties):
+        feature_index.add(position, prop.features)
+    mapped_features = catalogue_file.feature_index()
+    for feature in feature_index.vocabulary.names:
+        assert set(mapped_features.properties_with_all([feature])) == feature_index.properties_with_all([feature])
+    assert mapped_features.features_of(7) == frozenset(
+        mapped_features.vocabulary.lookup(feature) for feature in properties[7].features)
+
+    market_stats = MarketStats.from_properties(properties)
+    mapped_market = catalogue_file.market_stats()
+    for suburb, state, property_type in market_stats.groups:
+        assert (mapped_market.summary(suburb, state, property_type, now=NOW)
+                == market_stats.summary(suburb, state, property_type, now=NOW))
+
+    store = PropertyStore.from_properties(properties)
+    mapped_store = catalogue_file.property_store()
+    for profile in (SyntheticCatalogue(seed=5).profile(f"user_{i}") for i in range(3)):
+        np.testing.assert_allclose(mapped_store.score(profile), store.score(profile), rtol=1e-12)
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("parlant")
+import chat_worker  # noqa: E402
+
+
+def answer(worker, *lines):
+    sent = []
+
+    async def send(response):
+        sent.append(response)
+
+    async def run():
+        await asyncio.gather(*(worker.handle_line(line, send) for line in lines))
+
+    asyncio.run(run())
+    return sent
+
+
+def test_invalid_lines_and_unknown_ops():
+    worker = chat_worker.ChatWorker()
+    sent = answer(worker, b"not json", b"[1, 2]", b'{"id": "1", "op": "launch"}', b'{"id": "2", "op": "chat"}',
+                  b'{"id": "3", "op": "chat_batch", "requests": []}')
+    by_id = {response["id"]: response for response in sent}
+    invalid = [response for response in sent if response["id"] is None]
+    assert len(invalid) == 2
+    assert all(response["status"] == "error" and response["error"].startswith("invalid request")
+               for response in invalid)
+    assert by_id["1"] == {"id": "1", "status": "error", "error": "unknown op: launch"}
+    assert by_id["2"] == {"id": "2", "status": "error", "error": "message is required"}
+    assert by_id["3"]["status"] == "error"
+    assert worker.in_flight == 0
+
+
+def test_requests_beyond_max_in_flight_are_busy(monkeypatch):
+    async def slow_chat(message, user_id="default"):
+        await asyncio.sleep(0.05)
+        return {"response": message}
+
+    async def slow_batch(pairs):
+        await asyncio.sleep(0.05)
+        return [{"status": "ok", "result": {"response": message}} for _, message in pairs]
+
+    monkeypatch.setattr(chat_worker, "chat_with_parlant", slow_chat)
+    monkeypatch.setattr(chat_worker, "chat_batch_with_parlant", slow_batch)
+    worker = chat_worker.ChatWorker(max_in_flight=2)
+    sent = answer(worker, b'{"id": "1", "message": "a"}', b'{"id": "2", "message": "b"}',
+                  b'{"id": "3", "message": "c"}', b'{"id": "4", "op": "chat_batch", "requests": [{"message": "d"}]}',
+                  b'{"id": "5", "op": "health"}')
+    by_id = {response["id"]: response for response in sent}
+    assert by_id["1"] == {"id": "1", "status": "ok", "result": {"response": "a"}}
+    assert by_id["2"]["status"] == "ok"
+    assert by_id["3"] == {"id": "3", "status": "busy", "error": "worker is at capacity"}
+    assert by_id["4"]["status"] == "busy"
+    # Health is answered even at capacity
+    assert by_id["5"]["result"]["in_flight"] == 2
+    assert worker.health()["rejected"] == 2
+    assert worker.in_flight == 0
+
+    assert answer(worker, b'{"id": "6", "message": "e"}')[0]["status"] == "ok"
+
+
+def test_metrics_op_exports_prometheus_text_and_json(monkeypatch):
+    async def chat(message, user_id="default"):
+        with chat_worker.metrics.span("filter_properties"):
+            pass
+        return {"response": message}
+
+    monkeypatch.setattr(chat_worker, "chat_with_parlant", chat)
+    chat_worker.metrics.reset()
+    worker = chat_worker.ChatWorker()
+    answer(worker, b'{"id": "1", "message": "a"}')
+    prometheus, snapshot = answer(worker, b'{"id": "2", "op": "metrics"}',
+                                  b'{"id": "3", "op": "metrics", "format": "json"}')
+
+    assert prometheus["status"] == "ok"
+    assert prometheus["result"]["content_type"] == "text/plain; version=0.0.4"
+    text = prometheus["result"]["text"]
+    assert 'property_chat_span_duration_seconds_count{span="worker_chat"} 1' in text
+    assert 'property_chat_span_duration_seconds_count{span="filter_properties"} 1' in text
+
+    assert snapshot["result"]["spans"]["worker_chat"]["count"] == 1
+    assert snapshot["result"]["worker"]["served"] == 1
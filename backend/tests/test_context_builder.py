@@ -0,0 +1,42 @@
+import json
+
+import pytest
+from context_builder import ContextBuilder
+from property_models import PropertyType, UserProfile, UserType
+from datetime import datetime
+
+
+@pytest.fixture
+def profile():
+    return UserProfile(
+        user_id="u1", name="Sam", user_type=UserType.FIRST_TIME_BUYER, budget_min=500000, budget_max=900000,
+        preferred_suburbs=["Richmond"], property_types=[PropertyType.APARTMENT], must_have_features=["Parking"],
+        nice_to_have_features=[], deal_breakers=[], search_history=[], saved_properties=[],
+        last_interaction=datetime(2024, 1, 1),
+    )
+
+
+@pytest.mark.parametrize("max_bytes", [400, 1200, 2500, 6000])
+def test_payload_fits_budget_and_is_filled_greedily(properties, profile, max_bytes):
+    builder = ContextBuilder(max_bytes=max_bytes, shortlist_size=20)
+    history = [{"role": "user", "content": "two bedrooms near the city"}]
+    context = builder.build(profile, properties[:20], search_criteria={"bedrooms": 2},
+                            conversation_history=history)
+
+    shortlist = context["available_properties"]
+    assert isinstance(shortlist, list)
+    assert shortlist == [builder.property_summary(prop) for prop in properties[:len(shortlist)]]
+    assert len(json.dumps(context)) <= max_bytes
+    if len(shortlist) < 20:
+        # The next summary would have gone over
+        grown = dict(context, available_properties=shortlist + [builder.property_summary(properties[len(shortlist)])])
+        assert len(json.dumps(grown)) > max_bytes
+
+
+def test_invalidate_refreshes_summary(properties, profile):
+    builder = ContextBuilder()
+    prop = properties[0]
+    assert builder.property_summary(prop)["price"] == prop.price
+    prop = type(prop)(**{**prop.__dict__, "price": prop.price + 1000})
+    builder.invalidate(prop.id)
+    assert builder.property_summary(prop)["price"] == prop.price
@@ -0,0 +1,88 @@
+from conversation_history import SUMMARY_SNIPPET_CHARS, TURN_OVERHEAD_BYTES, ConversationHistory, extractive_summary
+
+
+def chat(history, count, start=0):
+    for i in range(start, start + count):
+        history.append("user", f"request {i}", at=float(i))
+        history.append("assistant", f"reply {i}", at=float(i))
+
+
+def test_turn_window_evicts_oldest_in_batches():
+    history = ConversationHistory(max_turns=6, compact_batch=4)
+    chat(history, 3)
+    assert len(history) == 6 and history.summary is None
+
+    history.append("user", "request 3", at=3.0)
+    # One turn over the limit compacts a whole batch
+    assert [turn.text for turn in history.turns] == ["request 2", "reply 2", "request 3"]
+    assert history.summarised_turns == 4
+    assert history.compactions == 1
+    assert history.summary == "request 1 | request 0"
+    assert history.bytes == sum(turn.size for turn in history.turns)
+
+    chat(history, 20, start=4)
+    assert len(history) <= 6
+    assert history.summarised_turns + len(history) == 47
+    assert history.turns[-1].text == "reply 23"
+
+
+def test_byte_budget_keeps_the_newest_turn():
+    history = ConversationHistory(max_turns=100, max_bytes=400, compact_batch=1)
+    for i in range(20):
+        history.append("user", f"{i:02d} " + "x" * 60)
+        assert history.bytes <= 400
+    assert history.turns[-1].text.startswith("19 ")
+
+    history.append("assistant", "é" * 1000)
+    assert len(history) == 1
+    assert history.bytes <= 400
+    assert history.turns[0].size <= 400
+    assert history.turns[0].text == "é" * ((400 - TURN_OVERHEAD_BYTES) // 2)
+
+
+def test_summary_folds_newest_user_requests_first_within_its_cap():
+    long_request = "3 bed   house\nin Carlton " + "near schools " * 20
+    history = ConversationHistory(max_turns=2, compact_batch=2, max_summary_bytes=100)
+    history.append("user", long_request)
+    history.append("assistant", "Here are three houses")
+    history.append("user", "under 900k")
+    snippet = history.summary
+    assert snippet.startswith("3 bed house in Carlton near schools")
+    assert snippet.endswith("…") and len(snippet) == SUMMARY_SNIPPET_CHARS
+    assert "Here are" not in snippet
+
+    history.append("assistant", "Two of them are under 900k")
+    history.append("user", "with a pool")
+    assert history.summary == f"under 900k | {snippet}"
+
+    # Once the cap is reached the oldest clauses fall off first
+    history.append("assistant", "One has a pool")
+    history.append("user", "what about Brunswick?")
+    assert history.summary == "with a pool | under 900k"
+    assert extractive_summary("older", [], 100) == "older"
+
+
+def test_custom_summariser_and_record_round_trip():
+    calls = []
+
+    def summariser(previous, turns, max_bytes):
+        calls.append((previous, [turn.text for turn in turns], max_bytes))
+        return f"{previous or ''}+{len(turns)}"
+
+    history = ConversationHistory(max_turns=3, compact_batch=2, max_summary_bytes=50, summariser=summariser)
+    chat(history, 4)
+    assert calls[0] == (None, ["request 0", "reply 0"], 50)
+    assert calls[1][0] == "+2"
+    assert history.to_context()[0] == {"role": "summary", "text": history.summary,
+                                       "turns": history.summarised_turns}
+    assert history.to_context()[1:] == [turn.to_dict() for turn in history.turns]
+
+    restored = ConversationHistory.from_record(history.to_record())
+    assert restored.to_context() == history.to_context()
+    assert restored.bytes == history.bytes
+
+    # Tighter options than the record was written with compact on load
+    tighter = ConversationHistory.from_record(history.to_record(), max_turns=1, compact_batch=1)
+    assert len(tighter) == 1
+    assert tighter.summarised_turns == history.summarised_turns + len(history) - 1
+    assert ConversationHistory.from_record(None).to_context() == []
@@ -0,0 +1,56 @@
+import pytest
+from criteria_extractor import CriteriaExtractor
+from synthetic import synthetic_gazetteer
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return CriteriaExtractor()
+
+
+@pytest.mark.parametrize("message, budget_min, budget", [
+    ("townhouse between 600k and 900k", 600000, 900000),
+    ("between $1.2m and $1.5m in Richmond", 1200000, 1500000),
+    ("looking at 600k-900k", 600000, 900000),
+    ("anything from $700,000 to $850,000", 700000, 850000),
+    ("between 900k and 600k", 600000, 900000),
+])
+def test_budget_ranges_keep_upper_bound_as_budget(extractor, message, budget_min, budget):
+    criteria = extractor.extract(message).criteria
+    assert (criteria["budget_min"], criteria["budget"]) == (budget_min, budget)
+
+
+@pytest.mark.parametrize("message, budget", [
+    ("3 bed house under $1M", 1000000),
+    ("house for 900k and 2 car spaces", 900000),
+    ("two bedroom unit, budget $650,000", 650000),
+])
+def test_single_budgets(extractor, message, budget):
+    criteria = extractor.extract(message).criteria
+    assert criteria["budget"] == budget
+    assert "budget_min" not in criteria
+
+
+@pytest.mark.parametrize("message, location, state", [
+    ("2 bedroom apartment in Victoria Park", "victoria park", "WA"),
+    ("house near Victoria Point", "victoria point", "QLD"),
+    ("unit in North Sydney NSW", "north sydney", "NSW"),
+    ("apartment in South Yarra", "south yarra", "VIC"),
+    ("house in Victoria", "vic", "VIC"),
+    ("anything in Western Australia", "wa", "WA"),
+])
+def test_multi_word_suburbs_win_over_state_names(extractor, message, location, state):
+    criteria = extractor.extract(message).criteria
+    assert (criteria["location"], criteria["state"]) == (location, state)
+
+
+def test_national_sized_gazetteer():
+    gazetteer = synthetic_gazetteer(16000, seed=1)
+    assert len(gazetteer) == 16000
+    extractor = CriteriaExtractor(gazetteer)
+    generated = gazetteer[-1]
+    criteria = extractor.extract(f"3 bed house in {generated['suburb']} between 500k and 700k").criteria
+    assert criteria["location"] == generated["suburb"].lower()
+    assert (criteria["budget_min"], criteria["budget"], criteria["bedrooms"]) == (500000, 700000, 3)
+    # Bundled suburbs are still matched
+    assert extractor.extract("apartment in Victoria Park").criteria["location"] == "victoria park"
@@ -0,0 +1,41 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("parlant")
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "docs", "examples")
+
+
+class JSONChatAgent:
+    """Stands in for the Parlant agent; serialises every context as a real LLM call would"""
+
+    def __init__(self):
+        self.contexts = []
+
+    async def chat(self, message, context):
+        self.contexts.append(json.loads(json.dumps(context)))
+        return "Here are a few listings that match what you're after."
+
+
+def test_demo_runs(monkeypatch, capsys):
+    monkeypatch.syspath_prepend(EXAMPLES)
+    import demo_usage
+    from property_agent_example import PropertyPersonalizationAgent
+
+    chat_agent = JSONChatAgent()
+
+    async def initialize(agent):
+        agent.agent = chat_agent
+        await agent._load_sample_data()
+
+    monkeypatch.setattr(PropertyPersonalizationAgent, "initialize", initialize)
+
+    asyncio.run(demo_usage.demo_property_search())
+    asyncio.run(demo_usage.demo_api_integration())
+
+    assert "Demo completed successfully" in capsys.readouterr().out
+    assert all(isinstance(context["available_properties"], list) for context in chat_agent.contexts)
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from geo_index import LOCATION_HALF_DISTANCE_KM, LOCATION_RADIUS_KM, GeoIndex, haversine_km, location_decay
+
+# (lat, lon, spread in degrees): dense metro clusters plus a thin national scatter
+CLUSTERS = [(-37.81, 144.96, 0.4), (-33.87, 151.21, 0.4), (-27.47, 153.03, 0.3), (-25.0, 134.0, 12.0)]
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(11)
+    lats, lons = [], []
+    for lat, lon, spread in CLUSTERS:
+        lats.append(rng.normal(lat, spread, 3000))
+        lons.append(rng.normal(lon, spread, 3000))
+    lats, lons = np.concatenate(lats), np.concatenate(lons)
+    # Ungeocoded listings are stored as NaN and never match
+    lats[::97] = np.nan
+    lons[::97] = np.nan
+    return lats, lons
+
+
+@pytest.fixture(scope="module")
+def index(points):
+    lats, lons = points
+    index = GeoIndex()
+    # Batches arrive out of position order, as upserts do
+    order = np.random.default_rng(12).permutation(len(lats))
+    for batch in np.array_split(order, 7):
+        index.add_many(batch, lats[batch], lons[batch])
+    return index
+
+
+@pytest.mark.parametrize("lat, lon", [(-37.82, 144.99), (-33.9, 151.2), (-27.5, 153.0), (-31.95, 115.86),
+                                      (-12.46, 130.84)])
+@pytest.mark.parametrize("radius_km", [0.5, 3, 10, 40, 150, 1500])
+def test_radius_queries_match_brute_force_haversine(index, points, lat, lon, radius_km):
+    lats, lons = points
+    distances = haversine_km(lat, lon, lats, lons)
+    expected = np.flatnonzero(distances <= radius_km)
+    positions, found = index.within(lat, lon, radius_km)
+    assert positions.tolist() == expected.tolist()
+    np.testing.assert_array_equal(found, distances[expected])
+
+
+def test_len_counts_geocoded_points_and_late_additions_are_found(points):
+    lats, lons = points
+    index = GeoIndex()
+    index.add_many(np.arange(len(lats)), lats, lons)
+    assert len(index) == np.count_nonzero(~np.isnan(lats))
+
+    before, _ = index.within(-37.81, 144.96, 5)
+    index.add_many([len(lats) + 5], [-37.81], [144.96])
+    after, distances = index.within(-37.81, 144.96, 5)
+    assert after.tolist() == before.tolist() + [len(lats) + 5]
+    assert distances[-1] == 0.0
+
+
+def test_location_decay_halves_and_cuts_off():
+    distances = np.array([0.0, LOCATION_HALF_DISTANCE_KM, 2 * LOCATION_HALF_DISTANCE_KM, LOCATION_RADIUS_KM,
+                          LOCATION_RADIUS_KM + 0.1, np.nan])
+    decay = location_decay(distances)
+    np.testing.assert_allclose(decay[:3], [1.0, 0.5, 0.25])
+    assert decay[3] > 0
+    assert decay[4] == 0 and decay[5] == 0
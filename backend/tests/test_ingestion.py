@@ -0,0 +1,56 @@
+import csv
+
+import pytest
+from ingestion import CatalogueBuilder, ListingBuilder, iter_rows, property_to_listing
+from synthetic import write_csv
+
+
+@pytest.fixture(scope="module")
+def feed(tmp_path_factory, properties):
+    path = str(tmp_path_factory.mktemp("feed") / "listings.csv.gz")
+    write_csv(iter(properties[:500]), path)
+    return path
+
+
+def test_listing_builder_matches_catalogue_builder(feed):
+    catalogue = CatalogueBuilder()
+    catalogue.ingest(iter_rows(feed), batch_size=64)
+    listings = ListingBuilder()
+    stats = listings.ingest(iter_rows(feed), batch_size=64)
+
+    assert stats.rows_loaded == 500
+    assert listings.listings == [property_to_listing(prop) for prop in catalogue.properties]
+    assert listings.range_index.query(max_price=900000) == catalogue.range_index.query(max_price=900000)
+    assert listings.feature_index.properties_with_all(["Pool"]) == {
+        position for position, listing in enumerate(listings.listings) if "Pool" in listing["features"]}
+    assert listings.row_history == {listing["id"]: [position] for position, listing in enumerate(listings.listings)}
+
+
+def test_listing_builder_rejects_invalid_rows(tmp_path):
+    path = str(tmp_path / "bad.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "address", "price", "property_type", "bedrooms", "suburb", "state", "postcode"])
+        writer.writerow(["a", "1 High St", "500000", "house", "3", "Richmond", "VIC", "3121"])
+        writer.writerow(["b", "2 High St", "-1", "house", "3", "Richmond", "VIC", "3121"])
+        writer.writerow(["c", "3 High St", "700000", "castle", "3", "Richmond", "VIC", "3121"])
+    builder = ListingBuilder()
+    stats = builder.ingest(iter_rows(path))
+    assert (stats.rows_read, stats.rows_loaded, stats.rows_rejected) == (3, 1, 2)
+    assert [listing["id"] for listing in builder.listings] == ["a"]
+    assert len(stats.errors) == 2
+
+
+def test_parlant_load_listings_serves_the_feed(feed, properties):
+    pytest.importorskip("parlant")
+    from parlant_integration import PropertyParlantAgent
+
+    loaded = PropertyParlantAgent()
+    loaded.load_listings(feed, batch_size=64)
+    expected = PropertyParlantAgent()
+    expected.set_listings([property_to_listing(prop) for prop in properties[:500]])
+
+    assert loaded.properties == expected.properties
+    for criteria in ({}, {"budget": 900000, "bedrooms": 3}, {"features": ["Pool"], "property_type": "house"},
+                     {"location": "vic", "budget": 1200000}):
+        assert loaded._filter_properties(criteria) == expected._filter_properties(criteria)
@@ -0,0 +1,92 @@
+import re
+import time
+
+import numpy as np
+from instrumentation import PROMETHEUS_BUCKETS, SUB_BUCKET_BITS, Instrumentation, LatencyHistogram, request_timings
+
+# Values are reported at their bucket's upper edge, at most one sub-bucket above the true value
+RELATIVE_ERROR = 2.0 ** -SUB_BUCKET_BITS
+
+LINE = re.compile(r'^(?P<metric>[a-z_]+)(\{(?P<labels>[^}]*)\})? (?P<value>\S+)$')
+
+
+def latencies(count=20000, seed=3):
+    """Microsecond latencies spanning microseconds to tens of seconds"""
+    return np.random.default_rng(seed).lognormal(mean=8, sigma=2.5, size=count).astype(np.int64)
+
+
+def test_spans_record_into_histograms_and_request_timings():
+    registry = Instrumentation()
+    with request_timings() as timings:
+        for _ in range(3):
+            with registry.span("filter_properties"):
+                time.sleep(0.01)
+    registry.count("canned_responses")
+    registry.count("canned_responses", 2)
+
+    snapshot = registry.snapshot()
+    span = snapshot["spans"]["filter_properties"]
+    assert span["count"] == 3
+    assert 10 <= span["min_ms"] <= span["p50_ms"] <= span["max_ms"] < 1000
+    assert snapshot["counters"] == {"canned_responses": 3}
+    assert timings["filter_properties"] >= 30
+
+    disabled = Instrumentation(enabled=False)
+    with disabled.span("filter_properties"):
+        pass
+    disabled.count("canned_responses")
+    assert disabled.snapshot() == {"spans": {}, "counters": {}}
+
+
+def test_percentiles_are_within_one_sub_bucket():
+    values = latencies()
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(int(value))
+    ordered = np.sort(values)
+    for q in (1, 25, 50, 90, 99, 99.9, 100):
+        exact = ordered[max(1, int(q / 100.0 * len(values) + 0.5)) - 1]
+        reported = histogram.percentile(q) * 1000
+        assert exact <= reported <= exact * (1 + RELATIVE_ERROR), q
+        assert abs(reported - np.percentile(values, q)) <= np.percentile(values, q) * 2 * RELATIVE_ERROR + 1, q
+    assert histogram.percentile(100) == values.max() / 1000
+    assert histogram.snapshot()["min_ms"] == values.min() / 1000
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_prometheus_exposition():
+    values = latencies(5000)
+    registry = Instrumentation(namespace="test")
+    for value in values:
+        registry.record("generate_response", int(value))
+    registry.record("extract_criteria", 120)
+    registry.count("worker_busy", 4)
+    text = registry.prometheus()
+    assert text.endswith("\n")
+
+    lines = text.splitlines()
+    assert lines[:2] == ["# HELP test_span_duration_seconds Duration of instrumented chat pipeline spans.",
+                         "# TYPE test_span_duration_seconds histogram"]
+    assert "# TYPE test_worker_busy_total counter" in lines
+    samples = {}
+    for line in lines:
+        if line.startswith("#"):
+            continue
+        match = LINE.match(line)
+        assert match, line
+        samples[(match["metric"], match["labels"])] = float(match["value"])
+    assert samples[("test_worker_busy_total", None)] == 4
+
+    span = 'span="generate_response"'
+    buckets = [samples[("test_span_duration_seconds_bucket", f'{span},le="{bound}"')] for bound in PROMETHEUS_BUCKETS]
+    assert buckets == sorted(buckets)
+    for bound, cumulative in zip(PROMETHEUS_BUCKETS, buckets):
+        # A bucket straddling the bound is left out, so counts may lag by values within one sub-bucket of it
+        at_or_below = np.count_nonzero(values <= bound * 1e6)
+        assert np.count_nonzero(values <= bound * 1e6 / (1 + RELATIVE_ERROR)) <= cumulative <= at_or_below, bound
+    assert samples[("test_span_duration_seconds_bucket", f'{span},le="+Inf"')] == len(values)
+    assert samples[("test_span_duration_seconds_count", span)] == len(values)
+    assert samples[("test_span_duration_seconds_sum", span)] == values.sum() / 1e6
+    assert samples[("test_span_duration_seconds_count", 'span="extract_criteria"')] == 1
+
+    assert Instrumentation().prometheus() == "\n"
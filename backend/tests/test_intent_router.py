@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from criteria_extractor import get_extractor
+from intent_router import (BROWSE, FIXED_REPLIES, FLINK, GENERAL_QUESTION, GREETING, JOKE, JOKES, SEARCH, render,
+                           render_response, response_variant, route)
+
+ROUTES = [
+    ("hi, 3 bed house in Carlton", SEARCH, False),
+    ("Hey, anything under $800k with a pool?", SEARCH, False),
+    ("tell me a joke about 2 bed apartments in Richmond", SEARCH, False),
+    ("Hello!", GREETING, True),
+    ("tell me a joke", JOKE, True),
+    ("what is apache flink?", FLINK, True),
+    ("explain how auctions work", GENERAL_QUESTION, True),
+    ("show me some places", BROWSE, True),
+]
+
+
+@pytest.mark.parametrize("message, intent, canned", ROUTES)
+def test_criteria_take_precedence_and_only_criteria_free_messages_are_canned(message, intent, canned):
+    extraction = get_extractor().extract(message)
+    assert route(extraction.keywords, extraction.criteria) == (intent, canned)
+    assert canned == (not extraction.criteria)
+
+
+def test_rendering_is_memoised_on_signatures():
+    render_response.cache_clear()
+    criteria = {"bedrooms": 3, "property_type": "house", "features": ["Pool", "Garage"]}
+    first = render(SEARCH, "3 bed house with pool and garage", criteria, ["a", "b"])
+    assert first == "Perfect! I found 2 properties matching your criteria: with 3 bedrooms (houses) with pool, garage. " \
+                    "Here are the best options:"
+    # Key order, message wording and which listings matched don't change the reply, only how many did
+    again = render(SEARCH, "houses, 3 beds, pool + garage", dict(reversed(list(criteria.items()))), ["c", "d"])
+    assert again is first
+    assert render_response.cache_info().hits == 1
+    assert render(SEARCH, "3 bed house", criteria, ["a"]) != first
+    assert render_response.cache_info().misses == 2
+
+    assert render(GREETING, "hello", {}, ["a"]) == FIXED_REPLIES[GREETING]
+    assert render(SEARCH, "3 bed house", criteria, []).startswith("I couldn't find any properties")
+    assert render(BROWSE, "show me", {}, ["a"]) == "Here are some great properties I found for you:"
+
+
+def test_joke_variant_is_stable_across_spelling_of_the_same_message():
+    variant = response_variant(JOKE, "Tell me a joke")
+    assert variant == response_variant(JOKE, "  tell me   a JOKE ")
+    assert render(JOKE, "Tell me a joke", {}, []) == JOKES[variant]
+    assert response_variant(GREETING, "hi") == 0
+
+
+def test_canned_messages_skip_filtering_and_searches_with_greetings_do_not():
+    pytest.importorskip("parlant")
+    from parlant_integration import PropertyParlantAgent
+
+    agent = PropertyParlantAgent()
+    agent.is_initialized = True
+    filtered = []
+    filter_properties = agent._filter_properties
+
+    def counting_filter(criteria, snapshot=None):
+        filtered.append(criteria)
+        return filter_properties(criteria, snapshot)
+
+    agent._filter_properties = counting_filter
+    agent._canned_shortlist()
+    filtered.clear()
+
+    greeting = asyncio.run(agent.chat("Hello!"))
+    assert greeting["response"] == FIXED_REPLIES[GREETING]
+    assert filtered == []
+
+    search = asyncio.run(agent.chat("hi, 3 bed house in Carlton"))
+    assert search["response"] != FIXED_REPLIES[GREETING]
+    assert filtered == [search["criteria"]]
@@ -0,0 +1,84 @@
+import dataclasses
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import pytest
+from market_stats import RELATIVE_ACCURACY, MarketStats, QuantileSketch, price_per_sqm
+
+NOW = datetime(2026, 1, 1)
+QUANTILES = (0.0, 0.01, 0.25, 0.5, 0.75, 0.99, 1.0)
+
+
+def assert_within_relative_accuracy(sketch, values):
+    for q in QUANTILES:
+        # The sketch reports a value near the element at rank q * (n - 1), rounded down
+        exact = np.percentile(values, q * 100, method="lower")
+        assert abs(sketch.quantile(q) - exact) <= exact * RELATIVE_ACCURACY * (1 + 1e-9), q
+
+
+def test_sketch_quantiles_are_within_the_relative_accuracy():
+    rng = np.random.default_rng(4)
+    values = np.round(rng.lognormal(mean=13.6, sigma=0.6, size=20000), -3)
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(float(value))
+    sketch.add(0)
+    sketch.add(-5)
+    assert sketch.count == len(values)
+    assert_within_relative_accuracy(sketch, values)
+
+    # Deletes keep the guarantee for what remains
+    for value in values[::2]:
+        sketch.remove(float(value))
+    sketch.remove(123.0)
+    assert sketch.count == len(values[1::2])
+    assert_within_relative_accuracy(sketch, values[1::2])
+
+    for value in values[1::2]:
+        sketch.remove(float(value))
+    assert sketch.quantile(0.5) is None and not sketch.buckets
+
+
+def test_group_figures_match_the_listings(properties):
+    stats = MarketStats.from_properties(properties)
+    (suburb, state), _ = Counter((prop.suburb, prop.state) for prop in properties).most_common(1)[0]
+    group = [prop for prop in properties if (prop.suburb, prop.state) == (suburb, state)]
+    summary = stats.summary(suburb, state, now=NOW)
+    prices = [prop.price for prop in group]
+    assert summary.listings == len(group)
+    for quantile, figure in ((0.5, summary.median_price), (0.25, summary.lower_quartile_price),
+                             (0.75, summary.upper_quartile_price)):
+        exact = np.percentile(prices, quantile * 100, method="lower")
+        assert abs(figure - exact) <= exact * RELATIVE_ACCURACY
+    rates = [price_per_sqm(prop) for prop in group if price_per_sqm(prop) is not None]
+    if rates:
+        exact = np.percentile(rates, 50, method="lower")
+        assert abs(summary.median_price_per_sqm - exact) <= exact * RELATIVE_ACCURACY
+    days = [(NOW - prop.listing_date).total_seconds() / 86400 for prop in group]
+    assert summary.average_days_on_market == pytest.approx(np.mean(days))
+
+
+def test_copy_then_remove_leaves_the_original_untouched(properties):
+    original = MarketStats.from_properties(properties[:1500])
+    before = {key: original.summary(*key, now=NOW) for key in original.groups}
+
+    clone = original.copy()
+    removed = properties[:1500:3]
+    clone.remove(removed)
+    clone.add([dataclasses.replace(prop, price=prop.price * 2) for prop in removed[:50]] + properties[1500:1600])
+
+    assert {key: original.summary(*key, now=NOW) for key in original.groups} == before
+
+    # The clone matches stats built from scratch over what it now holds
+    removed_ids = {prop.id for prop in removed}
+    kept = [prop for prop in properties[:1500] if prop.id not in removed_ids]
+    rebuilt = MarketStats.from_properties(kept + [dataclasses.replace(prop, price=prop.price * 2)
+                                                  for prop in removed[:50]] + properties[1500:1600])
+    assert set(clone.groups) == set(rebuilt.groups)
+    for key in rebuilt.groups:
+        expected = rebuilt.summary(*key, now=NOW)
+        actual = clone.summary(*key, now=NOW)
+        assert actual.listings == expected.listings
+        assert actual.median_price == expected.median_price
+        assert actual.average_days_on_market == pytest.approx(expected.average_days_on_market)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("parlant")
+import chat_worker  # noqa: E402
+import parlant_integration  # noqa: E402
+from parlant_integration import CHAT_ERROR_MESSAGE, PropertyParlantAgent  # noqa: E402
+
+SECRET = "connection string postgres://admin:hunter2@db"
+
+
+@pytest.fixture
+def agent():
+    agent = PropertyParlantAgent()
+    agent.is_initialized = True
+    return agent
+
+
+class SlowLLM:
+    """Awaited chat call that tracks how many run at once"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def chat(self, message, context):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return f"{len(context['available_properties'])} listings for: {message}"
+
+
+def test_chat_errors_do_not_leak_exception_text(agent, monkeypatch):
+    filter_properties = agent._filter_properties
+
+    def failing_filter(criteria, snapshot=None):
+        if criteria:
+            raise RuntimeError(SECRET)
+        return filter_properties(criteria, snapshot)
+
+    monkeypatch.setattr(agent, "_filter_properties", failing_filter)
+    result = asyncio.run(agent.chat("3 bed house in Richmond"))
+    assert result["type"] == "error"
+    assert result["error"] == CHAT_ERROR_MESSAGE
+    assert SECRET not in json.dumps(result)
+
+    batch = asyncio.run(agent.chat_batch([("u1", "3 bed house in Richmond"), ("u2", "hello")]))
+    assert batch[0] == {"status": "error", "error": CHAT_ERROR_MESSAGE}
+    assert batch[1]["status"] == "ok"
+
+
+def test_worker_errors_do_not_leak_exception_text(monkeypatch):
+    async def failing_chat(message, user_id="default"):
+        raise RuntimeError(SECRET)
+
+    async def failing_batch(pairs):
+        raise RuntimeError(SECRET)
+
+    monkeypatch.setattr(chat_worker, "chat_with_parlant", failing_chat)
+    monkeypatch.setattr(chat_worker, "chat_batch_with_parlant", failing_batch)
+    worker = chat_worker.ChatWorker()
+    sent = []
+
+    async def send(response):
+        sent.append(response)
+
+    async def run():
+        await worker.handle_line(b'{"id": "1", "message": "3 bed house"}', send)
+        await worker.handle_line(b'{"id": "2", "op": "chat_batch", "requests": [{"message": "hi"}]}', send)
+
+    asyncio.run(run())
+    assert sent == [{"id": "1", "status": "error", "error": CHAT_ERROR_MESSAGE},
+                    {"id": "2", "status": "error", "error": CHAT_ERROR_MESSAGE}]
+
+
+def test_template_replies_do_not_take_the_llm_semaphore(agent, monkeypatch):
+    monkeypatch.setattr(parlant_integration, "LLM_RESPONSES", False)
+    agent.llm_semaphore = asyncio.Semaphore(0)
+    result = asyncio.run(asyncio.wait_for(agent.chat("2 bed apartment in Brisbane"), 5))
+    assert result["type"] == "parlant_ai"
+
+
+def test_llm_calls_overlap_up_to_the_semaphore(agent, monkeypatch):
+    monkeypatch.setattr(parlant_integration, "LLM_RESPONSES", True)
+    agent.agent = SlowLLM(delay=0.2)
+
+    async def run():
+        agent.llm_semaphore = asyncio.Semaphore(4)
+        started = time.perf_counter()
+        results = await agent.chat_batch([(f"u{i}", "2 bed apartment in Brisbane") for i in range(8)])
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run())
+    assert all(result["status"] == "ok" for result in results)
+    assert results[0]["result"]["response"].endswith("for: 2 bed apartment in Brisbane")
+    assert agent.agent.peak == 4
+    # Two waves of four overlapping calls, not eight in a row
+    assert elapsed < 0.2 * 8 / 2
+
+
+class StreamingLLM:
+    """Model that streams its reply, holding the rest back until released"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.finished = False
+
+    async def chat(self, message, context):
+        raise AssertionError("streamed chats must not wait for the whole reply")
+
+    async def chat_stream(self, message, context):
+        yield "Here are "
+        await self.release.wait()
+        yield f"{len(context['available_properties'])} listings."
+        self.finished = True
+
+
+def test_stream_forwards_model_chunks_before_the_reply_completes(agent, monkeypatch):
+    monkeypatch.setattr(parlant_integration, "LLM_RESPONSES", True)
+    agent.agent = StreamingLLM()
+
+    async def run():
+        stream = agent.chat_stream("2 bed apartment in Brisbane")
+        assert (await stream.__anext__())["event"] == "recommendations"
+        first = await asyncio.wait_for(stream.__anext__(), 5)
+        assert first == {"event": "token", "text": "Here are "}
+        assert not agent.agent.finished
+        agent.agent.release.set()
+        return [first] + [event async for event in stream]
+
+    events = asyncio.run(run())
+    tokens = "".join(event["text"] for event in events if event["event"] == "token")
+    assert events[-1]["event"] == "done"
+    assert events[-1]["result"]["response"] == tokens
+    assert tokens.startswith("Here are ") and tokens.endswith(" listings.")
+
+
+def test_streams_do_not_wait_on_the_batch_limit(agent, monkeypatch):
+    monkeypatch.setattr(parlant_integration, "LLM_RESPONSES", True)
+    agent.agent = StreamingLLM()
+    agent.agent.release.set()
+
+    async def run():
+        # Every batch slot is taken; a stream still gets its own
+        agent.llm_semaphore = asyncio.Semaphore(0)
+        return [event async for event in agent.chat_stream("2 bed apartment in Brisbane")]
+
+    events = asyncio.run(asyncio.wait_for(run(), 5))
+    assert events[-1]["event"] == "done"
+    assert agent.stream_semaphore._value == parlant_integration.LLM_STREAM_MAX_CONCURRENCY
+
+
+def test_batch_results_keep_request_order_with_per_item_errors(agent, monkeypatch):
+    monkeypatch.setattr(parlant_integration, "LLM_RESPONSES", True)
+
+    class OutOfOrderLLM:
+        async def chat(self, message, context):
+            if "Hobart" in message:
+                raise RuntimeError(SECRET)
+            # Earlier requests finish last
+            await asyncio.sleep(0.05 * (5 - int(message.split()[0])))
+            return f"reply to {message}"
+
+    agent.agent = OutOfOrderLLM()
+    messages = [f"{bedrooms} bed apartment in {'Hobart' if bedrooms == 2 else 'Brisbane'}" for bedrooms in range(1, 5)]
+    results = asyncio.run(agent.chat_batch([(f"u{i}", message) for i, message in enumerate(messages)]))
+    assert [result["status"] for result in results] == ["ok", "error", "ok", "ok"]
+    assert results[1] == {"status": "error", "error": CHAT_ERROR_MESSAGE}
+    for message, result in zip(messages, results):
+        if result["status"] == "ok":
+            assert result["result"]["response"] == f"reply to {message}"
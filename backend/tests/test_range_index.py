@@ -0,0 +1,95 @@
+import random
+
+import pytest
+from range_index import PropertyRangeIndex
+
+
+def reference_filter(listings, live, max_price=None, min_price=None, bedrooms=None, min_bedrooms=None,
+                     property_types=None, location=None, candidates=None, limit=None):
+    """The list-comprehension filter the index replaced, over the live positions"""
+    location = location.lower() if location is not None else None
+    matches = [
+        position for position, listing in enumerate(listings)
+        if position in live
+        and (max_price is None or listing["price"] <= max_price)
+        and (min_price is None or listing["price"] >= min_price)
+        and (bedrooms is None or listing["bedrooms"] == bedrooms)
+        and (min_bedrooms is None or listing["bedrooms"] >= min_bedrooms)
+        and (property_types is None or listing["property_type"] in property_types)
+        and (location is None or location in listing["suburb"].lower() or location in listing["state"].lower())
+        and (candidates is None or position in candidates)
+    ]
+    return matches[:limit] if limit is not None else matches
+
+
+def random_queries(listings, count, seed=3):
+    rng = random.Random(seed)
+    queries = [{}, {"limit": 5}, {"max_price": 10_000_000, "limit": 5}, {"location": "nsw", "limit": 3}]
+    for _ in range(count):
+        query = {}
+        if rng.random() < 0.6:
+            query["max_price"] = rng.choice([400_000, 800_000, 1_200_000, 5_000_000])
+        if rng.random() < 0.3:
+            query["min_price"] = rng.choice([300_000, 600_000, 900_000])
+        if rng.random() < 0.4:
+            query["bedrooms"] = rng.randint(1, 4)
+        elif rng.random() < 0.2:
+            query["min_bedrooms"] = rng.randint(2, 4)
+        if rng.random() < 0.4:
+            query["property_types"] = rng.sample(["house", "apartment", "townhouse", "land"], rng.randint(1, 2))
+        if rng.random() < 0.4:
+            query["location"] = rng.choice(["VIC", "nsw", "Rich", "a", rng.choice(listings)["suburb"]])
+        if rng.random() < 0.2:
+            query["candidates"] = set(rng.sample(range(len(listings)), rng.choice([5, 50, 1500])))
+        if rng.random() < 0.5:
+            query["limit"] = rng.choice([1, 5, 20])
+        queries.append(query)
+    return queries
+
+
+def assert_matches_reference(index, listings, live):
+    for query in random_queries(listings, 200):
+        assert index.query(**query) == reference_filter(listings, live, **query), query
+
+
+def test_query_matches_list_comprehension(listings):
+    index = PropertyRangeIndex.from_listings(listings)
+    assert_matches_reference(index, listings, set(range(len(listings))))
+
+
+def test_add_many_matches_per_item_adds(listings):
+    index = PropertyRangeIndex.from_listings(listings[:1000])
+    index.add_many(enumerate(listings[1000:], start=1000))
+    assert_matches_reference(index, listings, set(range(len(listings))))
+    # A batch small enough to be inserted item by item
+    index = PropertyRangeIndex.from_listings(listings[:1990])
+    index.add_many(enumerate(listings[1990:], start=1990))
+    assert_matches_reference(index, listings, set(range(len(listings))))
+
+
+@pytest.mark.parametrize("queried_first", [False, True])
+def test_query_after_removals_and_updates(listings, queried_first):
+    listings = list(listings)
+    index = PropertyRangeIndex.from_listings(listings)
+    if queried_first:
+        # Position-ordered bucket lists now exist and must be kept up to date
+        index.query(max_price=10_000_000, limit=5)
+    rng = random.Random(11)
+    removed = set(rng.sample(range(len(listings)), 300))
+    for position in removed:
+        index.remove(position)
+    for position in rng.sample(sorted(set(range(len(listings))) - removed), 200):
+        listings[position] = dict(listings[position], price=listings[position]["price"] * 0.9, bedrooms=2)
+        index.add(position, listings[position])
+    assert_matches_reference(index, listings, set(range(len(listings))) - removed)
+
+
+def test_copy_isolates_changes(listings):
+    index = PropertyRangeIndex.from_listings(listings)
+    index.query(max_price=10_000_000, limit=5)
+    clone = index.copy()
+    for position in range(0, 400, 2):
+        clone.remove(position)
+    everything = set(range(len(listings)))
+    assert_matches_reference(index, listings, everything)
+    assert_matches_reference(clone, listings, everything - set(range(0, 400, 2)))
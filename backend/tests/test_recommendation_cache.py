@@ -0,0 +1,87 @@
+import dataclasses
+
+import pytest
+import recommendation_cache
+from property_models import PropertyType
+from recommendation_cache import RecommendationCache, profile_fingerprint
+from synthetic import SyntheticCatalogue
+
+CRITERIA = {"bedrooms": 3, "location": "Carlton"}
+
+
+@pytest.fixture(scope="module")
+def profile():
+    return SyntheticCatalogue(seed=5).profile("u1")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(recommendation_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_fingerprint_covers_everything_a_ranking_depends_on(profile):
+    key = profile_fingerprint(profile, CRITERIA, 3, 10, 0.5)
+    assert key == profile_fingerprint(dataclasses.replace(profile), dict(reversed(list(CRITERIA.items()))), 3, 10, 0.5)
+    # Fields the scorer never reads don't split the cache
+    assert key == profile_fingerprint(dataclasses.replace(profile, user_id="u2", name="Someone else",
+                                                          search_history=["Carlton"]), CRITERIA, 3, 10, 0.5)
+
+    changed = [
+        profile_fingerprint(dataclasses.replace(profile, budget_max=profile.budget_max + 10000), CRITERIA, 3, 10, 0.5),
+        profile_fingerprint(dataclasses.replace(profile, preferred_suburbs=["Fitzroy"]), CRITERIA, 3, 10, 0.5),
+        profile_fingerprint(dataclasses.replace(profile, must_have_features=["Pool"]), CRITERIA, 3, 10, 0.5),
+        profile_fingerprint(dataclasses.replace(profile, property_types=[PropertyType.LAND]),
+                            CRITERIA, 3, 10, 0.5),
+        profile_fingerprint(profile, dict(CRITERIA, bedrooms=4), 3, 10, 0.5),
+        profile_fingerprint(profile, None, 3, 10, 0.5),
+        profile_fingerprint(profile, CRITERIA, 4, 10, 0.5),
+        profile_fingerprint(profile, CRITERIA, 3, 11, 0.5),
+        profile_fingerprint(profile, CRITERIA, 3, 10, 0.6),
+    ]
+    assert key not in changed
+    assert len(set(changed)) == len(changed)
+    assert profile_fingerprint(profile, None, 3, 10, 0.5) == profile_fingerprint(profile, {}, 3, 10, 0.5)
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = RecommendationCache(ttl_seconds=60)
+    cache.put("a", "u1", ["p1", "p2"])
+    clock[0] += 59
+    assert cache.get("a") == ["p1", "p2"]
+    clock[0] += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+    # Replacing an entry restarts its TTL
+    cache.put("b", "u1", ["p3"])
+    clock[0] += 30
+    cache.put("b", "u1", ["p4"])
+    clock[0] += 45
+    assert cache.get("b") == ["p4"]
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = RecommendationCache(max_entries=3)
+    for key in "abc":
+        cache.put(key, "u1", [key])
+    assert cache.get("a") == ["a"]
+    cache.put("d", "u2", ["d"])
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == [["a"], ["c"], ["d"]]
+    cache.put("e", "u2", ["e"])
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 2
+
+    # Callers get a copy; mutating it doesn't change the cached ranking
+    cache.get("c").append("x")
+    assert cache.get("c") == ["c"]
+
+    cache.invalidate_user("u2")
+    assert [cache.get(key) for key in "cde"] == [["c"], None, None]
+    assert cache._user_keys == {"u1": {"c"}}
+    stats = cache.stats()
+    assert stats["invalidations"] == 2
+    assert stats["hit_rate"] == round(stats["hits"] / (stats["hits"] + stats["misses"]), 4)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from incremental_ranker import COMPONENTS, IncrementalRanker
+from synthetic import SyntheticCatalogue
+
+pytest.importorskip("parlant")
+from property_agent_example import PropertyPersonalizationAgent  # noqa: E402
+
+
+@pytest.fixture
+def agent(properties):
+    agent = PropertyPersonalizationAgent()
+    agent.replace_properties(properties[:1500])
+    yield agent
+    agent.scoring_pool.close()
+
+
+@pytest.fixture
+def profiles():
+    catalogue = SyntheticCatalogue(seed=5)
+    return [catalogue.profile(f"user_{i}") for i in range(6)]
+
+
+def per_listing_scores(agent, profile):
+    return np.array([agent._calculate_property_score(prop, profile, {}) for prop in agent.properties])
+
+
+def test_vectorised_scores_match_per_listing_scorer(agent, profiles):
+    for profile in profiles:
+        np.testing.assert_allclose(agent.property_store.score(profile), per_listing_scores(agent, profile),
+                                   rtol=1e-9, atol=1e-12)
+
+
+def test_incremental_scores_follow_preference_changes_and_appends(agent, profiles, properties):
+    profile = profiles[0]
+    ranker = IncrementalRanker(agent.property_store)
+    ranker.scores("u", profile)
+
+    profile.budget_max += 250000
+    profile.must_have_features = profile.must_have_features + ["Pool"]
+    np.testing.assert_allclose(ranker.scores("u", profile), per_listing_scores(agent, profile), rtol=1e-9, atol=1e-12)
+    assert ranker.partial_rescores == 1
+
+    agent.upsert_properties(properties[1500:1600])
+    ranker.extend(agent.property_store)
+    np.testing.assert_allclose(ranker.scores("u", profile), per_listing_scores(agent, profile), rtol=1e-9, atol=1e-12)
+
+
+def test_cache_is_bounded_in_bytes(agent, profiles, properties):
+    row_bytes = len(COMPONENTS) * 8
+    ranker = IncrementalRanker(agent.property_store, max_bytes=3 * row_bytes * agent.property_store.size)
+    assert ranker.max_users == 3
+    for i, profile in enumerate(profiles):
+        ranker.scores(f"user_{i}", profile)
+    assert ranker.stats()["users"] == 3
+
+    # A larger store fits fewer users; the least recently active are dropped on growth
+    agent.upsert_properties(properties[1500:])
+    ranker.extend(agent.property_store)
+    assert ranker.max_users == 2
+    assert list(ranker._users) == ["user_4", "user_5"]
+
+    tiny = IncrementalRanker(agent.property_store, max_bytes=1)
+    tiny.scores("a", profiles[0])
+    tiny.scores("b", profiles[1])
+    assert list(tiny._users) == ["b"]
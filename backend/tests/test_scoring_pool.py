@@ -0,0 +1,102 @@
+import asyncio
+import dataclasses
+import os
+import signal
+import threading
+
+import pytest
+import scoring_pool
+from catalogue import VersionedCatalogue
+from catalogue_file import CatalogueFile, write_catalogue
+from incremental_ranker import IncrementalRanker
+from scoring_pool import ScoringPool
+from synthetic import SyntheticCatalogue
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ScoringPool(workers=2, min_rows=0)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="module")
+def profiles():
+    catalogue = SyntheticCatalogue(seed=5)
+    return [catalogue.profile(f"user_{i}") for i in range(4)]
+
+
+def single_process_top_k(snapshot, profile, k, threshold):
+    return IncrementalRanker(snapshot.store).top_k("u", profile, k, threshold, store=snapshot.store, live=snapshot.live)
+
+
+def assert_matches_single_process(pool, snapshot, profiles):
+    for profile in profiles:
+        for k, threshold in ((5, 0.6), (25, 0.0)):
+            expected = single_process_top_k(snapshot, profile, k, threshold)
+            assert asyncio.run(pool.top_k(snapshot, profile, k=k, threshold=threshold)) == expected
+
+
+def test_pooled_top_k_matches_single_process(pool, properties, profiles):
+    catalogue = VersionedCatalogue()
+    catalogue.replace(properties[:1500])
+    assert_matches_single_process(pool, catalogue.snapshot(), profiles)
+
+    # Retired rows are skipped, and the few rows appended since the export are scored in-process
+    catalogue.upsert([dataclasses.replace(prop, price=prop.price // 2) for prop in properties[:1500:20]])
+    catalogue.delete([prop.id for prop in properties[1:1500:9]])
+    assert_matches_single_process(pool, catalogue.snapshot(), profiles)
+    assert pool.stats()["exports"] == 1
+
+
+def test_workers_map_a_catalogue_file_instead_of_a_copy(pool, properties, profiles, tmp_path):
+    path = str(tmp_path / "catalogue.bin")
+    write_catalogue(path, properties)
+    catalogue_file = CatalogueFile(path)
+    catalogue = VersionedCatalogue()
+    catalogue.adopt(catalogue_file.rows(), catalogue_file.row_history(),
+                    feature_index=catalogue_file.feature_index(), store=catalogue_file.property_store(),
+                    market_stats=catalogue_file.market_stats())
+    catalogue.upsert(properties[:30])
+    assert_matches_single_process(pool, catalogue.snapshot(), profiles)
+    assert pool.stats()["mapped_file"]
+
+    # Once the file is rewritten, workers can't map the version the catalogue serves: it goes through shared memory
+    write_catalogue(path, properties[:100])
+    fresh_pool = ScoringPool(workers=2, min_rows=0)
+    try:
+        assert_matches_single_process(fresh_pool, catalogue.snapshot(), profiles)
+        assert not fresh_pool.stats()["mapped_file"]
+    finally:
+        fresh_pool.close()
+
+
+def test_dead_worker_restarts_the_pool(pool, properties, profiles):
+    catalogue = VersionedCatalogue()
+    catalogue.replace(properties)
+    snapshot = catalogue.snapshot()
+    assert_matches_single_process(pool, snapshot, profiles[:1])
+
+    restarts = pool.stats()["restarts"]
+    os.kill(next(iter(pool._executor._processes)), signal.SIGKILL)
+    assert_matches_single_process(pool, snapshot, profiles)
+    assert pool.stats()["restarts"] == restarts + 1
+
+
+def test_appended_rows_are_scored_off_the_event_loop(pool, properties, profiles, monkeypatch):
+    catalogue = VersionedCatalogue()
+    catalogue.replace(properties[:1500])
+    assert_matches_single_process(pool, catalogue.snapshot(), profiles[:1])
+    catalogue.upsert(properties[1500:1520])
+    snapshot = catalogue.snapshot()
+
+    threads = []
+    score_here = scoring_pool._score_here
+
+    def recording_score_here(*args):
+        threads.append(threading.current_thread())
+        return score_here(*args)
+
+    monkeypatch.setattr(scoring_pool, "_score_here", recording_score_here)
+    assert_matches_single_process(pool, snapshot, profiles[:1])
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,94 @@
+import pytest
+import semantic_cache
+from semantic_cache import SemanticResponseCache, partition_key
+
+PARAPHRASES = [
+    ("3 bed house under 1M in Melbourne", "3 bedroom house in melbourne under $1m?"),
+    ("Show me 2 bedroom apartments in Richmond", "2 bed apartment in richmond please"),
+    ("Is the first one cheaper than the second?", "is the first one cheaper than the second one?"),
+    ("houses under 900k with a garage", "house under $900k with garage"),
+]
+
+NEAR_MISSES = [
+    ("Is the first one cheaper than the second?", "Is the second one cheaper than the first?"),
+    ("Is the apartment bigger than the house?", "Is the house bigger than the apartment?"),
+    ("3 bed house under 1m", "1 bed house under 3m"),
+    ("house with a pool", "house without a pool"),
+    ("Does it have a garage?", "Doesn't it have a garage?"),
+    ("3 bed house under 1M in Melbourne", "3 bed house under 1M in Melbourne close to schools?"),
+]
+
+PARTITION = partition_key({"bedrooms": 3}, ["p1", "p2"])
+
+
+@pytest.mark.parametrize("stored, asked", PARAPHRASES)
+def test_paraphrases_reuse_the_reply(stored, asked):
+    cache = SemanticResponseCache()
+    cache.put(PARTITION, stored, "reply", catalogue_version=1)
+    assert cache.get(PARTITION, asked, catalogue_version=1) == "reply"
+
+
+@pytest.mark.parametrize("stored, asked", NEAR_MISSES)
+def test_near_misses_do_not(stored, asked):
+    cache = SemanticResponseCache()
+    cache.put(PARTITION, stored, "reply", catalogue_version=1)
+    assert cache.get(PARTITION, asked, catalogue_version=1) is None
+    assert cache.get(PARTITION, stored, catalogue_version=1) == "reply"
+
+
+def test_reversed_comparison_is_rejected_by_verification_not_similarity():
+    cache = SemanticResponseCache()
+    stored, asked = NEAR_MISSES[0]
+    assert float(cache.embedder.embed(stored) @ cache.embedder.embed(asked)) >= cache.threshold
+    cache.put(PARTITION, stored, "reply", catalogue_version=1)
+    assert cache.get(PARTITION, asked, catalogue_version=1) is None
+    assert cache.stats()["rejections"] == 1
+
+
+def test_partitions_separate_users_and_shortlists():
+    assert partition_key({"bedrooms": 3}, ["p1"], ["alice", {"name": "Alice"}, []]) != \
+        partition_key({"bedrooms": 3}, ["p1"], ["bob", {"name": "Bob"}, []])
+    assert partition_key({"bedrooms": 3}, ["p1"]) != partition_key({"bedrooms": 3}, ["p2"])
+
+    cache = SemanticResponseCache()
+    alice = partition_key({}, ["p1"], ["alice", {"name": "Alice"}, []])
+    bob = partition_key({}, ["p1"], ["bob", {"name": "Bob"}, []])
+    cache.put(alice, "which one has a pool?", "Alice, the first one does", catalogue_version=1)
+    assert cache.get(bob, "which one has a pool?", catalogue_version=1) is None
+    assert cache.get(alice, "which one has a pool?", catalogue_version=1) == "Alice, the first one does"
+
+
+def test_ttl_lru_and_version_invalidation(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put(PARTITION, "house with a pool", "pool", catalogue_version=1)
+    cache.put(PARTITION, "apartment with a gym", "gym", catalogue_version=1)
+    assert cache.get(PARTITION, "house with a pool", catalogue_version=1) == "pool"
+    cache.put(PARTITION, "townhouse with a garden", "garden", catalogue_version=1)
+    # The gym reply was least recently used
+    assert cache.get(PARTITION, "apartment with a gym", catalogue_version=1) is None
+    assert cache.stats()["evictions"] == 1
+
+    now[0] += 61
+    assert cache.get(PARTITION, "house with a pool", catalogue_version=1) is None
+    assert cache.stats()["expirations"] >= 1
+
+    cache.put(PARTITION, "house with a pool", "pool", catalogue_version=1)
+    assert cache.get(PARTITION, "house with a pool", catalogue_version=2) is None
+    assert len(cache) == 0
+
+
+def test_agent_partitions_replies_per_user(properties):
+    pytest.importorskip("parlant")
+    from property_agent_example import PropertyPersonalizationAgent
+
+    agent = PropertyPersonalizationAgent()
+    shortlist = properties[:3]
+    context = {"user_profile": {"name": "Alice", "deal_breakers": ["busy road"]}, "conversation_history": []}
+    alice = agent._response_partition("alice", "which one has a pool?", shortlist, context)
+    assert alice == agent._response_partition("alice", "which one has a pool?", shortlist, dict(context))
+    assert alice != agent._response_partition("bob", "which one has a pool?", shortlist, context)
+    later = dict(context, conversation_history=[{"role": "user", "content": "I hate stairs"}])
+    assert alice != agent._response_partition("alice", "which one has a pool?", shortlist, later)
+    agent.scoring_pool.close()
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+from session_store import RedisSessionStore, RedisStandIn, SQLiteSessionStore
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_sqlite_writes_reach_other_stores_without_a_later_write(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    writer = SQLiteSessionStore(path, flush_interval=0.1)
+    reader = SQLiteSessionStore(path, flush_interval=0.1)
+    try:
+        writer.put("u1", b"alice")
+        # The writer's own reads see the buffered write straight away
+        assert writer.get("u1") == b"alice"
+        assert wait_for(lambda: reader.get("u1") == b"alice", timeout=1.0)
+
+        writer.delete("u1")
+        assert writer.get("u1") is None
+        assert wait_for(lambda: reader.get("u1") is None, timeout=1.0)
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_sqlite_batches_and_close_flush(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path, batch_size=3, flush_interval=60)
+    other = SQLiteSessionStore(path, flush_interval=0)
+    try:
+        store.put("u1", b"1")
+        store.put("u2", b"2")
+        assert other.get("u1") is None
+        store.put("u3", b"3")
+        assert [other.get(user_id) for user_id in ("u1", "u2", "u3")] == [b"1", b"2", b"3"]
+
+        store.put("u4", b"4")
+        store.close()
+        store.close()
+        assert other.get("u4") == b"4"
+    finally:
+        other.close()
+
+
+def test_sqlite_idle_eviction(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), flush_interval=0, idle_ttl=60)
+    try:
+        store.put("stale", b"old")
+        store._conn.execute("UPDATE sessions SET last_access = ? WHERE user_id = 'stale'", (time.time() - 120,))
+        store.put("fresh", b"new")
+        assert store.get("stale") is None
+        assert store.evict_idle() == 1
+        assert store.get("fresh") == b"new"
+    finally:
+        store.close()
+
+
+@pytest.fixture
+def standin():
+    server = RedisStandIn(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_redis_round_trip_against_the_standin(standin):
+    port = standin.server_address[1]
+    store = RedisSessionStore(port=port, db=1, idle_ttl=60)
+    other = RedisSessionStore(port=port, db=1, idle_ttl=60)
+    try:
+        assert store.get("u1") is None
+        data = bytes(range(256)) + b"\r\n$3\r\n"
+        store.put("u1", data)
+        assert other.get("u1") == data
+        assert standin.data[b"session:u1"][0] == data
+
+        store.delete("u1")
+        assert other.get("u1") is None
+        assert store.client.pipeline([("PING",), ("GET", "session:u1")]) == ["PONG", None]
+    finally:
+        store.close()
+        other.close()
+
+
+def test_redis_reads_refresh_expiry_and_reconnect(standin):
+    store = RedisSessionStore(port=standin.server_address[1], idle_ttl=1)
+    try:
+        store.put("u1", b"alice")
+        assert store.get("u1") == b"alice"
+        assert standin.data[b"session:u1"][1] > time.monotonic()
+
+        # A dropped connection is reopened for the next command
+        store.client._sock.close()
+        assert store.get("u1") == b"alice"
+
+        time.sleep(1.1)
+        assert store.get("u1") is None
+        with pytest.raises(RuntimeError, match="unknown command"):
+            store.client.execute("FLUSHALL")
+    finally:
+        store.close()
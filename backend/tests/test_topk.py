@@ -0,0 +1,59 @@
+import random
+
+import pytest
+from topk import TopK, merge_top_k, stream_top_k
+
+
+def full_sort(items, score, k, threshold=float("-inf")):
+    """Reference ranking: stable descending sort of every score above the threshold"""
+    ranked = sorted(((item, score(item)) for item in items), key=lambda pair: -pair[1])
+    return [(item, value) for item, value in ranked if value > threshold][:k]
+
+
+def scored_items(count, seed, levels):
+    """Items whose scores come from a few levels, so most of them tie"""
+    rng = random.Random(seed)
+    return [(f"p{i}", rng.randrange(levels) / levels) for i in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("k, threshold", [(1, float("-inf")), (5, float("-inf")), (10, 0.5), (50, 0.9), (0, 0.0)])
+def test_pruned_selection_matches_a_full_sort_including_ties(seed, k, threshold):
+    items = scored_items(2000, seed, levels=12)
+    score = dict(items).__getitem__
+    names = [name for name, _ in items]
+    slack = random.Random(seed + 100)
+    loose = {name: score(name) + slack.choice([0.0, 0.0, 0.05, 0.5]) for name in names}
+    scored = []
+
+    def counting_score(name):
+        scored.append(name)
+        return score(name)
+
+    expected = full_sort(names, score, k, threshold)
+    assert stream_top_k(names, score, k, threshold) == expected
+    # A bound equal to the score prunes everything that would only tie the floor
+    assert stream_top_k(names, counting_score, k, threshold, upper_bound=score) == expected
+    if k and expected:
+        assert len(scored) < len(names)
+    assert stream_top_k(names, score, k, threshold, upper_bound=loose.__getitem__) == expected
+
+
+def test_pruned_items_are_counted_and_keep_arrival_order():
+    selector = TopK(2)
+    for name, value in [("a", 1.0), ("b", 1.0)]:
+        assert selector.push(value, name)
+    assert not selector.would_accept(1.0)
+    selector.skip()
+    assert selector.push(2.0, "c")
+    assert selector.results() == [("c", 2.0), ("a", 1.0)]
+    assert selector.pruned == 1
+
+
+def test_merging_ranked_partials_matches_a_full_sort():
+    items = scored_items(3000, 9, levels=20)
+    score = dict(items).__getitem__
+    names = [name for name, _ in items]
+    shards = [names[start:start + 700] for start in range(0, len(names), 700)]
+    partials = [full_sort(shard, score, 40) for shard in shards]
+    assert merge_top_k(partials, k=40) == full_sort(names, score, 40)
@@ -100,26 +100,65 @@ const PropertyChatWidget: React.FC<PropertyChatWidgetProps> = ({
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Accept': 'text/event-stream',
         },
         body: JSON.stringify({
           message: text.trim(),
           userId: userId,
-          context: {}
+          context: {},
+          stream: true
         }),
       });
 
-      const data = await response.json();
-
-      const botMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        text: data.response,
-        isUser: false,
-        timestamp: new Date(),
-        recommendations: data.recommendations || [],
-        type: data.type
+      const botId = (Date.now() + 1).toString();
+      const updateBotMessage = (update: Partial<Message>) => {
+        setMessages(prev => {
+          if (!prev.some(m => m.id === botId)) {
+            return [...prev, { id: botId, text: '', isUser: false, timestamp: new Date(), ...update }];
+          }
+          return prev.map(m => (m.id === botId ? { ...m, ...update } : m));
+        });
       };
 
-      setMessages(prev => [...prev, botMessage]);
+      if (!response.body || !(response.headers.get('content-type') || '').includes('text/event-stream')) {
+        const data = await response.json();
+        updateBotMessage({ text: data.response, recommendations: data.recommendations || [], type: data.type });
+        return;
+      }
+
+      // Render listings and reply text as the server streams them
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let replyText = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const frame = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          const eventName = frame.match(/^event: (.*)$/m)?.[1];
+          const dataLine = frame.match(/^data: (.*)$/m)?.[1];
+          if (!eventName || !dataLine) continue;
+          const data = JSON.parse(dataLine);
+
+          if (eventName === 'recommendations') {
+            updateBotMessage({ recommendations: data.recommendations || [] });
+          } else if (eventName === 'token') {
+            replyText += data.text;
+            updateBotMessage({ text: replyText });
+            setIsLoading(false);
+          } else if (eventName === 'done') {
+            updateBotMessage({ text: data.response, recommendations: data.recommendations || [], type: data.type });
+          } else if (eventName === 'error') {
+            throw new Error(data.message);
+          }
+        }
+      }
     } catch (error) {
       console.error('Error sending message:', error);
       const errorMessage: Message = {
@@ -117,13 +117,14 @@ async def demo_property_search():
         
         for question in follow_up_responses:
             print(f"👤 User: {question}")
+            # The same bounded context the agent sends: profile and shortlist summaries, recent turns
             response = await agent.agent.chat(
                 question,
-                context={
-                    "user_profile": agent.user_profiles[user_id].__dict__,
-                    "available_properties": [p.__dict__ for p in agent.properties],
-                    "conversation_context": agent.conversation_context[user_id]
-                }
+                context=agent.context_builder.build(
+                    agent.user_profiles[user_id],
+                    updated_recommendations,
+                    conversation_history=agent.conversation_context[user_id]["conversation_history"].to_context()
+                )
             )
             print(f"🤖 Agent: {response}")
             print()
@@ -9,8 +9,13 @@ the full Parlant setup, perfect for showcasing the frontend.
 
 import asyncio
 import json
+import os
+import sys
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "backend", "agents"))
+from topk import stream_top_k
 
 class SimplePropertyDemo:
     """Simple property demo without Parlant dependency"""
@@ -86,27 +91,69 @@ class SimplePropertyDemo:
         self.user_profiles[user_id] = profile
         return profile
     
-    def get_personalized_recommendations(self, user_id: str, search_criteria: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    def get_personalized_recommendations(self, user_id: str, search_criteria: Dict[str, Any] = None,
+                                         k: int = 5, threshold: float = 0.6) -> List[Dict[str, Any]]:
         """Get personalized property recommendations"""
         if user_id not in self.user_profiles:
             self.create_user_profile(user_id)
         
         user_profile = self.user_profiles[user_id]
-        recommendations = []
+        search_criteria = search_criteria or {}
         
-        for prop in self.properties:
-            score = self._calculate_property_score(prop, user_profile, search_criteria or {})
-            if score > 0.6:  # Threshold for recommendations
-                prop_with_score = prop.copy()
-                prop_with_score["match_score"] = score
-                recommendations.append(prop_with_score)
+        # Bounded heap keeps only the top k; listings whose best possible score
+        # can't enter it are skipped before feature matching
+        top = stream_top_k(
+            self.properties,
+            score=lambda prop: self._calculate_property_score(prop, user_profile, search_criteria),
+            k=k,
+            threshold=threshold,
+            upper_bound=lambda prop: self._score_upper_bound(prop, user_profile),
+        )
         
-        # Sort by score
-        recommendations.sort(key=lambda x: x["match_score"], reverse=True)
-        return recommendations[:5]  # Top 5 recommendations
+        # Only the winners are copied
+        recommendations = []
+        for prop, score in top:
+            prop_with_score = prop.copy()
+            prop_with_score["match_score"] = score
+            recommendations.append(prop_with_score)
+        return recommendations
+    
+    def _score_upper_bound(self, property: Dict[str, Any], user_profile: Dict[str, Any]) -> float:
+        """Best score the property could reach if it matched every wanted feature"""
+        score, max_score = self._base_score(property, user_profile)
+        feature_weight = 0.25
+        if user_profile["must_have_features"]:
+            score += feature_weight * 0.7 * 1.0
+        if user_profile["nice_to_have_features"]:
+            score += feature_weight * 0.3 * 1.0
+        max_score += feature_weight
+        return score / max_score if max_score > 0 else 0
     
     def _calculate_property_score(self, property: Dict[str, Any], user_profile: Dict[str, Any], search_criteria: Dict[str, Any]) -> float:
         """Calculate a personalized score for a property"""
+        score, max_score = self._base_score(property, user_profile)
+        
+        # Feature matching (25% weight)
+        feature_weight = 0.25
+        must_have_matches = sum(1 for feature in user_profile["must_have_features"] 
+                              if feature.lower() in [f.lower() for f in property["features"]])
+        nice_to_have_matches = sum(1 for feature in user_profile["nice_to_have_features"] 
+                                 if feature.lower() in [f.lower() for f in property["features"]])
+        
+        if user_profile["must_have_features"]:
+            must_have_score = must_have_matches / len(user_profile["must_have_features"])
+            score += feature_weight * 0.7 * must_have_score
+        
+        if user_profile["nice_to_have_features"]:
+            nice_to_have_score = nice_to_have_matches / len(user_profile["nice_to_have_features"])
+            score += feature_weight * 0.3 * nice_to_have_score
+        
+        max_score += feature_weight
+        
+        return score / max_score if max_score > 0 else 0
+    
+    def _base_score(self, property: Dict[str, Any], user_profile: Dict[str, Any]) -> Tuple[float, float]:
+        """Budget, type and suburb components as (score, max_score) before feature matching"""
         score = 0.0
         max_score = 0.0
         
@@ -132,24 +179,7 @@ class SimplePropertyDemo:
             score += suburb_weight
         max_score += suburb_weight
         
-        # Feature matching (25% weight)
-        feature_weight = 0.25
-        must_have_matches = sum(1 for feature in user_profile["must_have_features"] 
-                              if feature.lower() in [f.lower() for f in property["features"]])
-        nice_to_have_matches = sum(1 for feature in user_profile["nice_to_have_features"] 
-                                 if feature.lower() in [f.lower() for f in property["features"]])
-        
-        if user_profile["must_have_features"]:
-            must_have_score = must_have_matches / len(user_profile["must_have_features"])
-            score += feature_weight * 0.7 * must_have_score
-        
-        if user_profile["nice_to_have_features"]:
-            nice_to_have_score = nice_to_have_matches / len(user_profile["nice_to_have_features"])
-            score += feature_weight * 0.3 * nice_to_have_score
-        
-        max_score += feature_weight
-        
-        return score / max_score if max_score > 0 else 0
+        return score, max_score
     
     def explain_recommendation(self, user_id: str, property_id: str) -> str:
         """Provide an explanation for why a property was recommended"""
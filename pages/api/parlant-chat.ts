@@ -1,6 +1,6 @@
 import { NextApiRequest, NextApiResponse } from 'next';
-import { spawn } from 'child_process';
-import { promisify } from 'util';
+import { spawn, ChildProcess } from 'child_process';
+import { createInterface } from 'readline';
 
 // Real estate context and property data
 const realEstateContext = {
@@ -184,49 +184,226 @@ const realEstateContext = {
   ]
 };
 
-// Function to call Python Parlant integration
-async function callParlantAI(message: string, userId: string): Promise<any> {
-  return new Promise((resolve, reject) => {
-    const pythonProcess = spawn('python3', [
-      './backend/agents/parlant_chat.py',
-      '--message', message,
-      '--user-id', userId
-    ], {
+// Persistent Python chat worker. One warm process answers every request over
+// newline-delimited JSON, so requests no longer pay for interpreter startup,
+// importing Parlant and initialising the agent.
+const WORKER_REQUEST_TIMEOUT_MS = 30000;
+// A cold worker imports Parlant and warms the agent before its ready line;
+// requests wait for that without it counting against their own timeout
+const WORKER_STARTUP_TIMEOUT_MS = 120000;
+
+type StreamEvent = { event: string; [key: string]: any };
+
+type PendingRequest = {
+  resolve: (value: any) => void;
+  reject: (reason: Error) => void;
+  // Unset while the request waits for the worker's ready line
+  timer?: NodeJS.Timeout;
+  onEvent?: (event: StreamEvent) => void;
+};
+
+class ChatWorkerClient {
+  private worker: ChildProcess | null = null;
+  private pending = new Map<string, PendingRequest>();
+  private nextId = 0;
+  private stderrTail = '';
+  private spawnedAt = 0;
+  private ready = false;
+  private startupTimer: NodeJS.Timeout | null = null;
+  // Request lines held until the worker is ready, in arrival order
+  private queued: { id: string; line: string }[] = [];
+  // Time from spawn to the worker's ready line, reported once in debug timings
+  startupMs: number | null = null;
+
+  private ensureWorker(): ChildProcess {
+    if (this.worker) {
+      return this.worker;
+    }
+
+    this.spawnedAt = performance.now();
+    this.startupMs = null;
+    this.ready = false;
+    const worker = spawn('python3', ['./backend/agents/chat_worker.py'], {
       cwd: process.cwd()
     });
 
-    let output = '';
-    let error = '';
+    createInterface({ input: worker.stdout! }).on('line', (line) => this.onLine(line));
+
+    worker.stderr!.on('data', (data) => {
+      // Keep only the tail so a chatty worker cannot grow this without bound
+      this.stderrTail = (this.stderrTail + data.toString()).slice(-4000);
+    });
+
+    // A replaced worker's late events must not fail requests already sent to its successor
+    worker.on('close', (code) => {
+      if (this.discard(worker)) {
+        this.failAll(new Error(`Chat worker exited with code ${code}: ${this.stderrTail}`));
+      }
+    });
 
-    pythonProcess.stdout.on('data', (data) => {
-      output += data.toString();
+    worker.on('error', (err) => {
+      if (this.discard(worker)) {
+        this.failAll(err);
+      }
     });
 
-    pythonProcess.stderr.on('data', (data) => {
-      error += data.toString();
+    // Writing to a worker that just crashed fails with EPIPE here rather than throwing from write()
+    worker.stdin!.on('error', (err) => {
+      if (this.discard(worker)) {
+        this.failAll(new Error(`Chat worker stdin failed: ${err.message}`));
+      }
     });
 
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        try {
-          // Parse the JSON response from output
-          const lines = output.trim().split('\n');
-          const jsonLine = lines[lines.length - 1];
-          const result = JSON.parse(jsonLine);
-          resolve(result);
-        } catch (e) {
-          // Fallback to simple response
-          resolve({
-            response: "I'm your realestate.com.au AI assistant powered by Parlant. How can I help you find the perfect property?",
-            recommendations: [],
-            type: 'parlant_ai'
-          });
+    this.startupTimer = setTimeout(() => {
+      this.stderrTail += `\nno ready line after ${WORKER_STARTUP_TIMEOUT_MS}ms`;
+      worker.kill();
+    }, WORKER_STARTUP_TIMEOUT_MS);
+
+    this.worker = worker;
+    return worker;
+  }
+
+  // Forget the current worker; false when it was already replaced
+  private discard(worker: ChildProcess): boolean {
+    if (this.worker !== worker) {
+      return false;
+    }
+    this.worker = null;
+    this.ready = false;
+    if (this.startupTimer) {
+      clearTimeout(this.startupTimer);
+      this.startupTimer = null;
+    }
+    return true;
+  }
+
+  private onReady() {
+    if (this.ready || !this.worker) {
+      return;
+    }
+    this.ready = true;
+    if (this.startupTimer) {
+      clearTimeout(this.startupTimer);
+      this.startupTimer = null;
+    }
+    const queued = this.queued;
+    this.queued = [];
+    queued.forEach(({ id, line }) => this.send(id, line));
+  }
+
+  private send(id: string, line: string) {
+    const entry = this.pending.get(id);
+    if (!entry || !this.worker) {
+      return;
+    }
+    entry.timer = this.startTimer(id, entry.reject);
+    this.worker.stdin!.write(line);
+  }
+
+  private onLine(line: string) {
+    let reply: any;
+    try {
+      reply = JSON.parse(line);
+    } catch (e) {
+      return;
+    }
+
+    // The unsolicited ready line and malformed-request errors carry no id
+    if (reply.id === null || reply.id === undefined) {
+      if (reply.status === 'ready') {
+        if (this.startupMs === null) {
+          this.startupMs = performance.now() - this.spawnedAt;
         }
+        this.onReady();
+      }
+      return;
+    }
+
+    const entry = this.pending.get(reply.id);
+    if (!entry) {
+      return;
+    }
+
+    // Intermediate stream lines keep the request open; the timeout restarts on every event
+    if (reply.status === 'stream') {
+      clearTimeout(entry.timer);
+      entry.timer = this.startTimer(reply.id, entry.reject);
+      entry.onEvent?.(reply.event);
+      return;
+    }
+
+    this.pending.delete(reply.id);
+    clearTimeout(entry.timer);
+
+    if (reply.status === 'ok') {
+      entry.resolve(reply.result);
+    } else {
+      entry.reject(new Error(`Chat worker ${reply.status}: ${reply.error}`));
+    }
+  }
+
+  private failAll(err: Error) {
+    this.pending.forEach((entry) => {
+      clearTimeout(entry.timer);
+      entry.reject(err);
+    });
+    this.pending.clear();
+    this.queued = [];
+  }
+
+  private startTimer(id: string, reject: (reason: Error) => void): NodeJS.Timeout {
+    return setTimeout(() => {
+      this.pending.delete(id);
+      reject(new Error(`Chat worker request ${id} timed out`));
+    }, WORKER_REQUEST_TIMEOUT_MS);
+  }
+
+  request(payload: Record<string, any>, onEvent?: (event: StreamEvent) => void): Promise<any> {
+    this.ensureWorker();
+    const id = String(++this.nextId);
+    const line = JSON.stringify({ id, ...payload }) + '\n';
+
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject, onEvent });
+      if (this.ready) {
+        this.send(id, line);
       } else {
-        reject(new Error(`Python process exited with code ${code}: ${error}`));
+        this.queued.push({ id, line });
       }
     });
-  });
+  }
+}
+
+// Survive Next.js hot reloads in development without leaking workers
+const globalForWorker = globalThis as unknown as { chatWorkerClient?: ChatWorkerClient };
+const chatWorkerClient = globalForWorker.chatWorkerClient ?? new ChatWorkerClient();
+globalForWorker.chatWorkerClient = chatWorkerClient;
+
+// Function to call Python Parlant integration
+async function callParlantAI(message: string, userId: string, debug = false): Promise<any> {
+  if (!debug) {
+    return chatWorkerClient.request({ op: 'chat', message, user_id: userId });
+  }
+
+  // Debug: wrap the worker's per-span breakdown with what only the API route can see
+  const startupBefore = chatWorkerClient.startupMs;
+  const started = performance.now();
+  const result = await chatWorkerClient.request({ op: 'chat', message, user_id: userId, debug: true });
+  const timings: Record<string, number> = {
+    ...(result.timings || {}),
+    worker_roundtrip_ms: performance.now() - started
+  };
+  if (startupBefore === null && chatWorkerClient.startupMs !== null) {
+    // This request paid for spawning the worker
+    timings.worker_startup_ms = chatWorkerClient.startupMs;
+  }
+  return { ...result, timings };
+}
+
+// Streaming variant: recommendation and token events arrive through onEvent,
+// the promise resolves with the complete result once the worker is done
+async function streamParlantAI(message: string, userId: string, onEvent: (event: StreamEvent) => void): Promise<any> {
+  return chatWorkerClient.request({ op: 'chat_stream', message, user_id: userId }, onEvent);
 }
 
 // Enhanced AI responses with more intelligent conversation
@@ -424,11 +601,17 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       return res.status(400).json({ error: 'Message and userId are required' });
     }
 
+    const wantsStream = req.body.stream === true || (req.headers.accept || '').includes('text/event-stream');
+    if (wantsStream) {
+      return handleStream(res, message, userId);
+    }
+
     // Try to use Parlant AI first, fallback to enhanced pattern matching
+    const debug = req.body.debug === true || process.env.CHAT_DEBUG === '1';
     let aiResponse;
     try {
       // Use real Parlant integration
-      aiResponse = await callParlantAI(message, userId);
+      aiResponse = await callParlantAI(message, userId, debug);
     } catch (error) {
       console.log('Falling back to pattern matching:', error);
       aiResponse = getAIResponse(message, userId);
@@ -439,7 +622,8 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       recommendations: aiResponse.recommendations || [],
       type: aiResponse.type || 'chat',
       context: realEstateContext,
-      ai_powered: true
+      ai_powered: true,
+      ...(debug ? { timings: aiResponse.timings || { fallback: true } } : {})
     });
 
   } catch (error) {
@@ -449,4 +633,49 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       message: 'Something went wrong. Please try again.'
     });
   }
-}
\ No newline at end of file
+}
+
+// Server-sent events: "recommendations" as soon as filtering finishes, "token"
+// chunks of the reply as they are produced, then "done" with the same payload
+// the JSON endpoint returns.
+async function handleStream(res: NextApiResponse, message: string, userId: string) {
+  res.writeHead(200, {
+    'Content-Type': 'text/event-stream; charset=utf-8',
+    'Cache-Control': 'no-cache, no-transform',
+    Connection: 'keep-alive',
+    'X-Accel-Buffering': 'no'
+  });
+
+  const writeEvent = (event: string, data: any) => {
+    res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+  };
+
+  let streamed = false;
+  let aiResponse;
+  try {
+    aiResponse = await streamParlantAI(message, userId, (event) => {
+      streamed = true;
+      const { event: name, ...data } = event;
+      writeEvent(name, data);
+    });
+  } catch (error) {
+    if (streamed) {
+      // Part of the answer is already on screen; report instead of mixing in a second reply
+      writeEvent('error', { message: 'Something went wrong. Please try again.' });
+      return res.end();
+    }
+    console.log('Falling back to pattern matching:', error);
+    aiResponse = getAIResponse(message, userId);
+    writeEvent('recommendations', { recommendations: aiResponse.recommendations || [] });
+    writeEvent('token', { text: aiResponse.response });
+  }
+
+  writeEvent('done', {
+    response: aiResponse.response,
+    recommendations: aiResponse.recommendations || [],
+    type: aiResponse.type || 'chat',
+    context: realEstateContext,
+    ai_powered: true
+  });
+  res.end();
+}